@@ -0,0 +1,2 @@
+# Benchmarks and golden-output checks for the trip services.
+# Run from the server directory, e.g. `python -m benchmarks.hos`.
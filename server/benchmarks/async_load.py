@@ -0,0 +1,226 @@
+"""
+Concurrency benchmark: WSGI (gunicorn sync workers) vs ASGI (uvicorn).
+
+    python -m benchmarks.async_load
+    python -m benchmarks.async_load --latency 0.5 --concurrency 200
+
+A local stub plays ORS with a fixed response latency, so the numbers show
+how many in-flight plan-trip requests each server model can keep waiting
+on the upstream — not how fast ORS is. Both servers get the same number of
+worker processes and the route cache is disabled.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIR))
+
+from trip.services.routing import METERS_TO_MILES, _haversine, encode_polyline  # noqa: E402
+
+
+# ---- stub upstream ----
+
+def stub_handler(latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+            self._send(ors_response(body["coordinates"]))
+
+        def _send(self, payload: dict):
+            raw = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def ors_response(coordinates: list[list[float]]) -> dict:
+    """A straight-line multi-leg ORS directions response."""
+    pts = [[lat, lng] for lng, lat in coordinates]
+    geometry, way_points, segments = [], [], []
+    for a, b in zip(pts, pts[1:]):
+        seg = [[a[0] + (b[0] - a[0]) * k / 20, a[1] + (b[1] - a[1]) * k / 20] for k in range(21)]
+        if geometry:
+            seg = seg[1:]
+        else:
+            way_points.append(0)
+        geometry += seg
+        way_points.append(len(geometry) - 1)
+        meters = _haversine(a, b) * 1.2 / METERS_TO_MILES
+        segments.append({"distance": meters, "duration": meters / 25})
+    return {
+        "routes": [{
+            "summary": {
+                "distance": sum(s["distance"] for s in segments),
+                "duration": sum(s["duration"] for s in segments),
+            },
+            "segments": segments,
+            "way_points": way_points,
+            "geometry": encode_polyline(geometry),
+        }]
+    }
+
+
+def start_stub(latency: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub_handler(latency))
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ---- app servers ----
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(
+    kind: str, port: int, workers: int, stub_url: str, extra_env: dict | None = None,
+) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "ORS_DIRECTIONS_URL": stub_url,
+        "OPENROUTESERVICE_API_KEY": "benchmark",
+        "ROUTE_CACHE_SIZE": "0",
+        "DJANGO_ALLOWED_HOSTS": "127.0.0.1",
+        "DJANGO_DEBUG": "False",
+        "DJANGO_ASYNC_API": "True" if kind == "asgi" else "False",
+        **(extra_env or {}),
+    }
+    if kind == "asgi":
+        cmd = [
+            sys.executable, "-m", "uvicorn", "config.asgi:application",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ]
+    else:
+        cmd = [
+            sys.executable, "-m", "gunicorn", "config.wsgi:application",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+            "--log-level", "warning", "--backlog", "2048",
+        ]
+    proc = subprocess.Popen(cmd, cwd=SERVER_DIR, env=env)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/health/", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{kind} server did not come up on port {port}")
+
+
+# ---- load driver ----
+
+def trip_payload(rng: random.Random) -> dict:
+    def coords():
+        return round(rng.uniform(30, 45), 4), round(rng.uniform(-120, -75), 4)
+
+    (clat, clng), (plat, plng), (dlat, dlng) = coords(), coords(), coords()
+    return {
+        "current_location": "A", "current_lat": clat, "current_lng": clng,
+        "pickup_location": "B", "pickup_lat": plat, "pickup_lng": plng,
+        "dropoff_location": "C", "dropoff_lat": dlat, "dropoff_lng": dlng,
+        "cycle_used_hours": 10,
+    }
+
+
+async def drive_load(base: str, requests: int, concurrency: int) -> dict:
+    rng = random.Random(1)
+    payloads = [trip_payload(rng) for _ in range(requests)]
+    latencies, errors = [], 0
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one(payload):
+            nonlocal errors
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.post(f"{base}/api/plan-trip/", json=payload)
+                    ok = resp.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(p) for p in payloads))
+        wall = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / wall,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="stub ORS latency (s)")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    stub = start_stub(args.latency)
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}/v2/directions/driving-hgv"
+    print(
+        f"stub ORS latency {args.latency * 1000:.0f} ms, {args.requests} requests, "
+        f"concurrency {args.concurrency}, {args.workers} workers\n"
+    )
+    print(f"{'server':<28} {'ok':>5} {'err':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9}")
+
+    for kind, label in (("wsgi", "gunicorn (sync, WSGI)"), ("asgi", "uvicorn (async, ASGI)")):
+        port = free_port()
+        proc = start_app(kind, port, args.workers, stub_url)
+        try:
+            r = asyncio.run(drive_load(f"http://127.0.0.1:{port}", args.requests, args.concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(
+            f"{label:<28} {r['ok']:>5} {r['errors']:>5} {r['rps']:>8.1f} "
+            f"{r['p50_ms']:>9.0f} {r['p95_ms']:>9.0f}"
+        )
+
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
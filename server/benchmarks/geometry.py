@@ -0,0 +1,136 @@
+"""
+Route geometry benchmark: polyline decoding and point lookup.
+
+    python -m benchmarks.geometry
+
+Synthetic HGV-like routes of 1k–100k points are encoded, then decoded with
+the pure-Python and NumPy decoders (checked equal), and stop placement is
+timed via a RouteIndex lookup vs a fresh linear scan per point. Finally the
+simulator is timed with and without placing its events on the geometry.
+"""
+
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from trip.services import routing  # noqa: E402
+from trip.services.hos_calculator import TripSimulator  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+STOPS_PER_ROUTE = 50
+
+
+def synthetic_route(n: int, seed: int = 7) -> list[list[float]]:
+    """A wiggly coast-to-coast-ish line with ~5-decimal precision."""
+    rng = random.Random(seed)
+    lat, lng = 40.7128, -74.0060
+    pts = []
+    for i in range(n):
+        lat += 0.00002 * math.sin(i / 50) + rng.uniform(-0.0004, 0.0004)
+        lng -= 50 / n + rng.uniform(-0.0002, 0.0002)
+        pts.append([round(lat, 5), round(lng, 5)])
+    return pts
+
+
+def _pure_decode(encoded: str):
+    np_saved, routing.np = routing.np, None
+    try:
+        return routing.decode_polyline(encoded)
+    finally:
+        routing.np = np_saved
+
+
+def _linear_point(geometry, fraction):
+    """The original O(n) scan, kept here as the comparison baseline."""
+    total = 0.0
+    segs = []
+    for i in range(1, len(geometry)):
+        d = routing._haversine(geometry[i - 1], geometry[i])
+        segs.append(d)
+        total += d
+    target = total * fraction
+    acc = 0.0
+    for i, d in enumerate(segs):
+        if acc + d >= target:
+            f = (target - acc) / d if d > 0 else 0
+            return [
+                geometry[i][0] + f * (geometry[i + 1][0] - geometry[i][0]),
+                geometry[i][1] + f * (geometry[i + 1][1] - geometry[i][1]),
+            ]
+        acc += d
+    return geometry[-1]
+
+
+def _simulate(pts, index):
+    sim = TripSimulator(cycle_used_hours=20)
+    sim.drive_segment(3000, "A", "B", *pts[0], *pts[-1], route=index)
+    if index is not None:
+        sim.place_on_routes()
+    return sim
+
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ok = True
+    print(f"{'points':>8} {'decode py':>10} {'decode np':>10} {'index':>8} "
+          f"{'scan/stop':>10} {'index/stop':>11}   (ms)")
+    for n in SIZES:
+        pts = synthetic_route(n)
+        encoded = routing.encode_polyline(pts)
+
+        decoded = routing.decode_polyline(encoded)
+        if decoded != _pure_decode(encoded) or decoded != pts:
+            ok = False
+            print(f"  MISMATCH decoding {n}-point route")
+
+        index = routing.RouteIndex(decoded)
+        fractions = [i / STOPS_PER_ROUTE for i in range(1, STOPS_PER_ROUTE)]
+        for f in fractions[::7]:
+            a, b = index.point_at_fraction(f), _linear_point(decoded, f)
+            if max(abs(a[0] - b[0]), abs(a[1] - b[1])) > 1e-9:
+                ok = False
+                print(f"  MISMATCH point at {f:.2f} on {n}-point route: {a} vs {b}")
+
+        t_py = _timed(lambda: _pure_decode(encoded), args.repeat)
+        t_np = _timed(lambda: routing.decode_polyline_array(encoded), args.repeat)
+        t_index = _timed(lambda: routing.RouteIndex(decoded), args.repeat)
+        t_scan = _timed(lambda: _linear_point(decoded, 0.5), args.repeat)
+        t_lookup = _timed(lambda: [index.point_at_fraction(f) for f in fractions], args.repeat)
+        print(f"{n:>8} {t_py:>10.2f} {t_np:>10.2f} {t_index:>8.2f} "
+              f"{t_scan:>10.3f} {t_lookup / len(fractions):>11.4f}")
+
+    print()
+    print(f"{'points':>8} {'events':>7} {'sim only':>9} {'sim+place':>10}   (ms, 3000 mi leg)")
+    for n in SIZES:
+        pts = synthetic_route(n)
+        index = routing.RouteIndex(pts)
+        t_plain = _timed(lambda: _simulate(pts, None), args.repeat)
+        t_placed = _timed(lambda: _simulate(pts, index), args.repeat)
+        events = len(_simulate(pts, index).timeline)
+        print(f"{n:>8} {events:>7} {t_plain:>9.3f} {t_placed:>10.3f}")
+
+    print(f"checks: {'OK' if ok else 'FAILED'}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
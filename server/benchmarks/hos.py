@@ -0,0 +1,62 @@
+"""
+HOS simulator benchmark.
+
+    python -m benchmarks.hos
+
+Times whole plans across trip lengths and cycle balances. Behaviour is
+pinned by the golden-timeline and resume tests in trip/tests/test_hos.py
+(`python manage.py test trip`); run those before comparing speeds.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from trip.services.hos_calculator import TripSimulator  # noqa: E402
+
+START = datetime(2025, 1, 1, 6, 0)
+BENCH_DISTANCES = [500, 1000, 2500, 5000, 10000]
+
+
+def simulate(cycle: float, legs: list[float]) -> TripSimulator:
+    """Drive each leg between made-up endpoints, with pickup then dropoff stops."""
+    sim = TripSimulator(cycle_used_hours=cycle, start_time=START)
+    lat, lng = 41.88, -87.63
+    for i, miles in enumerate(legs):
+        lat_to, lng_to = lat - 0.004 * miles, lng + 0.012 * miles
+        sim.drive_segment(miles, f"P{i}", f"P{i + 1}", lat, lng, lat_to, lng_to)
+        if i == 0 and len(legs) > 1:
+            sim.add_pickup(f"P{i + 1}", lat_to, lng_to)
+        else:
+            sim.add_dropoff(f"P{i + 1}", lat_to, lng_to)
+        lat, lng = lat_to, lng_to
+    return sim
+
+
+def bench(repeat: int = 50):
+    print(f"{'miles':>7} {'cycle':>6} {'events':>7} {'median ms':>10} {'min ms':>8}")
+    for miles in BENCH_DISTANCES:
+        for cycle in (0, 60):
+            samples = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                sim = simulate(cycle, [miles])
+                samples.append((time.perf_counter() - t0) * 1000)
+            print(f"{miles:>7} {cycle:>6} {len(sim.timeline):>7} "
+                  f"{statistics.median(samples):>10.3f} {min(samples):>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    bench(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+End-to-end load test: plan-trip over a realistic lane mix, against stubs.
+
+    python -m benchmarks.load                                  # all scenarios, WSGI
+    python -m benchmarks.load --server asgi --concurrency 50
+    python -m benchmarks.load --scenario mixed --error-rate ors=0.05
+    python -m benchmarks.load --record --requests 20           # refresh the recording
+
+Each scenario runs against a fresh app (gunicorn or uvicorn, caches on,
+its own throwaway SQLite database) whose Nominatim and ORS calls go to a
+benchmarks.upstream_stub replaying benchmarks/fixtures/upstream.json, with
+the stub's latency, jitter and error injection. That recording is not
+committed: until --record has been run, every upstream answer is the
+stub's synthetic one (gazetteer geocodes, straight-line routes). Requests are drawn from:
+
+    lane      one of the busiest freight lanes, by city name (geocoded)
+    tail      three random gazetteer places, with coordinates
+    multi     a busy lane with one to three extra drops, by name
+    estimate  a busy lane with coordinates, ?estimate=1
+
+Busy lanes follow a Zipf distribution over the top LANES city pairs, so
+the caches see the repeat traffic a dispatch team generates. Reported per
+scenario: latency percentiles of successful requests, throughput, failures
+by status, and the upstream calls the stub served (counts, and per
+request). Payloads are seeded, so --record (which forwards to the real
+services: needs OPENROUTESERVICE_API_KEY, and Nominatim's 1 request/s
+limit applies) captures exactly what a replay with the same --seed and
+--requests will ask for.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIR))
+
+from benchmarks.async_load import free_port, start_app  # noqa: E402
+from benchmarks.upstream_stub import (  # noqa: E402
+    add_stub_arguments,
+    describe_recording,
+    stub_from_args,
+)
+
+GAZETTEER = SERVER_DIR / "trip" / "data" / "na_places.csv"
+
+HUBS = 40           # busiest cities lanes are drawn between
+LANES = 30          # distinct busy lanes
+ZIPF_S = 1.1        # lane popularity skew
+
+SCENARIOS = {
+    "repeat-lanes": {"lane": 1.0},
+    "long-tail": {"tail": 1.0},
+    "multi-stop": {"multi": 1.0},
+    "estimate": {"estimate": 1.0},
+    "mixed": {"lane": 0.6, "tail": 0.2, "multi": 0.15, "estimate": 0.05},
+}
+
+
+def load_places() -> list[tuple[str, float, float]]:
+    """(label, lat, lng) for each gazetteer city, most populous first."""
+    with open(GAZETTEER, newline="", encoding="utf-8") as fh:
+        rows = sorted(csv.DictReader(fh), key=lambda r: -int(r["population"]))
+    return [(f"{r['city']}, {r['region']}", float(r["lat"]), float(r["lng"])) for r in rows]
+
+
+class LaneMix:
+    """Seeded request generator for one scenario's mix of request kinds."""
+
+    def __init__(self, places: list, weights: dict, seed: int):
+        self.places = places
+        self.rng = random.Random(seed)
+        hubs = places[:HUBS]
+        lane_rng = random.Random(0)          # the same busy lanes in every scenario
+        self.lanes = [tuple(lane_rng.sample(hubs, 3)) for _ in range(LANES)]
+        self.lane_weights = [1 / (rank + 1) ** ZIPF_S for rank in range(LANES)]
+        self.kinds, self.kind_weights = zip(*weights.items())
+
+    def requests(self, n: int) -> list[tuple[str, str, dict]]:
+        """[(kind, query string, JSON body)] — n of them."""
+        return [self._one() for _ in range(n)]
+
+    def _one(self) -> tuple[str, str, dict]:
+        kind = self.rng.choices(self.kinds, self.kind_weights)[0]
+        cycle = self.rng.choice([0, 10, 25, 40, 55, 65])
+        if kind == "tail":
+            stops = self.rng.sample(self.places, 3)
+            return kind, "", _body(stops, cycle, coords=True)
+
+        lane = self.rng.choices(self.lanes, self.lane_weights)[0]
+        if kind == "estimate":
+            return kind, "?estimate=1", _body(lane, cycle, coords=True)
+        body = _body(lane, cycle, coords=False)
+        if kind == "multi":
+            extra = self.rng.sample(self.places[:HUBS], self.rng.randint(1, 3))
+            body["intermediate_stops"] = [{"location": label} for label, _, _ in extra]
+        return kind, "", body
+
+
+def _body(stops, cycle: float, coords: bool) -> dict:
+    body = {"cycle_used_hours": cycle}
+    for role, (label, lat, lng) in zip(("current", "pickup", "dropoff"), stops):
+        body[f"{role}_location"] = label
+        if coords:
+            body[f"{role}_lat"], body[f"{role}_lng"] = lat, lng
+    return body
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+async def run_requests(base: str, requests: list, concurrency: int) -> dict:
+    latencies, failures = [], Counter()
+    kinds = Counter(kind for kind, _, _ in requests)
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one(query: str, body: dict):
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.post(f"{base}/api/plan-trip/{query}", json=body)
+                    status = resp.status_code
+                except httpx.HTTPError as exc:
+                    status = type(exc).__name__
+                if status == 200:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    failures[str(status)] += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(query, body) for _, query, body in requests))
+        wall = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "requests": len(requests),
+        "kinds": dict(kinds),
+        "ok": len(latencies),
+        "failures": dict(failures),
+        "wall_s": round(wall, 3),
+        "rps": round(len(latencies) / wall, 2),
+        **{
+            f"p{pct}_ms": round(percentile(latencies, pct) * 1000, 1)
+            for pct in (50, 95, 99)
+        },
+    }
+
+
+def migrated_db(workdir: Path) -> Path:
+    """An empty, migrated SQLite database to copy for each scenario."""
+    path = workdir / "template.sqlite3"
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "--no-input", "-v", "0"],
+        cwd=SERVER_DIR, env={**os.environ, "DJANGO_SQLITE_PATH": str(path)}, check=True,
+    )
+    return path
+
+
+def run_scenario(name: str, args, stub, places: list, template: Path, workdir: Path) -> dict:
+    db = workdir / f"{name}.sqlite3"
+    shutil.copyfile(template, db)
+    env = {
+        "DJANGO_SQLITE_PATH": str(db),
+        "NOMINATIM_URL": stub.nominatim_url,
+        "NOMINATIM_RATE_LIMIT_FILE": str(workdir / f"{name}.ratelimit"),
+        "ROUTE_CACHE_SIZE": os.getenv("ROUTE_CACHE_SIZE", "512"),
+    }
+    if args.record:
+        env["OPENROUTESERVICE_API_KEY"] = os.environ["OPENROUTESERVICE_API_KEY"]
+    else:
+        # the stub is not Nominatim; don't throttle the load to 1 req/s
+        env["NOMINATIM_RATE_PER_SEC"] = "1000"
+        env["NOMINATIM_MAX_WAIT"] = "30"
+
+    seed = args.seed + sum(map(ord, name))
+    requests = LaneMix(places, SCENARIOS[name], seed).requests(args.requests)
+
+    port = free_port()
+    proc = start_app(args.server, port, args.workers, stub.ors_url, extra_env=env)
+    try:
+        stub.reset_stats()
+        result = asyncio.run(run_requests(f"http://127.0.0.1:{port}", requests, args.concurrency))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    upstream = stub.stats()
+    result["upstream"] = upstream
+    result["upstream_per_request"] = {
+        name: round(counts["calls"] / len(requests), 3) for name, counts in upstream.items()
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="run only this scenario (repeatable; default all)")
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--server", choices=["wsgi", "asgi"], default="wsgi")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--report", help="write the results as JSON to this path")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    if args.record:
+        if not os.getenv("OPENROUTESERVICE_API_KEY"):
+            parser.error("--record calls the real ORS: set OPENROUTESERVICE_API_KEY")
+        args.concurrency = 1
+    try:
+        stub = stub_from_args(args).start()
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+
+    names = args.scenario or list(SCENARIOS)
+    places = load_places()
+    mode = "recording" if args.record else (
+        f"latency nominatim {stub.latency['nominatim'] * 1000:.0f} ms / "
+        f"ors {stub.latency['ors'] * 1000:.0f} ms ±{args.jitter:.0%}, errors "
+        f"nominatim {stub.error_rate['nominatim']:.0%} / ors {stub.error_rate['ors']:.0%}"
+    )
+    print(f"{args.server}, {args.workers} workers, {args.requests} requests x "
+          f"concurrency {args.concurrency}; stub {mode}")
+    print(f"upstream answers: {describe_recording(stub.recording, args.recording)}\n")
+    print(f"{'scenario':<14} {'ok':>5} {'fail':>5} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'geocode':>8} {'route':>6} {'calls/req':>9}")
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="eld-load-") as tmp:
+        workdir = Path(tmp)
+        template = migrated_db(workdir)
+        try:
+            for name in names:
+                r = results[name] = run_scenario(name, args, stub, places, template, workdir)
+                calls = r["upstream"]
+                per_request = sum(r["upstream_per_request"].values())
+                print(f"{name:<14} {r['ok']:>5} {r['requests'] - r['ok']:>5} {r['rps']:>7.1f} "
+                      f"{r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} {r['p99_ms']:>8.0f} "
+                      f"{calls['nominatim']['calls']:>8} {calls['ors']['calls']:>6} "
+                      f"{per_request:>9.2f}")
+                if r["failures"]:
+                    print(f"{'':<14} failures: {r['failures']}")
+        finally:
+            stub.stop()
+
+    if args.record:
+        stub.save(Path(args.recording))
+        print(f"\nwrote {args.recording}")
+    if args.report:
+        report = {"args": {k: v for k, v in vars(args).items() if k != "report"}, "results": results}
+        Path(args.report).write_text(json.dumps(report, indent=1) + "\n")
+        print(f"\nwrote {args.report}")
+
+
+if __name__ == "__main__":
+    main()
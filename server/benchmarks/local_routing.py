@@ -0,0 +1,240 @@
+"""
+Local routing benchmark: build, load and query a contracted road graph.
+
+    python -m benchmarks.local_routing                 # bundled sample extract
+    python -m benchmarks.local_routing --osm region.osm --queries 500
+    python -m benchmarks.local_routing --write-sample  # regenerate the sample
+
+Builds contraction hierarchies from the extract, saves and memory-maps the
+graph, then times random truck queries against a plain Dijkstra over the
+same roads; every query's travel time is checked to match.
+
+The bundled fixtures/sample_roads.osm is synthetic — an arterial grid the
+size of a metro area with two motorways, residential pockets and a few
+truck restrictions (hgv=no, a low bridge, a weight limit, one-way streets,
+a footpath and a disconnected island) — so the benchmark runs offline.
+"""
+
+import argparse
+import heapq
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from trip.services.road_graph import RoadGraph, build_graph  # noqa: E402
+
+SAMPLE_PATH = Path(__file__).parent / "fixtures" / "sample_roads.osm"
+
+# sample extract: arterial grid over lat 32.60–33.00, lng -97.40 – -96.60
+SOUTH, WEST = 32.60, -97.40
+ROWS, COLS = 11, 21              # grid lines, 0.04° apart
+LINE_STEP = 0.04
+NODE_STEP = 0.004                # ~400 m between nodes along a road
+MOTORWAY_ROW, MOTORWAY_COL = 5, 10
+
+
+def write_sample(path: Path):
+    rng = random.Random(7)
+    nodes: dict[tuple[int, int], int] = {}     # grid position (in NODE_STEPs) → id
+    coords: dict[int, tuple[float, float]] = {}
+    ways: list[tuple[list[int], dict]] = []
+    per_line = round(LINE_STEP / NODE_STEP)
+
+    def node(r: int, c: int) -> int:
+        key = (r, c)
+        if key not in nodes:
+            nid = nodes[key] = len(nodes) + 1
+            on_crossing = r % per_line == 0 and c % per_line == 0
+            j = 0.0 if on_crossing else 0.0008
+            coords[nid] = (
+                round(SOUTH + r * NODE_STEP + rng.uniform(-j, j), 7),
+                round(WEST + c * NODE_STEP + rng.uniform(-j, j), 7),
+            )
+        return nodes[key]
+
+    def free_node(lat: float, lng: float) -> int:
+        nid = len(nodes) + 1
+        nodes[("free", nid)] = nid
+        coords[nid] = (round(lat, 7), round(lng, 7))
+        return nid
+
+    def arterial(index: int) -> dict:
+        if index % 5 == 0:
+            return {"highway": "primary", "maxspeed": "55 mph"}
+        if index % 2 == 0:
+            return {"highway": "secondary", "maxspeed": "45 mph"}
+        return {"highway": "tertiary"}
+
+    # east–west roads, split at every crossing
+    for row in range(ROWS):
+        r = row * per_line
+        for col in range(COLS - 1):
+            refs = [node(r, c) for c in range(col * per_line, (col + 1) * per_line + 1)]
+            if row == MOTORWAY_ROW:
+                ways.append((refs, {"highway": "motorway", "ref": "I 30"}))
+                ways.append((refs[::-1], {"highway": "motorway", "ref": "I 30"}))
+                continue
+            tags = arterial(row)
+            if row == 3 and col == 7:
+                tags = {**tags, "maxheight": "12'6\""}          # low railway bridge
+            if row == 9:
+                tags = {**tags, "oneway": "yes"}                # eastbound only
+            ways.append((refs, tags))
+
+    # north–south roads
+    for col in range(COLS):
+        c = col * per_line
+        for row in range(ROWS - 1):
+            refs = [node(r, c) for r in range(row * per_line, (row + 1) * per_line + 1)]
+            if col == MOTORWAY_COL:
+                ways.append((refs, {"highway": "motorway", "ref": "I 35E"}))
+                ways.append((refs[::-1], {"highway": "motorway", "ref": "I 35E"}))
+                continue
+            tags = arterial(col)
+            if col == 13 and row == 4:
+                tags = {**tags, "maxweight": "10"}              # weight-limited bridge
+            if col == 17:
+                tags = {**tags, "oneway": "-1"}                 # southbound only
+            ways.append((refs, tags))
+
+    # residential pockets inside a few grid cells; some closed to trucks
+    for n, (row, col) in enumerate([(1, 2), (2, 15), (6, 4), (7, 12), (8, 18)]):
+        r0, c0 = row * per_line, col * per_line
+        for k in (3, 6):
+            tags = {"highway": "residential"}
+            if n % 2 == 0 and k == 6:
+                tags["hgv"] = "no"
+            ways.append(([node(r0 + k, c) for c in range(c0, c0 + per_line + 1)], tags))
+            ways.append(([node(r, c0 + k) for r in range(r0, r0 + per_line + 1)],
+                         {"highway": "residential"}))
+
+    # not for trucks, and not connected to anything
+    ways.append(([node(2 * per_line + 5, 5 * per_line + c) for c in range(0, 8)],
+                 {"highway": "footway"}))
+    island = [free_node(32.585, -97.35 + 0.004 * i) for i in range(5)]
+    ways.append((island, {"highway": "tertiary"}))
+
+    lines = ["<?xml version='1.0' encoding='UTF-8'?>",
+             "<osm version=\"0.6\" generator=\"benchmarks.local_routing\">"]
+    for nid in sorted(coords):
+        lat, lng = coords[nid]
+        lines.append(f'  <node id="{nid}" lat="{lat}" lon="{lng}"/>')
+    for wid, (refs, tags) in enumerate(ways, start=1):
+        lines.append(f'  <way id="{wid}">')
+        lines += [f'    <nd ref="{ref}"/>' for ref in refs]
+        lines += [f"    <tag k={quoteattr(k)} v={quoteattr(v)}/>" for k, v in tags.items()]
+        lines.append("  </way>")
+    lines.append("</osm>")
+    path.write_text("\n".join(lines) + "\n")
+    print(f"wrote {path} ({len(coords)} nodes, {len(ways)} ways)")
+
+
+def dijkstra(graph: RoadGraph, adjacency: list, source: int, target: int) -> int | None:
+    """Plain Dijkstra travel time (ms) over the original roads."""
+    dist = {source: 0}
+    heap = [(0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if u == target:
+            return d
+        if d > dist[u]:
+            continue
+        for arc in adjacency[u]:
+            v, nd = graph.head[arc], d + graph.time[arc]
+            if nd < dist.get(v, float("inf")):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return None
+
+
+def _ms(samples: list[float]) -> str:
+    return (f"median {statistics.median(samples):7.3f} ms   "
+            f"p95 {sorted(samples)[int(len(samples) * 0.95)]:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--osm", default=str(SAMPLE_PATH), help=".osm or .osm.pbf extract")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--write-sample", action="store_true")
+    args = parser.parse_args()
+
+    if args.write_sample:
+        write_sample(SAMPLE_PATH)
+        return
+
+    t0 = time.perf_counter()
+    built = build_graph(args.osm)
+    build_s = time.perf_counter() - t0
+    roads = sum(1 for arc in range(built.arc_count) if built.child1[arc] < 0)
+    print(f"{args.osm}: {built.node_count} nodes, {roads} road arcs, "
+          f"{built.arc_count - roads} shortcuts — built in {build_s:.2f} s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "graph.chgraph"
+        t0 = time.perf_counter()
+        built.save(str(path))
+        save_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        graph = RoadGraph.load(str(path))
+        load_ms = (time.perf_counter() - t0) * 1000
+        print(f"saved {path.stat().st_size / 1024:.0f} KB in {save_ms:.1f} ms, "
+              f"memory-mapped in {load_ms:.2f} ms\n")
+
+        adjacency = [[] for _ in range(graph.node_count)]
+        for arc in range(graph.arc_count):
+            if graph.child1[arc] < 0:
+                adjacency[graph.tail[arc]].append(arc)
+
+        rng = random.Random(42)
+        lats = [graph.lat[v] / 1e6 for v in range(graph.node_count)]
+        lngs = [graph.lng[v] / 1e6 for v in range(graph.node_count)]
+        snap, ch, plain = [], [], []
+        mismatches = 0
+        for _ in range(args.queries):
+            a = (rng.uniform(min(lats), max(lats)), rng.uniform(min(lngs), max(lngs)))
+            b = (rng.uniform(min(lats), max(lats)), rng.uniform(min(lngs), max(lngs)))
+
+            t0 = time.perf_counter()
+            source, _ = graph.nearest(*a)
+            target, _ = graph.nearest(*b)
+            snap.append((time.perf_counter() - t0) * 500)          # per point
+
+            t0 = time.perf_counter()
+            found = graph.shortest_path(source, target)
+            ch.append((time.perf_counter() - t0) * 1000)
+
+            t0 = time.perf_counter()
+            expected = dijkstra(graph, adjacency, source, target)
+            plain.append((time.perf_counter() - t0) * 1000)
+
+            if (found[0] if found else None) != expected:
+                mismatches += 1
+                print(f"  MISMATCH {source}→{target}: CH {found and found[0]} vs {expected}")
+
+        graph.directions([a, b])             # first call imports the polyline encoder
+        t0 = time.perf_counter()
+        route = graph.directions([a, b])
+        directions_ms = (time.perf_counter() - t0) * 1000
+
+        print(f"{args.queries} random truck queries")
+        print(f"  snap to road           {_ms(snap)}")
+        print(f"  CH query               {_ms(ch)}")
+        print(f"  plain Dijkstra         {_ms(plain)}")
+        print(f"  speedup                {statistics.median(plain) / statistics.median(ch):.0f}x")
+        print(f"  directions (last pair) {directions_ms:.3f} ms: "
+              f"{route['summary']['distance'] / 1609.344:.1f} mi, "
+              f"{route['summary']['duration'] / 60:.0f} min")
+        print("\nresults:", "OK" if not mismatches else f"{mismatches} MISMATCHES")
+        del graph
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Daily-log builder benchmark + parity check.
+
+    python -m benchmarks.log_builder
+
+Builds 1/7/30/90-day timelines, checks that the NumPy and compact paths
+produce exactly the output of the original dict-based builder, then times
+all three.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.hos import simulate  # noqa: E402
+from trip.services import log_builder  # noqa: E402
+
+# Roughly one day of driving per 520 miles once rests are included
+TRIP_DAYS = [1, 7, 30, 90]
+MILES_PER_DAY = 520
+
+
+def timeline_for(days: int):
+    legs = [min(MILES_PER_DAY * days, 2000)] * max(1, (MILES_PER_DAY * days) // 2000)
+    return simulate(35, legs).timeline
+
+
+def paths(tl):
+    dicts = tl.to_dicts()
+    out = {
+        "dict": lambda: log_builder.build_daily_logs(dicts),
+        "compact": lambda: log_builder._build_compact(tl),
+    }
+    if log_builder.np is not None:
+        out["numpy"] = lambda: log_builder._build_numpy(tl)
+    return out
+
+
+def check_parity() -> bool:
+    ok = True
+    for days in TRIP_DAYS:
+        tl = timeline_for(days)
+        results = {name: fn() for name, fn in paths(tl).items()}
+        expected = results.pop("dict")
+        for name, got in results.items():
+            if got != expected:
+                ok = False
+                print(f"  MISMATCH {name} on {days}-day timeline")
+    print(f"parity: {'OK' if ok else 'FAILED'}"
+          f"{'' if log_builder.np is not None else ' (NumPy not installed, skipped)'}")
+    return ok
+
+
+def bench(repeat: int):
+    print(f"{'days':>5} {'events':>7} {'path':>8} {'median ms':>10} {'min ms':>8}")
+    for days in TRIP_DAYS:
+        tl = timeline_for(days)
+        for name, fn in paths(tl).items():
+            samples = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                fn()
+                samples.append((time.perf_counter() - t0) * 1000)
+            print(f"{days:>5} {len(tl):>7} {name:>8} "
+                  f"{statistics.median(samples):>10.3f} {min(samples):>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    if not check_parity():
+        sys.exit(1)
+    bench(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Plan-trip payload benchmark: response size and render time per geometry format.
+
+    python -m benchmarks.payload
+    python -m benchmarks.payload --spacing 100
+
+Builds a three-leg plan over synthetic road geometry (one point every
+``--spacing`` meters, as ORS returns for HGV routes), then renders it with
+DRF's JSONRenderer as the view would: full point lists, encoded polylines,
+and Douglas–Peucker simplified at a few zoom levels. Sizes are shown raw,
+gzipped and (if installed) Brotli-compressed. Simplified legs are checked
+to stay within their tolerance of the full geometry.
+"""
+
+import argparse
+import gzip
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from trip.middleware import BROTLI_QUALITY, brotli  # noqa: E402
+from trip.services import routing  # noqa: E402
+from trip.services import trip_planner  # noqa: E402
+from trip.services.timing import StageTimer  # noqa: E402
+
+STOPS = [
+    ("Atlanta, GA", (33.749, -84.388)),
+    ("Dallas, TX", (32.7767, -96.797)),
+    ("Phoenix, AZ", (33.4484, -112.074)),
+    ("Los Angeles, CA", (34.0522, -118.2437)),
+]
+
+FORMATS = [
+    ("full", None),
+    ("polyline", None),
+    ("full", 14),
+    ("full", 10),
+    ("full", 6),
+    ("polyline", 10),
+]
+
+
+def road(a: tuple, b: tuple, spacing_m: float, rng: random.Random) -> list[list[float]]:
+    """A gently winding road from a to b, one point per ``spacing_m``, 5-decimal."""
+    miles = routing._haversine(a, b)
+    n = max(2, int(miles / routing.METERS_TO_MILES * 1.15 / spacing_m))
+    pts = []
+    for i in range(n + 1):
+        f = i / n
+        bend = 0.25 * math.sin(f * math.pi * 7) * math.sin(f * math.pi)   # degrees
+        lat = a[0] + (b[0] - a[0]) * f + bend + rng.uniform(-0.00003, 0.00003)
+        lng = a[1] + (b[1] - a[1]) * f + rng.uniform(-0.00003, 0.00003)
+        pts.append([round(lat, 5), round(lng, 5)])
+    pts[0], pts[-1] = [a[0], a[1]], [b[0], b[1]]
+    return pts
+
+
+def build_plan(spacing_m: float, stops: list = STOPS, cycle_used_hours: float = 20) -> dict:
+    """A plan_trip()-shaped response over synthetic road geometry between ``stops``."""
+    rng = random.Random(3)
+    names = [name for name, _ in stops]
+    points = [coords for _, coords in stops]
+    legs = []
+    for a, b in zip(points, points[1:]):
+        geometry = road(a, b, spacing_m, rng)
+        miles = routing.RouteIndex(geometry).total_miles
+        legs.append({
+            "distance_miles": miles,
+            "duration_minutes": miles / 55 * 60,
+            "geometry": geometry,
+            "polyline": routing.encode_polyline(geometry),
+        })
+    route = {"legs": legs}
+    return trip_planner._finish_plan(
+        StageTimer(), names, points, route, cycle_used_hours,
+        datetime(2024, 1, 6, 8, 0), "benchmark", store=False,
+    )
+
+
+def max_deviation_m(full: list, simplified: list) -> float:
+    """Farthest any full-geometry point lies from the simplified line (meters)."""
+    kx = routing.METERS_PER_DEGREE_LAT * math.cos(math.radians(full[len(full) // 2][0]))
+    ky = routing.METERS_PER_DEGREE_LAT
+    xy = [(p[1] * kx, p[0] * ky) for p in full]
+
+    # simplified points are a subsequence of the full ones
+    kept, j = [], 0
+    for i, p in enumerate(full):
+        if j < len(simplified) and p == simplified[j]:
+            kept.append(i)
+            j += 1
+
+    worst = 0.0
+    for first, last in zip(kept, kept[1:]):
+        (x0, y0), (x1, y1) = xy[first], xy[last]
+        dx, dy = x1 - x0, y1 - y0
+        seg2 = dx * dx + dy * dy
+        for x, y in xy[first + 1:last]:
+            t = min(1.0, max(0.0, ((x - x0) * dx + (y - y0) * dy) / seg2)) if seg2 else 0.0
+            worst = max(worst, math.hypot(x - x0 - t * dx, y - y0 - t * dy))
+    return worst
+
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spacing", type=float, default=30, help="meters between route points")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    plan = build_plan(args.spacing)
+    n_points = sum(len(leg["geometry"]) for leg in plan["route"]["legs"])
+    renderer = JSONRenderer()
+    print(f"{plan['route']['total_distance_miles']:.0f} mi, {n_points} route points, "
+          f"{len(plan['timeline'])} timeline events\n")
+    print(f"{'format':<18} {'points':>8} {'shape ms':>9} {'render ms':>10} "
+          f"{'raw KB':>9} {'gzip KB':>8} {'br KB':>7}")
+
+    ok = True
+    for encoding, zoom in FORMATS:
+        t_shape, shaped = _timed(
+            lambda: trip_planner.with_geometry(plan, encoding, zoom), args.repeat
+        )
+        t_render, body = _timed(lambda: renderer.render(shaped), args.repeat)
+        legs = shaped["route"]["legs"]
+        if encoding == "polyline":
+            points = sum(len(routing.decode_polyline(leg["polyline"])) for leg in legs)
+        else:
+            points = sum(len(leg["geometry"]) for leg in legs)
+            if zoom is not None:
+                for full, leg in zip(plan["route"]["legs"], legs):
+                    lat = full["geometry"][len(full["geometry"]) // 2][0]
+                    tolerance = routing.zoom_tolerance_meters(zoom, lat)
+                    if max_deviation_m(full["geometry"], leg["geometry"]) > tolerance * 1.001:
+                        ok = False
+                        print(f"  TOLERANCE exceeded at zoom {zoom}")
+
+        gz = len(gzip.compress(body, 6))
+        if brotli is not None:
+            br = f"{len(brotli.compress(body, quality=BROTLI_QUALITY)) / 1024:>7.0f}"
+        else:
+            br = f"{'-':>7}"
+        label = encoding + (f" z{zoom}" if zoom is not None else "")
+        print(f"{label:<18} {points:>8} {t_shape:>9.1f} {t_render:>10.1f} "
+              f"{len(body) / 1024:>9.0f} {gz / 1024:>8.0f} {br}")
+
+    print("\nsimplification:", "OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+JSON rendering benchmark for the plan-trip response.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --spacing 30 --repeat 20
+
+Renders a ~5,000-mile, four-stop plan (synthetic road geometry, see
+benchmarks.payload) with DRF's stock JSONRenderer, the FastJSONRenderer the
+API uses, and the stdlib fallback that renderer takes without orjson. Each
+output is checked to decode to the same document as the stock renderer's.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.payload import build_plan  # sets up Django
+from rest_framework.renderers import JSONRenderer
+
+from trip import renderers
+from trip.services import trip_planner
+
+STOPS = [
+    ("Seattle, WA", (47.6062, -122.3321)),
+    ("Miami, FL", (25.7617, -80.1918)),
+    ("Boston, MA", (42.3601, -71.0589)),
+    ("Chicago, IL", (41.8781, -87.6298)),
+]
+CYCLE_USED_HOURS = 69
+
+
+def _stdlib_render(data) -> bytes:
+    saved, renderers.orjson = renderers.orjson, None
+    try:
+        return renderers.dumps(data)
+    finally:
+        renderers.orjson = saved
+
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spacing", type=float, default=50, help="meters between route points")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    plan = build_plan(args.spacing, STOPS, CYCLE_USED_HOURS)
+    points = sum(len(leg["geometry"]) for leg in plan["route"]["legs"])
+    segments = sum(len(log["segments"]) for log in plan["daily_logs"])
+    print(f"{plan['route']['total_distance_miles']:.0f} mi, {plan['summary']['total_days']} days, "
+          f"{points} route points, {len(plan['timeline'])} timeline events, "
+          f"{segments} log segments")
+    if renderers.orjson is None:
+        print("orjson not installed: FastJSONRenderer falls back to the stdlib")
+    print()
+
+    stock, fast = JSONRenderer(), renderers.FastJSONRenderer()
+    paths = {
+        "DRF JSONRenderer": stock.render,
+        "FastJSONRenderer": fast.render,
+        "stdlib fallback": _stdlib_render,
+    }
+
+    ok = True
+    print(f"{'geometry':<10} {'renderer':<18} {'ms':>8} {'KB':>7} {'speedup':>8}")
+    for encoding in ("full", "polyline"):
+        data = trip_planner.with_geometry(plan, encoding)
+        expected = json.loads(stock.render(data))
+        baseline = None
+        for name, render in paths.items():
+            body = render(data)
+            if json.loads(body) != expected:
+                ok = False
+                print(f"  MISMATCH: {name} output differs ({encoding} geometry)")
+            ms = _timed(lambda: render(data), args.repeat)
+            baseline = baseline or ms
+            print(f"{encoding:<10} {name:<18} {ms:>8.2f} {len(body) / 1024:>7.0f} "
+                  f"{baseline / ms:>7.1f}x")
+
+    print("\noutput:", "OK" if ok else "MISMATCH")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Streamed plan check: events reach a compressing client as they are made.
+
+    python -m benchmarks.streaming
+
+Posts a plan-trip ?stream=ndjson and ?stream=sse request with
+Accept-Encoding: gzip through the full middleware stack (routing is
+stubbed with a straight-line route) and checks that the first chunk the
+client receives already decompresses to the complete "route" event before
+the HOS simulation has started, then that the whole decompressed stream
+matches an uncompressed one (apart from the per-request "timings" event).
+Prints per-chunk sizes; exits 1 on failure.
+"""
+
+import json
+import os
+import sys
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import Client  # noqa: E402
+
+from benchmarks.async_load import ors_response  # noqa: E402
+from trip.services import routing, trip_planner  # noqa: E402
+
+BODY = {
+    "current_location": "Chicago, IL", "current_lat": 41.8781, "current_lng": -87.6298,
+    "pickup_location": "Dallas, TX", "pickup_lat": 32.7767, "pickup_lng": -96.797,
+    "dropoff_location": "Los Angeles, CA", "dropoff_lat": 34.0522, "dropoff_lng": -118.2437,
+    "cycle_used_hours": 20,
+}
+
+
+def stub_directions(points):
+    return ors_response([[lng, lat] for lat, lng in points])["routes"][0]
+
+
+def check(fmt: str, cycle: float) -> list[str]:
+    simulated = []
+    simulate_trip = trip_planner.simulate_trip
+
+    def watched(*args, **kwargs):
+        simulated.append(True)
+        return simulate_trip(*args, **kwargs)
+
+    failures = []
+    body = {**BODY, "cycle_used_hours": cycle}
+    client = Client(HTTP_HOST="localhost")
+    trip_planner.simulate_trip = watched
+    try:
+        resp = client.post(
+            f"/api/plan-trip/?stream={fmt}", body,
+            content_type="application/json", HTTP_ACCEPT_ENCODING="gzip",
+        )
+        if resp.get("Content-Encoding") != "gzip":
+            return [f"{fmt}: response not gzipped ({resp.get('Content-Encoding')})"]
+
+        chunks = iter(resp.streaming_content)
+        first = next(chunks)
+        simulated_before_first = bool(simulated)
+        rest = list(chunks)
+    finally:
+        trip_planner.simulate_trip = simulate_trip
+
+    d = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    head = d.decompress(first)
+    text = head + b"".join(d.decompress(chunk) for chunk in rest) + d.flush()
+    print(f"{fmt:<7} {len(rest) + 1:>3} chunks, first {len(first)} B → {len(head)} B, "
+          f"sizes {[len(c) for c in [first, *rest]][:8]}...")
+
+    first_event = b"route" in head and head.endswith(b"\n")
+    if simulated_before_first or not first_event:
+        failures.append(f"{fmt}: first chunk arrived after the simulation, or without the route event")
+
+    plain = client.post(f"/api/plan-trip/?stream={fmt}", body, content_type="application/json")
+    if without_timings(text, fmt) != without_timings(b"".join(plain.streaming_content), fmt):
+        failures.append(f"{fmt}: decompressed stream differs from the uncompressed one")
+    return failures
+
+
+def without_timings(stream: bytes, fmt: str) -> list[bytes]:
+    """The stream's messages minus "timings", which each request measures itself."""
+    if fmt == "sse":
+        return [m for m in stream.split(b"\n\n") if not m.startswith(b"event: timings\n")]
+    return [m for m in stream.splitlines() if json.loads(m)["event"] != "timings"]
+
+
+def main():
+    routing._request_directions = stub_directions
+    failures = check("ndjson", 20) + check("sse", 30)
+    for failure in failures:
+        print("FAIL", failure)
+    print("streaming: OK" if not failures else "streaming: FAILED")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
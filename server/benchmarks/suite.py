@@ -0,0 +1,284 @@
+"""
+Micro-benchmark suite for the service hot paths, with saved baselines.
+
+    python -m benchmarks.suite                         # run, compare with the baseline
+    python -m benchmarks.suite --save-baseline         # record a new baseline
+    python -m benchmarks.suite --only geometry --report report.json
+    python -m benchmarks.suite --threshold 0.25        # allow +25% before failing
+
+Cases cover TripSimulator.drive_segment across trip lengths and cycle
+balances, build_daily_logs and _build_stops on 1/7/30/90-day timelines,
+and decode_polyline / get_intermediate_point on 1k–100k point routes.
+
+Each case is auto-calibrated to run for at least --min-round-ms per round,
+with the garbage collector off as in timeit. Rounds alternate with rounds
+of a fixed pure-Python reference loop, and the median per-round ratio of
+the two is what gets compared with the baseline: that cancels most of a
+shared machine's speed drift, which would otherwise swamp a 20% threshold.
+A case whose relative cost grew by more than --threshold is a regression
+(exit status 1). Baselines still only mean something on similar hardware:
+the baseline keeps the Python version, platform and CPU count, and a
+mismatch is reported next to the results. --report writes the run, the
+baseline figures and the verdicts as JSON for tracking across releases.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.geometry import synthetic_route  # noqa: E402
+from benchmarks.hos import START  # noqa: E402
+from benchmarks.log_builder import TRIP_DAYS, timeline_for  # noqa: E402
+from trip.services import routing  # noqa: E402
+from trip.services.hos_calculator import TripSimulator  # noqa: E402
+from trip.services.log_builder import build_daily_logs  # noqa: E402
+from trip.services.trip_planner import _build_stops  # noqa: E402
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "suite.json"
+DEFAULT_THRESHOLD = 0.20
+
+DRIVE_MILES = [100, 500, 1000, 3000]
+DRIVE_CYCLES = [0, 35, 69]
+GEOMETRY_SIZES = [1_000, 10_000, 100_000]
+
+
+def cases() -> dict:
+    """name → zero-argument callable; fixtures are built here, outside the timing."""
+    out = {}
+
+    for miles in DRIVE_MILES:
+        for cycle in DRIVE_CYCLES:
+            out[f"hos.drive_segment[{miles}mi-cycle{cycle}]"] = _drive(miles, cycle)
+
+    for days in TRIP_DAYS:
+        tl = timeline_for(days)
+        out[f"logs.build_daily_logs[{days}d]"] = lambda tl=tl: build_daily_logs(tl)
+        out[f"stops.build_stops[{days}d]"] = lambda tl=tl: _build_stops(tl)
+
+    for n in GEOMETRY_SIZES:
+        label = f"{n // 1000}k"
+        points = synthetic_route(n)
+        encoded = routing.encode_polyline(points)
+        index = routing.RouteIndex(points)
+        out[f"geometry.decode_polyline[{label}]"] = lambda e=encoded: routing.decode_polyline(e)
+        out[f"geometry.get_intermediate_point[{label}]"] = (
+            lambda p=points: routing.get_intermediate_point(p, 0.37)
+        )
+        out[f"geometry.get_intermediate_point[{label}-index]"] = (
+            lambda i=index: routing.get_intermediate_point(i, 0.37)
+        )
+    return out
+
+
+def _drive(miles: float, cycle: float):
+    def run():
+        sim = TripSimulator(cycle_used_hours=cycle, start_time=START, checkpoints=False)
+        sim.drive_segment(miles, "A", "B", 41.88, -87.63, 34.05, -118.24)
+    return run
+
+
+def measure(fn, rounds: int, min_round_ms: float) -> dict:
+    """
+    Per-call timings in microseconds over ``rounds`` calibrated rounds, each
+    paired with a round of reference(); "relative" is the median per-round
+    ratio of the two.
+    """
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        fn()                                     # warm caches / imports
+        iterations = _calibrate(fn, min_round_ms)
+        ref_iterations = _calibrate(reference, min_round_ms)
+        samples, ratios = [], []
+        for _ in range(rounds):
+            ref = _round(reference, ref_iterations)
+            us = _round(fn, iterations)
+            samples.append(us)
+            ratios.append(us / ref)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "median_us": round(statistics.median(samples), 3),
+        "min_us": round(min(samples), 3),
+        "stdev_us": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+        "relative": round(statistics.median(ratios), 5),
+        "rounds": rounds,
+        "iterations": iterations,
+    }
+
+
+def _calibrate(fn, min_round_ms: float) -> int:
+    """Iterations per round so that a round lasts at least ``min_round_ms``."""
+    iterations = 1
+    while True:
+        elapsed = _round(fn, iterations) * iterations / 1000
+        if elapsed >= min_round_ms or iterations >= 1_000_000:
+            return iterations
+        iterations = max(iterations * 2, int(iterations * min_round_ms / max(elapsed, 1e-3)))
+
+
+def _round(fn, iterations: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) * 1e6 / iterations
+
+
+def reference():
+    """Fixed interpreter-bound work: dict/list churn and float arithmetic."""
+    acc, seen = 0.0, {}
+    for i in range(2000):
+        acc += (i * 0.5) ** 0.5
+        seen[i % 97] = seen.get(i % 97, 0) + 1
+    return acc, sorted(seen.values())
+
+
+def machine() -> dict:
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(terse=True),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy_version,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> dict:
+    """Attach baseline figures and a verdict to each result, in place."""
+    base = baseline.get("results", {})
+    for name, result in results.items():
+        before = base.get(name)
+        if before is None:
+            result["status"] = "new"
+            continue
+        change = result["relative"] / before["relative"] - 1
+        result["baseline_us"] = before["min_us"]
+        result["change"] = round(change, 4)
+        if change > threshold:
+            result["status"] = "regression"
+        elif change < -threshold:
+            result["status"] = "improvement"
+        else:
+            result["status"] = "ok"
+    return results
+
+
+def _fmt_us(us: float) -> str:
+    if us >= 1000:
+        return f"{us / 1000:.2f} ms"
+    return f"{us:.1f} µs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", action="append", default=[],
+                        help="run cases whose name contains this (repeatable)")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-round-ms", type=float, default=20)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fractional slowdown that counts as a regression")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--report", help="write a JSON report to this path")
+    args = parser.parse_args()
+
+    selected = {
+        name: fn for name, fn in cases().items()
+        if not args.only or any(part in name for part in args.only)
+    }
+    if not selected:
+        parser.error("no benchmark matches --only")
+
+    results = {}
+    for name, fn in selected.items():
+        results[name] = measure(fn, args.rounds, args.min_round_ms)
+
+    run = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "machine": machine(),
+        "results": results,
+    }
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        if baseline_path.exists() and args.only:
+            # keep the other cases' figures when re-recording a subset
+            saved = json.loads(baseline_path.read_text())
+            run["results"] = {**saved.get("results", {}), **results}
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(run, indent=1) + "\n")
+        for name, result in results.items():
+            print(f"{name:<48} {_fmt_us(result['min_us']):>12}")
+        print(f"\nwrote {baseline_path}")
+        return
+
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    compare(results, baseline, args.threshold)
+
+    print(f"{'case':<48} {'median':>12} {'best':>12} {'baseline':>12} {'change':>8}")
+    for name, result in results.items():
+        before = _fmt_us(result["baseline_us"]) if "baseline_us" in result else "-"
+        change = f"{result['change']:+.1%}" if "change" in result else ""
+        flag = {"regression": "  SLOWER", "improvement": "  faster"}.get(result["status"], "")
+        print(f"{name:<48} {_fmt_us(result['median_us']):>12} {_fmt_us(result['min_us']):>12} "
+              f"{before:>12} {change:>8}{flag}")
+
+    if not baseline:
+        print(f"\nno baseline at {baseline_path}; record one with --save-baseline")
+    elif baseline.get("machine") != run["machine"]:
+        print(f"\nnote: baseline was recorded on {baseline.get('machine')}; "
+              "timings may not be comparable")
+
+    regressions = [name for name, r in results.items() if r["status"] == "regression"]
+    if args.report:
+        report = {
+            **run,
+            "threshold": args.threshold,
+            "baseline": {
+                "path": str(baseline_path),
+                "created": baseline.get("created"),
+                "commit": baseline.get("commit"),
+                "machine": baseline.get("machine"),
+            },
+            "regressions": regressions,
+        }
+        Path(args.report).write_text(json.dumps(report, indent=1) + "\n")
+        print(f"\nwrote {args.report}")
+
+    print(f"\nregressions (>{args.threshold:.0%} slower): "
+          f"{', '.join(regressions) if regressions else 'none'}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Record/replay stand-in for Nominatim search and ORS directions.
+
+    python -m benchmarks.upstream_stub                         # replay on :8765
+    python -m benchmarks.upstream_stub --latency ors=0.4 --error-rate ors=0.05
+    python -m benchmarks.upstream_stub --record --port 8765    # capture real answers
+
+Point the app at it with NOMINATIM_URL=http://127.0.0.1:8765/search and
+ORS_DIRECTIONS_URL=http://127.0.0.1:8765/v2/directions/driving-hgv.
+
+Replay answers from a recording (benchmarks/fixtures/upstream.json): a
+Nominatim search by its normalized query, a directions call by its rounded
+coordinates. Misses are synthesized — a gazetteer match for a search, a
+straight-line route for directions — unless --strict, which answers them
+with 404 so a replay that drifted from its recording is obvious. No
+recording is committed (it would need real ORS answers), so until --record
+has been run on a machine every answer is synthesized, and --strict fails
+every call. Every
+answer waits the upstream's latency (± --jitter) and a share of them
+(--error-rate) fail with --error-status, 429 carrying Retry-After.
+
+Record forwards each call to the real service (the app's own User-Agent
+and ORS key go through unchanged) and keeps the 200 answers; the recording
+is written on shutdown. Nominatim allows one request a second, so record
+with the app's rate limiter at its default.
+
+GET /__stats returns per-upstream counts (calls, fixture hits, synthesized,
+strict misses, forwarded, errors); POST /__reset zeroes them.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.async_load import ors_response  # noqa: E402
+from trip.services.geocoding import normalize_address  # noqa: E402
+from trip.services.place_index import get_place_index  # noqa: E402
+
+RECORDING_PATH = Path(__file__).parent / "fixtures" / "upstream.json"
+
+NOMINATIM_UPSTREAM = "https://nominatim.openstreetmap.org/search"
+ORS_UPSTREAM = "https://api.openrouteservice.org/v2/directions/driving-hgv"
+
+UPSTREAMS = ("nominatim", "ors")
+COUNTERS = ("calls", "hits", "synthesized", "missed", "forwarded", "errors")
+
+
+def ors_key(coordinates: list[list[float]]) -> str:
+    """Recording key for a directions call: [lng, lat] pairs to 5 places."""
+    return ";".join(f"{lng:.5f},{lat:.5f}" for lng, lat in coordinates)
+
+
+def load_recording(path: Path) -> dict:
+    if not path.exists():
+        return {"nominatim": {}, "ors": {}}
+    data = json.loads(path.read_text())
+    return {"nominatim": data.get("nominatim", {}), "ors": data.get("ors", {})}
+
+
+def describe_recording(recording: dict, path) -> str:
+    """What a replay will answer from, for the startup banner."""
+    if not any(recording.values()):
+        return f"no recording at {path}: every answer is synthetic; --record captures one"
+    return (f"{len(recording['nominatim'])} searches, "
+            f"{len(recording['ors'])} routes in {path}")
+
+
+def parse_per_upstream(values: list[str], option: str) -> dict:
+    """["ors=0.3", "0.1"] → {"ors": 0.3, "nominatim": 0.1}; a bare value sets both."""
+    out = dict.fromkeys(UPSTREAMS, 0.0)
+    for value in values:
+        name, sep, number = value.rpartition("=")
+        if sep and name not in UPSTREAMS:
+            raise argparse.ArgumentTypeError(f"{option}: unknown upstream {name!r}")
+        try:
+            number = float(number)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"{option}: {value!r} is not a number") from None
+        for upstream in ([name] if sep else UPSTREAMS):
+            out[upstream] = number
+    return out
+
+
+class UpstreamStub:
+    """
+    Threaded HTTP server playing both upstreams; see the module docstring.
+
+    ``latency`` and ``error_rate`` map an upstream name to seconds / a
+    fraction of calls.
+    """
+
+    def __init__(
+        self,
+        recording: dict | None = None,
+        latency: dict | None = None,
+        jitter: float = 0.0,
+        error_rate: dict | None = None,
+        error_status: int = 503,
+        strict: bool = False,
+        record: bool = False,
+        port: int = 0,
+        seed: int = 1,
+    ):
+        self.recording = recording or {"nominatim": {}, "ors": {}}
+        self.latency = {**dict.fromkeys(UPSTREAMS, 0.0), **(latency or {})}
+        self.jitter = jitter
+        self.error_rate = {**dict.fromkeys(UPSTREAMS, 0.0), **(error_rate or {})}
+        self.error_status = error_status
+        self.strict = strict
+        self.record = record
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = {name: dict.fromkeys(COUNTERS, 0) for name in UPSTREAMS}
+        self._session = requests.Session() if record else None
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _handler(self))
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 1024
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def nominatim_url(self) -> str:
+        return f"{self.base_url}/search"
+
+    @property
+    def ors_url(self) -> str:
+        return f"{self.base_url}/v2/directions/driving-hgv"
+
+    def start(self) -> "UpstreamStub":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            for counts in self._counts.values():
+                counts.update(dict.fromkeys(COUNTERS, 0))
+
+    def save(self, path: Path):
+        with self._lock:
+            payload = {
+                "recorded": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "nominatim": dict(sorted(self.recording["nominatim"].items())),
+                "ors": dict(sorted(self.recording["ors"].items())),
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload, indent=1) + "\n")
+
+    # ---- request handling ----
+
+    def nominatim(self, params: dict, headers) -> tuple[int, object]:
+        query = params.get("q", [""])[0]
+        key = normalize_address(query)
+        if self.record:
+            return self._forward("nominatim", key, "GET", NOMINATIM_UPSTREAM, headers, params=params)
+
+        answer = self.recording["nominatim"].get(key)
+        if answer is not None:
+            return self._answer("nominatim", "hits", answer)
+        if self.strict:
+            return self._answer("nominatim", "missed", {"error": f"not recorded: {key}"}, 404)
+        places = get_place_index().search(query, limit=1)
+        results = [
+            {"lat": str(p.lat), "lon": str(p.lng), "display_name": p.label} for p in places
+        ]
+        return self._answer("nominatim", "synthesized", results)
+
+    def ors(self, body: dict, headers) -> tuple[int, object]:
+        key = ors_key(body["coordinates"])
+        if self.record:
+            return self._forward("ors", key, "POST", ORS_UPSTREAM, headers, json=body)
+
+        answer = self.recording["ors"].get(key)
+        if answer is not None:
+            return self._answer("ors", "hits", answer)
+        if self.strict:
+            return self._answer("ors", "missed", {"error": f"not recorded: {key}"}, 404)
+        return self._answer("ors", "synthesized", ors_response(body["coordinates"]))
+
+    def _answer(self, upstream: str, outcome: str, payload, status: int = 200):
+        with self._lock:
+            counts = self._counts[upstream]
+            counts["calls"] += 1
+            counts[outcome] += 1
+        self._wait(upstream)
+        if self._rng.random() < self.error_rate[upstream]:
+            with self._lock:
+                self._counts[upstream]["errors"] += 1
+            return self.error_status, {"error": "injected by upstream_stub"}
+        return status, payload
+
+    def _forward(self, upstream: str, key: str, method: str, url: str, headers, **kwargs):
+        passed = {
+            name: headers[name]
+            for name in ("User-Agent", "Authorization", "Accept", "Content-Type")
+            if headers.get(name)
+        }
+        resp = self._session.request(method, url, headers=passed, timeout=30, **kwargs)
+        try:
+            payload = resp.json()
+        except ValueError:
+            payload = {"error": resp.text[:500]}
+        with self._lock:
+            counts = self._counts[upstream]
+            counts["calls"] += 1
+            counts["forwarded"] += 1
+            if resp.status_code == 200:
+                self.recording[upstream][key] = payload
+            else:
+                counts["errors"] += 1
+        return resp.status_code, payload
+
+    def _wait(self, upstream: str):
+        seconds = self.latency[upstream]
+        if seconds <= 0:
+            return
+        if self.jitter:
+            seconds *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        time.sleep(max(seconds, 0.0))
+
+
+def _handler(stub: UpstreamStub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/__stats":
+                self._send(200, stub.stats())
+            elif url.path.rstrip("/") == "/search":
+                self._send(*stub.nominatim(parse_qs(url.query), self.headers))
+            else:
+                self._send(404, {"error": f"no stub for GET {url.path}"})
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if url.path == "/__reset":
+                stub.reset_stats()
+                self._send(200, stub.stats())
+            elif "/directions/" in url.path:
+                self._send(*stub.ors(json.loads(raw), self.headers))
+            else:
+                self._send(404, {"error": f"no stub for POST {url.path}"})
+
+        def _send(self, status: int, payload):
+            raw = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    """Options shared by this module and benchmarks.load."""
+    parser.add_argument("--recording", default=str(RECORDING_PATH),
+                        help="recorded upstream answers (read on replay, written on --record)")
+    parser.add_argument("--latency", action="append", default=[], metavar="[UPSTREAM=]SECONDS",
+                        help="upstream response latency, e.g. ors=0.3 (default 0.3 ors, 0.1 nominatim)")
+    parser.add_argument("--jitter", type=float, default=0.25,
+                        help="latency varies uniformly by ± this fraction")
+    parser.add_argument("--error-rate", action="append", default=[],
+                        metavar="[UPSTREAM=]FRACTION", help="share of calls that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--strict", action="store_true",
+                        help="answer calls missing from the recording with 404")
+    parser.add_argument("--record", action="store_true",
+                        help="forward to the real services and record their answers")
+
+
+def stub_from_args(args, port: int = 0) -> UpstreamStub:
+    latency = {"nominatim": 0.1, "ors": 0.3}
+    if args.latency:
+        latency = parse_per_upstream(args.latency, "--latency")
+    return UpstreamStub(
+        recording=load_recording(Path(args.recording)),
+        latency={} if args.record else latency,
+        jitter=args.jitter,
+        error_rate={} if args.record else parse_per_upstream(args.error_rate, "--error-rate"),
+        error_status=args.error_status,
+        strict=args.strict,
+        record=args.record,
+        port=port,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        stub = stub_from_args(args, port=args.port)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+    print(f"{'recording' if args.record else 'replaying'} on {stub.base_url} "
+          f"({describe_recording(stub.recording, args.recording)})")
+    print(f"  NOMINATIM_URL={stub.nominatim_url}\n  ORS_DIRECTIONS_URL={stub.ors_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+        print(json.dumps(stub.stats()))
+        if args.record:
+            stub.save(Path(args.recording))
+            print(f"wrote {args.recording}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,24 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import GeocodeCacheEntry, RouteGeometry, TripPlan
+
+
+@admin.register(GeocodeCacheEntry)
+class GeocodeCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("query", "found", "lat", "lng", "expires_at")
+    list_filter = ("found",)
+    search_fields = ("query",)
+
+
+@admin.register(TripPlan)
+class TripPlanAdmin(admin.ModelAdmin):
+    list_display = ("plan_id", "driver_id", "lane", "created_at")
+    search_fields = ("plan_id", "driver_id")
+    exclude = ("timeline",)
+    readonly_fields = ("created_at",)
+
+
+@admin.register(RouteGeometry)
+class RouteGeometryAdmin(admin.ModelAdmin):
+    list_display = ("digest", "created_at")
+    search_fields = ("digest",)
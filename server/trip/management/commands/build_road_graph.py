@@ -0,0 +1,45 @@
+"""
+Contract an OpenStreetMap extract into a road graph for ROUTING_BACKEND=local.
+
+    python manage.py build_road_graph texas-latest.osm.pbf texas.chgraph
+    python manage.py build_road_graph benchmarks/fixtures/sample_roads.osm sample.chgraph
+
+Only truck-routable ways are kept (see trip.services.road_graph). .pbf input
+needs the optional osmium package; .osm XML is read with the stdlib.
+Preprocessing is pure Python — minutes for a metro or small-state extract,
+so cut larger regions down (e.g. `osmium extract`) before building. Point
+LOCAL_ROUTING_GRAPH at the output file.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trip.services.road_graph import RoadGraphError, build_graph
+
+
+class Command(BaseCommand):
+    help = "Build a contracted truck road graph from an OSM extract."
+
+    def add_arguments(self, parser):
+        parser.add_argument("extract", help="An .osm or .osm.pbf file.")
+        parser.add_argument("output", help="Where to write the .chgraph file.")
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        if not output.endswith(".chgraph"):
+            raise CommandError("Output file name must end in .chgraph.")
+
+        t0 = time.perf_counter()
+        try:
+            graph = build_graph(options["extract"])
+            graph.save(output)
+        except (RoadGraphError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        shortcuts = sum(1 for arc in range(graph.arc_count) if graph.child1[arc] >= 0)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {output}: {graph.node_count} nodes, "
+            f"{graph.arc_count - shortcuts} road arcs, {shortcuts} shortcuts "
+            f"in {time.perf_counter() - t0:.1f} s."
+        ))
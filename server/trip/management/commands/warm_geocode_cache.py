@@ -0,0 +1,58 @@
+"""
+Pre-warm the geocode cache from a list of terminal / yard addresses.
+
+    python manage.py warm_geocode_cache addresses.txt
+    python manage.py warm_geocode_cache --address "Chicago, IL" --address "Gary, IN"
+
+Files contain one address per line; blank lines and lines starting with
+"#" are ignored. Addresses already cached are not re-fetched.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trip.services.geocoding import GeocodingError, cache_stats, geocode_address
+
+
+class Command(BaseCommand):
+    help = "Geocode a list of addresses so later lookups are served from cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="*", help="Text files with one address per line.")
+        parser.add_argument(
+            "--address",
+            action="append",
+            default=[],
+            help="An address to warm (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        addresses = list(options["address"])
+        for path in options["files"]:
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    addresses.extend(
+                        line.strip() for line in fh
+                        if line.strip() and not line.lstrip().startswith("#")
+                    )
+            except OSError as exc:
+                raise CommandError(f"Cannot read {path}: {exc}") from exc
+
+        if not addresses:
+            raise CommandError("No addresses given.")
+
+        ok = failed = 0
+        for address in addresses:
+            try:
+                lat, lng = geocode_address(address)
+                ok += 1
+                self.stdout.write(f"  {address} → ({lat:.5f}, {lng:.5f})")
+            except GeocodingError as exc:
+                failed += 1
+                self.stderr.write(f"  {address}: {exc}")
+
+        stats = cache_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {ok} address(es), {failed} failed. "
+            f"Upstream calls: {stats['upstream_calls']}, "
+            f"DB hits: {stats['db_hits']}."
+        ))
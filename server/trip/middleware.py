@@ -0,0 +1,194 @@
+"""
+API middleware: response compression and request timing.
+
+Plan responses are mostly route geometry and timeline JSON, which shrinks
+5-10x compressed. Brotli (if the ``brotli`` package is installed) is used
+for clients that accept it; other buffered responses fall back to Django's
+gzip. Streamed responses (NDJSON / SSE plans, batch results) are gzipped
+with a sync flush after every chunk, so each event reaches the client as
+soon as it is yielded instead of when the compressor's buffer fills.
+
+Every /api/ request is timed stage by stage (see services/timing.py) and
+answered with a Server-Timing header; staff can add ?profile=1 to get a
+cProfile report instead of the response.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware, re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+
+from .services import timing
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional: gzip only
+    brotli = None
+
+# Smaller bodies aren't worth compressing (same floor as GZipMiddleware)
+MIN_COMPRESS_BYTES = 200
+
+# Quality 5 is close to gzip's speed at a noticeably better ratio
+BROTLI_QUALITY = 5
+
+_accepts_br = re.compile(r"\bbr\b")
+
+# Functions listed in a ?profile=1 report
+PROFILE_LIMIT = int(os.getenv("PROFILE_LIMIT", 60))
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware that prefers Brotli for buffered responses."""
+
+    def process_response(self, request, response):
+        if response.streaming:
+            return _gzip_stream(request, response)
+        if (
+            brotli is None
+            or response.has_header("Content-Encoding")
+            or len(response.content) < MIN_COMPRESS_BYTES
+            or not _accepts_br.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = "br"
+        _weaken_etag(response)
+        return response
+
+
+def _gzip_stream(request, response):
+    """Gzip a streamed response chunk by chunk (GZipMiddleware's rules otherwise)."""
+    if response.has_header("Content-Encoding"):
+        return response
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if not re_accepts_gzip.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+        return response
+
+    if response.is_async:
+        response.streaming_content = _flushed_gzip_async(response.streaming_content)
+    else:
+        response.streaming_content = _flushed_gzip(response.streaming_content)
+    del response.headers["Content-Length"]
+    response.headers["Content-Encoding"] = "gzip"
+    _weaken_etag(response)
+    return response
+
+
+def _flushed_gzip(chunks):
+    z = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield z.compress(chunk) + z.flush(zlib.Z_SYNC_FLUSH)
+    yield z.flush()
+
+
+async def _flushed_gzip_async(chunks):
+    z = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        yield z.compress(chunk) + z.flush(zlib.Z_SYNC_FLUSH)
+    yield z.flush()
+
+
+def _weaken_etag(response):
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        # the bytes changed, so weaken the ETag as GZipMiddleware does
+        response.headers["ETag"] = "W/" + etag
+
+
+class ServerTimingMiddleware:
+    """
+    Runs each /api/ request under a fresh StageTimer. The timer becomes a
+    Server-Timing header and is recorded in the /api/metrics/ histograms.
+
+    Streamed responses get the header before their body is generated, so
+    their timings stop at the first byte.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not request.path.startswith("/api/"):
+            return self.get_response(request)
+
+        timer = timing.StageTimer()
+        profiler = _profiler(request)
+        with timing.activate(timer):
+            if profiler is None:
+                response = self.get_response(request)
+            else:
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                finally:
+                    profiler.disable()
+        return _finish(request, response, timer, profiler)
+
+    async def __acall__(self, request):
+        if not request.path.startswith("/api/"):
+            return await self.get_response(request)
+
+        # the profiler sees the whole event loop, not just this request
+        timer = timing.StageTimer()
+        profiler = _profiler(request)
+        with timing.activate(timer):
+            if profiler is None:
+                response = await self.get_response(request)
+            else:
+                profiler.enable()
+                try:
+                    response = await self.get_response(request)
+                    if response.streaming:
+                        async for _ in response.streaming_content:
+                            pass
+                finally:
+                    profiler.disable()
+        return _finish(request, response, timer, profiler)
+
+
+def _profiler(request) -> cProfile.Profile | None:
+    """A profiler if this is a ?profile=1 request from staff (or in DEBUG)."""
+    if request.GET.get("profile") != "1":
+        return None
+    user = getattr(request, "user", None)
+    if not (settings.DEBUG or (user is not None and user.is_staff)):
+        return None
+    return cProfile.Profile()
+
+
+def _finish(request, response, timer, profiler):
+    match = request.resolver_match
+    timing.record(timer, match.url_name if match and match.url_name else "other")
+
+    if profiler is not None:
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_LIMIT)
+        response = HttpResponse(report.getvalue(), content_type="text/plain; charset=utf-8")
+
+    response["Server-Timing"] = timer.server_timing()
+    return response
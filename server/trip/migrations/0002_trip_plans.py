@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-17 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteGeometry',
+            fields=[
+                ('digest', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('polyline', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TripPlan',
+            fields=[
+                ('plan_id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('driver_id', models.CharField(blank=True, default='', max_length=64)),
+                ('lane', models.CharField(max_length=32)),
+                ('inputs', models.JSONField()),
+                ('route', models.JSONField()),
+                ('summary', models.JSONField()),
+                ('timeline', models.BinaryField()),
+                ('resumed_from', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['driver_id', '-created_at'], name='tripplan_driver_recent'), models.Index(fields=['lane', '-created_at'], name='tripplan_lane_recent'), models.Index(fields=['created_at'], name='tripplan_created')],
+            },
+        ),
+    ]
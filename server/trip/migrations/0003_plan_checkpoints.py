@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-17 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip', '0002_trip_plans'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tripplan',
+            name='checkpoints',
+            field=models.BinaryField(null=True),
+        ),
+    ]
@@ -1,3 +1,72 @@
 from django.db import models
 
-# Create your models here.
+
+class GeocodeCacheEntry(models.Model):
+    """
+    Persistent tier of the geocode cache.
+
+    Keyed on the normalized address string. Failed lookups are stored too
+    (``found=False``) so repeated typos don't keep hitting Nominatim.
+    """
+
+    query = models.CharField(max_length=255, unique=True)
+    found = models.BooleanField(default=True)
+    lat = models.FloatField(null=True, blank=True)
+    lng = models.FloatField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        if not self.found:
+            return f"{self.query} (not found)"
+        return f"{self.query} → ({self.lat:.5f}, {self.lng:.5f})"
+
+
+class RouteGeometry(models.Model):
+    """
+    One leg's road geometry as a Google-encoded polyline, keyed by its
+    digest so every stored plan over the same lane shares one row.
+    """
+
+    digest = models.CharField(max_length=32, primary_key=True)
+    polyline = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest} ({len(self.polyline)} chars)"
+
+
+class TripPlan(models.Model):
+    """
+    A computed plan, stored under its plan_id so it can be reopened without
+    geocoding, routing or simulating again (see services.plan_store).
+
+    ``route`` holds per-leg miles / minutes and a RouteGeometry digest;
+    ``timeline`` is Timeline.to_bytes() and ``checkpoints`` the simulator's
+    per-event HOS state (TripSimulator.checkpoint_bytes()), so any worker
+    can re-plan it. Daily logs and stop markers are rebuilt from the
+    timeline when the plan is read.
+    """
+
+    plan_id = models.CharField(max_length=32, primary_key=True)
+    driver_id = models.CharField(max_length=64, blank=True, default="")
+    lane = models.CharField(max_length=32)
+    inputs = models.JSONField()
+    route = models.JSONField()
+    summary = models.JSONField()
+    timeline = models.BinaryField()
+    checkpoints = models.BinaryField(null=True)
+    resumed_from = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["driver_id", "-created_at"], name="tripplan_driver_recent"),
+            models.Index(fields=["lane", "-created_at"], name="tripplan_lane_recent"),
+            models.Index(fields=["created_at"], name="tripplan_created"),
+        ]
+
+    def __str__(self):
+        stops = self.inputs.get("stops", [])
+        lane = f"{stops[1]['location']} → {stops[-1]['location']}" if len(stops) > 1 else self.lane
+        return f"{self.plan_id} {lane}"
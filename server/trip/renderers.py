@@ -0,0 +1,80 @@
+"""
+Fast JSON rendering for the API.
+
+Plan responses are large trees of plain dicts, lists, floats and strings
+(the services emit them render-ready), which orjson serializes several
+times faster than json.dumps. orjson is optional: without it everything
+falls back to the stdlib, with the same output as DRF's JSONRenderer.
+"""
+
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .services import timing
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# DRF's fallbacks for the odd non-primitive (Decimal, lazy strings, numpy scalars)
+_default = JSONEncoder().default
+
+
+def dumps(data) -> bytes:
+    """Compact UTF-8 JSON (as the API renders it), via orjson when installed."""
+    with timing.measure("serialize"):
+        if orjson is not None:
+            return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(
+            data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer on orjson; indented output still goes through DRF's."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is not None and data is not None and indent is None:
+            return dumps(data)
+        with timing.measure("serialize"):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def encode_event(event: str, data, fmt: str) -> bytes:
+    """One stream event: an SSE frame for "sse", else an NDJSON line."""
+    if fmt == "sse":
+        return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+    return dumps({"event": event, "data": data}) + b"\n"
+
+
+class StreamRenderer(BaseRenderer):
+    """
+    Lets an Accept header naming a stream format through content
+    negotiation on views that stream their own StreamingHttpResponse.
+    Anything DRF renders on such a request (validation or planning errors)
+    goes out as a single event in that format: "error" for 4xx/5xx,
+    otherwise "result".
+    """
+
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        response = (renderer_context or {}).get("response")
+        failed = response is not None and response.status_code >= 400
+        return encode_event("error" if failed else "result", data, self.format)
+
+
+class NDJSONRenderer(StreamRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class EventStreamRenderer(StreamRenderer):
+    media_type = "text/event-stream"
+    format = "sse"
@@ -2,9 +2,19 @@
 Serializers for the trip app.
 """
 
+from datetime import datetime
+
 from rest_framework import serializers
 
 
+class StopSerializer(serializers.Serializer):
+    """An intermediate drop between pickup and the final dropoff."""
+
+    location = serializers.CharField(max_length=200)
+    lat = serializers.FloatField(required=False, default=None)
+    lng = serializers.FloatField(required=False, default=None)
+
+
 class TripInputSerializer(serializers.Serializer):
     """Validates the input for trip planning."""
 
@@ -34,3 +44,133 @@ class TripInputSerializer(serializers.Serializer):
     pickup_lng = serializers.FloatField(required=False, default=None)
     dropoff_lat = serializers.FloatField(required=False, default=None)
     dropoff_lng = serializers.FloatField(required=False, default=None)
+
+    # Optional extra drops for multi-stop loads, visited in order after
+    # pickup and before the final dropoff.
+    intermediate_stops = StopSerializer(many=True, required=False, default=list)
+
+    # Tags the stored plan, for GET /api/plans/?driver_id=...
+    driver_id = serializers.CharField(max_length=64, required=False, default=None)
+
+    def validate_intermediate_stops(self, value):
+        if len(value) > 20:
+            raise serializers.ValidationError("At most 20 intermediate stops are supported.")
+        return value
+
+
+class GeometryOptionsSerializer(serializers.Serializer):
+    """Query-string options for the leg geometry in a plan response."""
+
+    geometry = serializers.ChoiceField(
+        choices=["full", "polyline"],
+        default="full",
+        help_text="Leg geometry as [[lat, lng], ...] or an encoded polyline string",
+    )
+    zoom = serializers.IntegerField(
+        min_value=0,
+        max_value=22,
+        required=False,
+        help_text="Simplify leg geometry to one map pixel at this zoom level",
+    )
+
+
+class PlanOptionsSerializer(GeometryOptionsSerializer):
+    """Query-string options for how /api/plan-trip/ sends the plan."""
+
+    stream = serializers.ChoiceField(
+        choices=["ndjson", "sse"],
+        required=False,
+        help_text="Send the plan stage by stage as NDJSON or server-sent events",
+    )
+    estimate = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Quick HOS estimate from straight-line distance, without geocoding or routing",
+    )
+    # Driver-local wall clock, as for batch start_time
+    deliver_by = serializers.CharField(
+        required=False,
+        default=None,
+        help_text="With estimate: deadline to check the arrival against",
+    )
+
+    def validate_deliver_by(self, value):
+        return _local_datetime(value)
+
+
+class BatchJobSerializer(serializers.Serializer):
+    """One driver in a fleet re-plan."""
+
+    id = serializers.CharField(max_length=100, required=False, default=None)
+    stops = StopSerializer(many=True, help_text="Current location, pickup, [drops...], dropoff")
+    cycle_used_hours = serializers.FloatField(min_value=0, max_value=69)
+    # Driver-local wall clock, e.g. "2025-01-06T05:30". Any UTC offset is
+    # ignored so the timeline stays in the driver's own time.
+    start_time = serializers.CharField(required=False, default=None)
+
+    def validate_stops(self, value):
+        if not 3 <= len(value) <= 22:
+            raise serializers.ValidationError(
+                "A job needs a current location, pickup and dropoff (at most 20 extra drops)."
+            )
+        return value
+
+    def validate_start_time(self, value):
+        return _local_datetime(value)
+
+
+class BatchInputSerializer(serializers.Serializer):
+    """Validates a batch what-if planning request."""
+
+    jobs = BatchJobSerializer(many=True)
+    include_timeline = serializers.BooleanField(required=False, default=False)
+
+    def validate_jobs(self, value):
+        if not value:
+            raise serializers.ValidationError("At least one job is required.")
+        if len(value) > 5000:
+            raise serializers.ValidationError("At most 5000 jobs per batch.")
+        return value
+
+
+class PlanListSerializer(serializers.Serializer):
+    """Query string for GET /api/plans/: a driver, a lane, or both."""
+
+    driver_id = serializers.CharField(max_length=64, required=False, default=None)
+    pickup = serializers.CharField(max_length=200, required=False, default=None)
+    dropoff = serializers.CharField(max_length=200, required=False, default=None)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate(self, attrs):
+        if (attrs["pickup"] is None) != (attrs["dropoff"] is None):
+            raise serializers.ValidationError("A lane needs both pickup and dropoff.")
+        if attrs["driver_id"] is None and attrs["pickup"] is None:
+            raise serializers.ValidationError("Give a driver_id, a pickup and dropoff, or both.")
+        return attrs
+
+
+class ReplanInputSerializer(serializers.Serializer):
+    """Resume an earlier plan part-way through (see replan_trip)."""
+
+    plan_id = serializers.CharField(max_length=64)
+    timeline_index = serializers.IntegerField(
+        min_value=0,
+        help_text="First event to re-simulate; earlier events are kept as planned.",
+    )
+    remaining_miles = serializers.FloatField(
+        min_value=0,
+        required=False,
+        default=None,
+        help_text="Miles left on the leg being driven at that event, if it changed.",
+    )
+
+
+def _local_datetime(value: str | None) -> datetime | None:
+    """ISO 8601 wall-clock time to the minute; any UTC offset is dropped."""
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise serializers.ValidationError("Use ISO 8601, e.g. 2025-01-06T05:30.")
+    return parsed.replace(tzinfo=None, second=0, microsecond=0)
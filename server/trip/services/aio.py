@@ -0,0 +1,79 @@
+"""
+Pooled async HTTP client for the async service functions.
+
+httpx connections belong to the event loop that opened them, so one
+client (with its keep-alive pool) is kept per running loop. Under an ASGI
+server that is one client per worker process. Retries follow the sync
+path's policy (upstream.retry_delay()): failed connects are retried by the
+transport, 429 / 5xx answers by async_request().
+"""
+
+import asyncio
+import os
+import time
+import weakref
+
+import httpx
+
+from . import timing
+from .upstream import HTTP_RETRIES, observe, retry_delay
+
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS", 100))
+ASYNC_MAX_KEEPALIVE = int(os.getenv("ASYNC_HTTP_MAX_KEEPALIVE", 20))
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """The shared AsyncClient for the current event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASYNC_MAX_KEEPALIVE,
+                ),
+                retries=HTTP_RETRIES,
+            ),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def async_request(
+    upstream: str,
+    method: str,
+    url: str,
+    timeout: float = 30.0,
+    limiter=None,
+    limiter_wait: float | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """
+    upstream.request() on the loop's client: each attempt takes a
+    ``limiter`` token (without blocking the loop) and records its latency
+    under ``upstream``; 429 / 5xx answers are retried the same way.
+    """
+    client = get_async_client()
+    for attempt in range(HTTP_RETRIES + 1):
+        if limiter is not None:
+            await limiter.acquire_async(max_wait=limiter_wait)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, timeout=timeout, **kwargs)
+        except httpx.HTTPError:
+            observe(upstream, time.perf_counter() - start, error=True)
+            raise
+        observe(upstream, time.perf_counter() - start, error=response.status_code >= 400)
+
+        delay = retry_delay(response.status_code, response.headers, attempt, timeout)
+        if delay is None:
+            return response
+        timing.count(f"{upstream}_retries")
+        await response.aclose()
+        await asyncio.sleep(delay)
@@ -1,77 +1,188 @@
 """
 Autocomplete service using Nominatim (OpenStreetMap).
+
+Most keystrokes never reach Nominatim: queries are answered from a cache of
+recent Nominatim answers or from the local prefix index (bundled gazetteer
++ places learned from earlier suggestions and geocodes). Only misses spend
+a slot of the shared 1 req/s budget, and identical in-flight misses are
+coalesced into one call.
 """
 
 import logging
-import time
-import requests
+import os
+
+from . import upstream
+from .aio import async_request
+from .cache import TTLCache
+from .coalesce import SingleFlight
+from .place_index import get_place_index, normalize_key
+from .rate_limit import RateLimitExceeded, nominatim_limiter
 
 logger = logging.getLogger(__name__)
 
-NOMINATIM_AUTOCOMPLETE_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_AUTOCOMPLETE_URL = os.getenv(
+    "NOMINATIM_URL", "https://nominatim.openstreetmap.org/search"
+)
 USER_AGENT = "ELDTripPlanner/1.0 (trip-planning-application)"
+SUGGEST_MAX_WAIT = float(os.getenv("NOMINATIM_SUGGEST_MAX_WAIT", 1.0))
+SUGGEST_TIMEOUT = float(os.getenv("NOMINATIM_SUGGEST_TIMEOUT", 5))
+SUGGEST_LIMIT = 5
+
+# Recent Nominatim answers per normalized query (empty answers expire sooner)
+SUGGEST_CACHE_TTL = int(os.getenv("SUGGEST_CACHE_TTL", 24 * 3600))
+SUGGEST_EMPTY_TTL = int(os.getenv("SUGGEST_EMPTY_TTL", 300))
+SUGGEST_CACHE_SIZE = int(os.getenv("SUGGEST_CACHE_SIZE", 4096))
+
+_query_cache = TTLCache(maxsize=SUGGEST_CACHE_SIZE, ttl=SUGGEST_CACHE_TTL, name="suggest")
+_flight = SingleFlight(name="suggest")
+_stats = {"local_hits": 0}
 
-# Shared rate limiter with geocoding? Or separate? 
-# Nominatim limits by IP/User-Agent. We should obey strictly.
-_last_suggest_time = 0
 
 def suggest_locations(query: str) -> list[dict]:
     """
     Get location suggestions for a partial query string.
+
+    Answered from the local prefix index / recent-query cache when
+    possible; identical concurrent misses share one Nominatim call.
     """
-    global _last_suggest_time
+    if not query or len(query) < 2:
+        return []
+
+    key = normalize_key(query)
+    local = _local_suggestions(key)
+    if local is not None:
+        return local
+
+    suggestions = _flight.do(key, _fetch_suggestions, query, key)
+    return suggestions if suggestions is not None else []
 
+
+async def suggest_locations_async(query: str) -> list[dict]:
+    """suggest_locations() over the shared async client."""
     if not query or len(query) < 2:
         return []
 
-    # Rate limit (1 req/sec)
-    elapsed = time.time() - _last_suggest_time
-    if elapsed < 1.0:
-        time.sleep(1.0 - elapsed)
+    key = normalize_key(query)
+    local = _local_suggestions(key)
+    if local is not None:
+        return local
 
-    params = {
-        "q": query,
-        "format": "json",
-        "addressdetails": 1,
-        "limit": 5,
-        "countrycodes": "us,ca,mx",  # Limit to North America for ELD context
-    }
+    suggestions = await _flight.do_async(key, _fetch_suggestions_async, query, key)
+    return suggestions if suggestions is not None else []
 
-    headers = {
-        "User-Agent": USER_AGENT,
+
+def suggest_stats() -> dict:
+    return {
+        "index_size": len(get_place_index()),
+        "local_hits": _stats["local_hits"],
+        "query_cache": _query_cache.stats(),
+        "upstream": _flight.stats(),
     }
 
+
+def _local_suggestions(key: str) -> list[dict] | None:
+    """Recent Nominatim answer for this exact query, else prefix-index hits."""
+    cached = _query_cache.get(key)
+    if cached is not None:
+        return cached
+
+    places = get_place_index().search(key, SUGGEST_LIMIT)
+    if not places:
+        return None
+    _stats["local_hits"] += 1
+    return [
+        {"label": p.label, "value": p.label, "lat": str(p.lat), "lng": str(p.lng)}
+        for p in places
+    ]
+
+
+def _fetch_suggestions(query: str, key: str) -> list[dict] | None:
+    """Nominatim round trip; None when it was skipped or failed."""
+    # Rate limit (1 req/sec). Nominatim limits by IP/User-Agent, so this
+    # limiter is shared with geocoding (retries take a slot too). Typing
+    # moves on quickly, so don't wait long for a slot — a stale suggestion
+    # list is worse than none.
     try:
-        response = requests.get(
+        response = upstream.request(
+            "nominatim_suggest", "GET",
             NOMINATIM_AUTOCOMPLETE_URL,
-            params=params,
-            headers=headers,
-            timeout=5,
+            params=_suggest_params(query),
+            headers={"User-Agent": USER_AGENT},
+            timeout=SUGGEST_TIMEOUT,
+            limiter=nominatim_limiter,
+            limiter_wait=SUGGEST_MAX_WAIT,
         )
-        _last_suggest_time = time.time()
-        
+
         if response.status_code != 200:
             logger.error("Nominatim suggest error: %s", response.text)
-            return []
-
-        results = response.json()
-        
-        suggestions = []
-        for r in results:
-            # Format a nice label
-            display_name = r.get("display_name", "")
-            # Simple cleanup: maybe take first few parts?
-            # Nominatim returns "Name, Street, City, County, State, Zip, Country"
-            # We'll just return the full display name for now, client can truncate.
-            suggestions.append({
-                "label": display_name,
-                "value": display_name, 
-                "lat": r.get("lat"),
-                "lng": r.get("lon")
-            })
-            
-        return suggestions
+            return None
 
+        return _remember(key, _to_suggestions(response.json()))
+
+    except RateLimitExceeded as exc:
+        logger.info("Suggest '%s' skipped: %s", query, exc)
+        return None
     except Exception as exc:
         logger.error("Autocomplete failed: %s", exc)
-        return []
+        return None
+
+
+async def _fetch_suggestions_async(query: str, key: str) -> list[dict] | None:
+    try:
+        response = await async_request(
+            "nominatim_suggest", "GET",
+            NOMINATIM_AUTOCOMPLETE_URL,
+            params=_suggest_params(query),
+            headers={"User-Agent": USER_AGENT},
+            timeout=SUGGEST_TIMEOUT,
+            limiter=nominatim_limiter,
+            limiter_wait=SUGGEST_MAX_WAIT,
+        )
+
+        if response.status_code != 200:
+            logger.error("Nominatim suggest error: %s", response.text)
+            return None
+
+        return _remember(key, _to_suggestions(response.json()))
+
+    except RateLimitExceeded as exc:
+        logger.info("Suggest '%s' skipped: %s", query, exc)
+        return None
+    except Exception as exc:
+        logger.error("Autocomplete failed: %s", exc)
+        return None
+
+
+def _remember(key: str, suggestions: list[dict]) -> list[dict]:
+    """Cache the answer for this query and teach the index its places."""
+    _query_cache.set(key, suggestions, ttl=None if suggestions else SUGGEST_EMPTY_TTL)
+    index = get_place_index()
+    for s in suggestions:
+        if s["lat"] is not None and s["lng"] is not None:
+            index.add(s["label"], s["lat"], s["lng"])
+    return suggestions
+
+
+def _suggest_params(query: str) -> dict:
+    return {
+        "q": query,
+        "format": "json",
+        "addressdetails": 1,
+        "limit": SUGGEST_LIMIT,
+        "countrycodes": "us,ca,mx",  # Limit to North America for ELD context
+    }
+
+
+def _to_suggestions(results: list) -> list[dict]:
+    suggestions = []
+    for r in results:
+        # Nominatim returns "Name, Street, City, County, State, Zip, Country";
+        # we return the full display name and let the client truncate.
+        display_name = r.get("display_name", "")
+        suggestions.append({
+            "label": display_name,
+            "value": display_name,
+            "lat": r.get("lat"),
+            "lng": r.get("lon")
+        })
+    return suggestions
@@ -0,0 +1,222 @@
+"""
+Batch HOS simulation for fleet-wide what-if planning.
+
+Each job is one driver: an ordered list of stops (current → pickup →
+… → dropoff), a cycle balance and a start time. Stops must come with
+coordinates or be in the geocode cache: free text is never sent to
+Nominatim here, whose 1 request/s would stall a fleet-sized batch past
+any worker timeout. Lanes are routed concurrently through the shared route
+cache (identical lanes are routed once), and each lane's jobs are
+simulated and yielded as soon as its route arrives — on a process pool
+for big batches, in line for small ones.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from .constants import MANDATORY_REST_MINUTES, OFF_DUTY
+from .db import in_worker
+from .geocoding import lookup_cached
+from .routing import get_multi_leg_route, snap_coord
+from .timeline import STATUS_CODES
+from .trip_planner import simulate_trip
+
+logger = logging.getLogger(__name__)
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", os.cpu_count() or 2))
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", 25))
+# Simulation workers start from a clean server process, not a fork of this
+# (threaded) web worker; "spawn" where forkserver isn't available
+BATCH_START_METHOD = os.getenv(
+    "BATCH_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+OFF_DUTY_CODE = STATUS_CODES[OFF_DUTY]
+
+_process_pool: ProcessPoolExecutor | None = None
+_process_pool_pid: int | None = None
+_process_pool_lock = threading.Lock()
+
+
+def run_batch(jobs: list[dict], include_timeline: bool = False):
+    """
+    Plan many trips and yield one result dict per job, in completion order.
+
+    Args:
+        jobs: dicts with keys "id", "stops" (list of {"location", "lat", "lng"}),
+              "cycle_used_hours" and optional "start_time" (naive datetime).
+        include_timeline: Also return each job's full event timeline.
+
+    Yields:
+        {"id", "ok": True, "summary", ["timeline"]} or {"id", "ok": False, "error"}.
+    """
+    in_line = len(jobs) <= BATCH_CHUNK_SIZE
+    with ThreadPoolExecutor(max_workers=8, thread_name_prefix="batch-route") as routers:
+        lanes: dict[tuple, Future] = {}
+        waiting: dict[Future, list[tuple]] = {}
+        for job in jobs:
+            item = _resolve_job(job)
+            if not item["ok"]:
+                yield item
+                continue
+            key = tuple(snap_coord(p) for p in item["points"])
+            lane = lanes.get(key)
+            if lane is None:
+                lane = lanes[key] = routers.submit(in_worker, get_multi_leg_route, item["points"])
+            waiting.setdefault(lane, []).append((job, item))
+
+        simulations: set[Future] = set()
+        while waiting or simulations:
+            done, _ = wait([*waiting, *simulations], return_when=FIRST_COMPLETED)
+            ready = []
+            for future in done:
+                if future in simulations:
+                    simulations.discard(future)
+                    yield from _simulation_results(future)
+                    continue
+                for job, item in waiting.pop(future):
+                    try:
+                        route = future.result()
+                    except Exception as exc:
+                        logger.warning("Batch job %s could not be routed: %s", item["id"], exc)
+                        yield {"id": item["id"], "ok": False, "error": str(exc)}
+                        continue
+                    ready.append(_payload(job, item, route))
+
+            # everything routed in this round, in chunks of BATCH_CHUNK_SIZE
+            for i in range(0, len(ready), BATCH_CHUNK_SIZE):
+                chunk = ready[i:i + BATCH_CHUNK_SIZE]
+                if in_line:
+                    yield from _simulate_chunk(chunk, include_timeline)
+                else:
+                    future = _get_process_pool().submit(_simulate_chunk, chunk, include_timeline)
+                    future.chunk = chunk
+                    simulations.add(future)
+
+
+def shutdown_process_pool():
+    """Stop the simulation workers (at exit; the next batch starts new ones)."""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_process_pool)
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """This process's simulation pool; a new one after a fork or a crashed worker."""
+    global _process_pool, _process_pool_pid
+    with _process_pool_lock:
+        pool = _process_pool
+        stale = pool is None or _process_pool_pid != os.getpid() or pool._broken
+        if stale:
+            if pool is not None and _process_pool_pid == os.getpid():
+                pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = ProcessPoolExecutor(
+                max_workers=BATCH_WORKERS,
+                mp_context=multiprocessing.get_context(BATCH_START_METHOD),
+            )
+            _process_pool_pid = os.getpid()
+        return _process_pool
+
+
+def _simulation_results(future: Future) -> list[dict]:
+    try:
+        return future.result()
+    except BrokenProcessPool as exc:
+        logger.error("Batch simulation worker died: %s", exc)
+        return [
+            {"id": payload[0], "ok": False, "error": "Simulation worker failed."}
+            for payload in future.chunk
+        ]
+
+
+def _resolve_job(job: dict) -> dict:
+    job_id = job.get("id")
+    points = []
+    for stop in job["stops"]:
+        lat, lng = stop.get("lat"), stop.get("lng")
+        if lat is not None and lng is not None:
+            points.append((float(lat), float(lng)))
+            continue
+        coords, exact = lookup_cached(stop["location"])
+        if not exact:
+            return {
+                "id": job_id,
+                "ok": False,
+                "error": (
+                    f"'{stop['location']}' has no lat/lng and isn't geocoded yet; "
+                    "batch jobs don't call the geocoder."
+                ),
+            }
+        points.append(coords)
+
+    return {
+        "id": job_id,
+        "ok": True,
+        "names": [stop["location"] for stop in job["stops"]],
+        "points": points,
+    }
+
+
+def _payload(job: dict, item: dict, route: dict) -> tuple:
+    """_simulate_chunk() input for one routed job."""
+    start = job.get("start_time") or datetime.now().replace(second=0, microsecond=0)
+    return (
+        item["id"],
+        item["names"],
+        item["points"],
+        [leg["distance_miles"] for leg in route["legs"]],
+        job["cycle_used_hours"],
+        start,
+    )
+
+
+def _simulate_chunk(chunk: list[tuple], include_timeline: bool) -> list[dict]:
+    """Worker entry point — must stay importable and picklable."""
+    results = []
+    for job_id, names, points, leg_miles, cycle_used_hours, start in chunk:
+        try:
+            sim = simulate_trip(
+                names, points, leg_miles, cycle_used_hours, start, checkpoints=False
+            )
+        except Exception as exc:
+            results.append({"id": job_id, "ok": False, "error": str(exc)})
+            continue
+
+        tl = sim.timeline
+        result = {
+            "id": job_id,
+            "ok": True,
+            "summary": {
+                "start_time": start.isoformat(),
+                "end_time": sim.clock.isoformat(),
+                "total_driving_miles": sim.get_total_miles(),
+                "rest_stops": sum(
+                    1 for code, mins in zip(tl.statuses, tl.durations)
+                    if code == OFF_DUTY_CODE and mins >= MANDATORY_REST_MINUTES
+                ),
+                "cycle_hours_at_start": round(cycle_used_hours, 1),
+                "cycle_hours_at_end": round(sim.cycle_used / 60, 1),
+            },
+        }
+        if include_timeline:
+            result["timeline"] = tl.to_dicts()
+        results.append(result)
+    return results
@@ -0,0 +1,76 @@
+"""
+In-process LRU cache with per-entry TTL.
+
+Shared by the service modules that sit in front of slow upstream APIs
+(Nominatim, ORS). Thread-safe, so it can be used from gunicorn threads and
+from the planner's worker pools alike.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from . import timing
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600, name: str | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name        # named caches count hits/misses per request
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key`` (counting a hit) or ``default``."""
+        with self._lock:
+            value, expires = self._data.get(key, (_MISSING, 0.0))
+            if value is not _MISSING and expires <= time.monotonic():
+                del self._data[key]
+                value = _MISSING
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+
+        if self.name:
+            timing.count(f"{self.name}_cache_{'miss' if value is _MISSING else 'hit'}")
+        return default if value is _MISSING else value
+
+    def set(self, key, value, ttl: float | None = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
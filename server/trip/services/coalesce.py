@@ -0,0 +1,82 @@
+"""
+Single-flight call coalescing.
+
+When several requests need the same slow upstream answer at once (the same
+autocomplete prefix from a few typists, the same lane), only the first
+caller does the work; the others wait for and share its result — or its
+exception. Results are shared objects, so callers must not mutate them.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from . import timing
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution."""
+
+    def __init__(self, name: str | None = None):
+        self.name = name        # named flights count coalesced calls per request
+        self._lock = threading.Lock()
+        self._calls: dict = {}     # key → Future (threads)
+        self._tasks: dict = {}     # (loop, key) → Task (event loops)
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` unless a call for ``key`` is in flight."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            self._count_coalesced()
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """do() for coroutine functions; coalesces within one event loop."""
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+
+        task = self._tasks.get(task_key)
+        if task is None:
+            task = loop.create_task(fn(*args, **kwargs))
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+            self._count_coalesced()
+
+        # shield: one cancelled waiter must not cancel the others' call
+        return await asyncio.shield(task)
+
+    def _count_coalesced(self):
+        if self.name:
+            timing.count(f"{self.name}_coalesced")
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._tasks),
+        }
@@ -0,0 +1,25 @@
+"""
+Database connections on worker threads.
+
+Django opens one connection per thread and only recycles it around
+requests (request_started / request_finished call close_old_connections()
+on the request thread). Work handed to a ThreadPoolExecutor or
+asyncio.to_thread() runs on long-lived pool threads that never see those
+signals, so with CONN_MAX_AGE > 0 a connection that breaks there (server
+restart, failover, idle timeout) stays broken for the life of the thread.
+in_worker() gives each such task the same treatment a request gets.
+"""
+
+from django.db import close_old_connections
+
+
+def in_worker(fn, *args, **kwargs):
+    """
+    Call ``fn`` on a pool thread, dropping this thread's unusable or
+    expired connections before and after, as Django does around a request.
+    """
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
@@ -0,0 +1,159 @@
+"""
+Quick HOS estimates for plan-trip: no geocoding or routing calls.
+
+Leg mileage is the great-circle distance times the road-detour factor that
+routing learns per region from real routes (routing.detour_factor()). The
+HOS simulator then runs at the typical, low and high factor, giving the
+arrival time, rests and end-of-trip cycle hours with an error bound. A
+location needs coordinates, a geocode-cache entry or a suggest-index match.
+
+full_plan_recommended is set when the estimate should not be acted on: the
+bounds straddle a decision (rest count, a 34-hour restart, the deadline),
+the region has too few routed lanes to calibrate the factor, a location is
+only approximate, or a leg is too short for straight-line distance to say
+much.
+"""
+
+import os
+from datetime import datetime
+
+from .constants import CYCLE_RESTART_MINUTES, MANDATORY_REST_MINUTES, OFF_DUTY
+from .geocoding import lookup_cached
+from .routing import DETOUR_MIN_SAMPLES, DetourFactor, _haversine, detour_factor
+from .timeline import STATUS_CODES
+from .timing import measure
+from .trip_planner import TripPlannerError, _current_minute, _stop_inputs, simulate_trip
+
+OFF_DUTY_CODE = STATUS_CODES[OFF_DUTY]
+
+# Straight-line legs shorter than this (miles) are flagged as unreliable
+ESTIMATE_MIN_LEG_MILES = float(os.getenv("ESTIMATE_MIN_LEG_MILES", 25))
+
+
+def estimate_trip(
+    current_location: str,
+    pickup_location: str,
+    dropoff_location: str,
+    cycle_used_hours: float,
+    current_coords: tuple = (None, None),
+    pickup_coords: tuple = (None, None),
+    dropoff_coords: tuple = (None, None),
+    intermediate_stops: list[dict] | None = None,
+    start_time: datetime | None = None,
+    deliver_by: datetime | None = None,
+) -> dict:
+    """
+    Estimate a trip without any upstream calls (same arguments as
+    plan_trip(), plus an optional ``deliver_by`` deadline).
+
+    Raises:
+        TripPlannerError: A location has no coordinates and is not known
+            locally; a full plan (which geocodes it) is needed.
+    """
+    start = start_time or _current_minute()
+    names, given = _stop_inputs(
+        current_location, pickup_location, dropoff_location,
+        current_coords, pickup_coords, dropoff_coords, intermediate_stops,
+    )
+    reasons = []
+
+    with measure("estimate"):
+        points = []
+        for name, coords in zip(names, given):
+            if coords and coords[0] is not None and coords[1] is not None:
+                points.append((float(coords[0]), float(coords[1])))
+                continue
+            found, exact = lookup_cached(name)
+            if found is None:
+                raise TripPlannerError(
+                    f"'{name}' has no coordinates and is not in the geocode cache; "
+                    "send lat/lng or run a full plan."
+                )
+            if not exact and "approximate_location" not in reasons:
+                reasons.append("approximate_location")
+            points.append(found)
+
+        pairs = list(zip(points, points[1:]))
+        legs = [_haversine(a, b) for a, b in pairs]
+        factors = [detour_factor(a, b) for a, b in pairs]
+        if any(f.samples < DETOUR_MIN_SAMPLES for f in factors):
+            reasons.append("uncalibrated_region")
+        if any(miles < ESTIMATE_MIN_LEG_MILES for miles in legs):
+            reasons.append("short_leg")
+
+        runs = {
+            bound: _run(names, points, [m * getattr(f, bound) for m, f in zip(legs, factors)],
+                        cycle_used_hours, start)
+            for bound in ("factor", "low", "high")
+        }
+
+    typical, low, high = runs["factor"], runs["low"], runs["high"]
+    if (low["rest_stops"], low["restarts"]) != (high["rest_stops"], high["restarts"]):
+        reasons.append("rest_count_uncertain")
+
+    on_time = None
+    if deliver_by is not None:
+        if high["arrival"] <= deliver_by:
+            on_time = True
+        elif low["arrival"] > deliver_by:
+            on_time = False
+        else:
+            reasons.append("deadline_uncertain")
+
+    return {
+        "estimate": True,
+        "legs": [
+            {
+                "from": names[i],
+                "to": names[i + 1],
+                "straight_miles": round(miles, 1),
+                "distance_miles": round(miles * f.factor, 1),
+                "distance_range_miles": [round(miles * f.low, 1), round(miles * f.high, 1)],
+                "detour": _detour_data(f),
+            }
+            for i, (miles, f) in enumerate(zip(legs, factors))
+        ],
+        "total_distance_miles": round(typical["miles"], 1),
+        "distance_range_miles": [round(low["miles"], 1), round(high["miles"], 1)],
+        "start_time": start.isoformat(),
+        "arrival_time": typical["arrival"].isoformat(),
+        "arrival_range": [low["arrival"].isoformat(), high["arrival"].isoformat()],
+        "end_time": typical["end"].isoformat(),
+        "rest_stops": typical["rest_stops"],
+        "rest_stops_range": [low["rest_stops"], high["rest_stops"]],
+        "restarts": typical["restarts"],
+        "cycle_hours_at_start": cycle_used_hours,
+        "cycle_hours_at_end": typical["cycle_hours"],
+        "cycle_hours_at_end_range": [low["cycle_hours"], high["cycle_hours"]],
+        "deliver_by": deliver_by.isoformat() if deliver_by else None,
+        "on_time": on_time,
+        "full_plan_recommended": bool(reasons),
+        "reasons": reasons,
+    }
+
+
+def _run(names, points, leg_miles, cycle_used_hours, start) -> dict:
+    sim = simulate_trip(names, points, leg_miles, cycle_used_hours, start, checkpoints=False)
+    tl = sim.timeline
+    rests = [
+        mins for code, mins in zip(tl.statuses, tl.durations)
+        if code == OFF_DUTY_CODE and mins >= MANDATORY_REST_MINUTES
+    ]
+    return {
+        "miles": sum(leg_miles),
+        # the final dropoff is the last event; arrival is when it starts
+        "arrival": tl.time_at(tl.offsets[-1]),
+        "end": sim.clock,
+        "rest_stops": len(rests),
+        "restarts": sum(1 for mins in rests if mins >= CYCLE_RESTART_MINUTES),
+        "cycle_hours": round(sim.cycle_used / 60, 1),
+    }
+
+
+def _detour_data(factor: DetourFactor) -> dict:
+    return {
+        "factor": factor.factor,
+        "range": [factor.low, factor.high],
+        "samples": factor.samples,
+        "region": factor.region,
+    }
@@ -3,22 +3,45 @@ Geocoding service using Nominatim (OpenStreetMap).
 
 Converts human-readable address strings into (lat, lng) coordinates.
 Uses the free Nominatim API — no API key required.
+
+Lookups go through a two-tier cache keyed on the normalized address:
+an in-process LRU (fast, per worker) backed by the GeocodeCacheEntry table
+in the default Django database (shared, survives restarts). Failed lookups
+are cached for a shorter period so repeated bad input doesn't hit Nominatim.
 """
 
 import logging
-import time
+import os
+import re
+from datetime import timedelta
 
+import httpx
 import requests
 
+from . import timing, upstream
+from .aio import async_request
+from .cache import TTLCache
+from .place_index import get_place_index
+from .rate_limit import RateLimitExceeded, nominatim_limiter
+
 logger = logging.getLogger(__name__)
 
-NOMINATIM_BASE_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_BASE_URL = os.getenv(
+    "NOMINATIM_URL", "https://nominatim.openstreetmap.org/search"
+)
 
 # Nominatim ToS requires a descriptive User-Agent
 USER_AGENT = "ELDTripPlanner/1.0 (trip-planning-application)"
+NOMINATIM_TIMEOUT = float(os.getenv("NOMINATIM_TIMEOUT", 10))
+
+# Cache tuning (seconds / entries)
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", 30 * 24 * 3600))
+GEOCODE_NEGATIVE_TTL = int(os.getenv("GEOCODE_NEGATIVE_TTL", 24 * 3600))
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", 2048))
 
-# Rate limiting: Nominatim requests max 1 req/sec
-_last_request_time = 0
+# value is (lat, lng) for a hit, or None for a cached "not found"
+_memory_cache = TTLCache(maxsize=GEOCODE_CACHE_SIZE, ttl=GEOCODE_CACHE_TTL, name="geocode")
+_stats = {"db_hits": 0, "db_misses": 0, "upstream_calls": 0}
 
 
 class GeocodingError(Exception):
@@ -31,6 +54,8 @@ def geocode_address(address: str) -> tuple[float, float]:
     """
     Convert a human-readable address into (latitude, longitude) coordinates.
 
+    Served from the geocode cache when possible; only misses reach Nominatim.
+
     Args:
         address: A place name or address string (e.g., "Chicago, IL").
 
@@ -40,49 +65,255 @@ def geocode_address(address: str) -> tuple[float, float]:
     Raises:
         GeocodingError: If the address cannot be found or the API fails.
     """
-    global _last_request_time
+    key = normalize_address(address)
 
-    # Respect Nominatim rate limits (1 request per second)
-    elapsed = time.time() - _last_request_time
-    if elapsed < 1.0:
-        time.sleep(1.0 - elapsed)
+    cached = _cache_get(key)
+    if cached is not _NOT_CACHED:
+        if cached is None:
+            raise _not_found(address)
+        return cached
 
-    params = {
-        "q": address,
-        "format": "json",
-        "limit": 1,
-    }
+    try:
+        coords, label = _fetch(address)
+    except _NotFound:
+        _cache_set(key, None)
+        raise _not_found(address) from None
 
-    headers = {
-        "User-Agent": USER_AGENT,
-    }
+    _cache_set(key, coords)
+    _learn(label, coords)
+    return coords
+
+
+async def geocode_address_async(address: str) -> tuple[float, float]:
+    """
+    geocode_address() for async callers.
+
+    Memory hits return without leaving the event loop; the DB tier runs in
+    a worker thread and Nominatim is called over the shared httpx client.
+    """
+    from asgiref.sync import sync_to_async
+
+    key = normalize_address(address)
+
+    cached = _memory_cache.get(key, _NOT_CACHED)
+    if cached is _NOT_CACHED:
+        cached = await sync_to_async(_db_tier_get)(key)
+    if cached is not _NOT_CACHED:
+        if cached is None:
+            raise _not_found(address)
+        return cached
+
+    try:
+        coords, label = await _fetch_async(address)
+    except _NotFound:
+        await sync_to_async(_cache_set)(key, None)
+        raise _not_found(address) from None
+
+    await sync_to_async(_cache_set)(key, coords)
+    _learn(label, coords)
+    return coords
+
+
+def lookup_cached(address: str) -> tuple[tuple[float, float] | None, bool]:
+    """
+    (lat, lng) for ``address`` without calling Nominatim, and whether it is
+    exact: a geocode-cache entry is, the best suggest-index match is not.
+    (None, False) if neither knows the address.
+    """
+    cached = _cache_get(normalize_address(address))
+    if cached is not _NOT_CACHED:
+        return cached, cached is not None
+    places = get_place_index().search(address, limit=1)
+    if not places:
+        return None, False
+    return (places[0].lat, places[0].lng), False
+
+
+def normalize_address(address: str) -> str:
+    """Canonical cache key: lowercased, single-spaced, tidy commas."""
+    key = re.sub(r"\s+", " ", address.strip().lower())
+    key = re.sub(r"\s*,\s*", ", ", key)
+    return key.strip(" ,.")[:255]
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for both cache tiers plus upstream call count."""
+    return {"memory": _memory_cache.stats(), **_stats}
+
+
+def clear_memory_cache():
+    _memory_cache.clear()
+
+
+# ---- cache tiers ----
+
+_NOT_CACHED = object()
+
+
+class _NotFound(Exception):
+    """Nominatim answered, but with no results."""
+
+
+def _not_found(address: str) -> GeocodingError:
+    return GeocodingError(
+        f"Could not find location: '{address}'. "
+        "Please try a more specific address."
+    )
+
+
+def _cache_get(key: str):
+    """Return (lat, lng), None (cached miss), or _NOT_CACHED."""
+    value = _memory_cache.get(key, _NOT_CACHED)
+    if value is not _NOT_CACHED:
+        return value
+    return _db_tier_get(key)
+
+
+def _db_tier_get(key: str):
+    """Persistent-tier half of _cache_get(); promotes hits into memory."""
+    entry = _db_get(key)
+    if entry is None:
+        _stats["db_misses"] += 1
+        timing.count("geocode_db_miss")
+        return _NOT_CACHED
+
+    _stats["db_hits"] += 1
+    timing.count("geocode_db_hit")
+    value = (entry.lat, entry.lng) if entry.found else None
+    ttl = GEOCODE_CACHE_TTL if entry.found else GEOCODE_NEGATIVE_TTL
+    _memory_cache.set(key, value, ttl=ttl)
+    return value
 
+
+def _cache_set(key: str, coords: tuple[float, float] | None):
+    ttl = GEOCODE_CACHE_TTL if coords else GEOCODE_NEGATIVE_TTL
+    _memory_cache.set(key, coords, ttl=ttl)
+    _db_set(key, coords, ttl)
+
+
+def _db_get(key: str):
+    """Fetch a live persistent entry; the DB tier is best-effort."""
+    try:
+        from django.utils import timezone
+
+        from ..models import GeocodeCacheEntry
+
+        return GeocodeCacheEntry.objects.filter(
+            query=key, expires_at__gt=timezone.now()
+        ).first()
+    except Exception as exc:  # DB not migrated / Django not configured
+        logger.debug("Geocode DB cache unavailable: %s", exc)
+        return None
+
+
+def _db_set(key: str, coords: tuple[float, float] | None, ttl: int):
+    try:
+        from django.utils import timezone
+
+        from ..models import GeocodeCacheEntry
+
+        GeocodeCacheEntry.objects.update_or_create(
+            query=key,
+            defaults={
+                "found": coords is not None,
+                "lat": coords[0] if coords else None,
+                "lng": coords[1] if coords else None,
+                "expires_at": timezone.now() + timedelta(seconds=ttl),
+            },
+        )
+    except Exception as exc:
+        logger.debug("Geocode DB cache write skipped: %s", exc)
+
+
+# ---- upstream ----
+
+def _fetch(address: str) -> tuple[tuple[float, float], str]:
+    """
+    Query Nominatim directly: ((lat, lng), Nominatim's display name).
+    Raises _NotFound on an empty result.
+    """
+    # Respect Nominatim rate limits (1 request per second, shared across
+    # workers) on every attempt, retries included; fail fast rather than
+    # queueing for too long.
+    try:
+        response = upstream.request(
+            "nominatim", "GET",
+            NOMINATIM_BASE_URL,
+            params=_search_params(address),
+            headers={"User-Agent": USER_AGENT},
+            timeout=NOMINATIM_TIMEOUT,
+            limiter=nominatim_limiter,
+        )
+        _stats["upstream_calls"] += 1
+
+        response.raise_for_status()
+        return _first_result(address, response.json())
+
+    except RateLimitExceeded as exc:
+        raise _busy(address, exc) from exc
+    except requests.RequestException as exc:
+        raise _service_error(address, exc) from exc
+
+
+async def _fetch_async(address: str) -> tuple[tuple[float, float], str]:
+    """_fetch() over the shared async client; waits without blocking."""
     try:
-        response = requests.get(
+        response = await async_request(
+            "nominatim", "GET",
             NOMINATIM_BASE_URL,
-            params=params,
-            headers=headers,
-            timeout=10,
+            params=_search_params(address),
+            headers={"User-Agent": USER_AGENT},
+            timeout=NOMINATIM_TIMEOUT,
+            limiter=nominatim_limiter,
         )
-        _last_request_time = time.time()
+        _stats["upstream_calls"] += 1
 
         response.raise_for_status()
-        results = response.json()
+        return _first_result(address, response.json())
 
-        if not results:
-            raise GeocodingError(
-                f"Could not find location: '{address}'. "
-                "Please try a more specific address."
-            )
+    except RateLimitExceeded as exc:
+        raise _busy(address, exc) from exc
+    except httpx.HTTPError as exc:
+        raise _service_error(address, exc) from exc
 
-        lat = float(results[0]["lat"])
-        lng = float(results[0]["lon"])
 
-        logger.info("Geocoded '%s' → (%.5f, %.5f)", address, lat, lng)
-        return (lat, lng)
+def _search_params(address: str) -> dict:
+    return {
+        "q": address,
+        "format": "json",
+        "limit": 1,
+    }
 
-    except requests.RequestException as exc:
-        logger.error("Geocoding request failed for '%s': %s", address, exc)
-        raise GeocodingError(
-            f"Geocoding service error for '{address}'. Please try again later."
-        ) from exc
+
+def _first_result(address: str, results: list) -> tuple[tuple[float, float], str]:
+    if not results:
+        raise _NotFound(address)
+
+    lat = float(results[0]["lat"])
+    lng = float(results[0]["lon"])
+
+    logger.info("Geocoded '%s' → (%.5f, %.5f)", address, lat, lng)
+    return (lat, lng), results[0].get("display_name", "")
+
+
+def _learn(label: str, coords: tuple[float, float]):
+    """
+    Teach the suggest index a geocoded place under Nominatim's canonical
+    name. The string the user typed is never learned: the index is shared
+    by every user of the process, and typed input carries typos and
+    other people's addresses.
+    """
+    if label:
+        get_place_index().add(label, *coords)
+
+
+def _busy(address: str, exc: Exception) -> GeocodingError:
+    logger.warning("Geocoding '%s' rejected: %s", address, exc)
+    return GeocodingError("Geocoding service is busy. Please try again in a moment.")
+
+
+def _service_error(address: str, exc: Exception) -> GeocodingError:
+    logger.error("Geocoding request failed for '%s': %s", address, exc)
+    return GeocodingError(
+        f"Geocoding service error for '{address}'. Please try again later."
+    )
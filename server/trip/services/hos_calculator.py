@@ -13,7 +13,12 @@ Rules:
 """
 
 import logging
+import sys
+import zlib
+from array import array
 from datetime import datetime, timedelta
+from fractions import Fraction
+from typing import NamedTuple
 
 from .constants import (
     AVERAGE_SPEED_MPH,
@@ -30,19 +35,66 @@ from .constants import (
     OFF_DUTY,
     ON_DUTY_NOT_DRIVING,
 )
+from .routing import RouteIndex
+from .timeline import Timeline
 
 logger = logging.getLogger(__name__)
 
+# Values captured before every event (see TripSimulator.state_at)
+_CHECKPOINT_FIELDS = 12
+
+
+class HOSState(NamedTuple):
+    """
+    Simulator state at an event boundary — enough to resume the simulation
+    there. ``step`` is the position in the stop sequence (2k = driving leg
+    k, 2k + 1 = the stop at its end); ``leg_done`` / ``leg_remaining`` are
+    miles into / left on leg k when resuming mid-leg.
+    """
+
+    start_time: datetime
+    elapsed: int
+    shift_driving: int
+    window_start: int | None
+    since_break: int
+    cycle_used: int
+    miles_since_fuel: float
+    total_miles: float
+    day: int
+    step: int
+    leg_done: float
+    leg_remaining: float
+    fuel_due: bool = False
+
+    def as_dict(self) -> dict:
+        return {**self._asdict(), "start_time": self.start_time.isoformat()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HOSState":
+        values = {**data, "start_time": datetime.fromisoformat(data["start_time"])}
+        return cls(**{f: values[f] for f in cls._fields if f in values})
+
 
 class TripSimulator:
-    """Stateful simulator that tracks HOS counters and builds a timeline."""
+    """
+    Stateful simulator that tracks HOS counters and builds a timeline.
+
+    Time is tracked as whole minutes elapsed since ``start_time``; events are
+    stored in a compact Timeline and only turned into dicts on request.
+    """
 
-    def __init__(self, cycle_used_hours: float = 0, start_time: datetime | None = None):
-        self.clock = start_time or datetime(2025, 1, 1, 6, 0)
+    def __init__(
+        self,
+        cycle_used_hours: float = 0,
+        start_time: datetime | None = None,
+        checkpoints: bool = True,
+    ):
+        self.start_time = start_time or datetime(2025, 1, 1, 6, 0)
+        self.elapsed = 0             # minutes since start_time
 
         # shift counters (reset after 10h rest)
         self.shift_driving = 0       # minutes driven this shift
-        self.window_start = None     # when the 14h window opened
+        self.window_start = None     # elapsed minute the 14h window opened
         self.since_break = 0         # minutes since last 30-min break
 
         # cycle counter
@@ -50,12 +102,67 @@ class TripSimulator:
 
         # fuel / mileage
         self.miles_since_fuel = 0.0
-        self.total_miles = 0.0
+        self.driven_minutes = 0      # whole minutes, so total_miles is path-independent
 
         # output
-        self.timeline: list[dict] = []
+        self.timeline = Timeline(self.start_time)
         self.day = 1
 
+        # road geometry for placing events (see drive_segment / place_on_routes)
+        self.routes: dict[int, RouteIndex] = {}
+        self._leg = -1               # key into self.routes, -1 = none
+        self._leg_progress = 0.0     # fraction of the current leg covered
+
+        # resume support: position in the stop sequence (set by the caller),
+        # the leg being driven, and one checkpoint per event for state_at()
+        # (skipped with checkpoints=False when nobody will resume)
+        self.step = 0
+        self._seg_total = 0.0        # miles of the leg being driven
+        self._seg_remaining = 0.0    # miles left at the current chunk's start
+        self._chunk_driven = 0       # minutes driven so far in the chunk
+        self._fuel_due = False       # a fuel stop is being / about to be made
+        self._checkpoints = array("d") if checkpoints else None
+
+        # seconds past midnight at start, for cheap day-boundary checks
+        st = self.start_time
+        self._start_secs = st.hour * 3600 + st.minute * 60 + st.second + st.microsecond / 1e6
+
+    @classmethod
+    def resume(
+        cls,
+        state: HOSState,
+        timeline: Timeline | None = None,
+        routes: dict[int, RouteIndex] | None = None,
+        checkpoints: array | None = None,
+    ) -> "TripSimulator":
+        """
+        A simulator continuing from ``state``.
+
+        ``timeline`` is the already-driven prefix (events before the state);
+        new events are appended to it. ``routes`` maps leg number to road
+        geometry as in drive_segment(). ``checkpoints`` are the prefix
+        events' checkpoints (see checkpoints_before()), so the result can
+        itself be resumed anywhere on its timeline.
+        """
+        sim = cls(start_time=state.start_time)
+        sim.elapsed = state.elapsed
+        sim.shift_driving = state.shift_driving
+        sim.window_start = state.window_start
+        sim.since_break = state.since_break
+        sim.cycle_used = state.cycle_used
+        sim.miles_since_fuel = state.miles_since_fuel
+        sim.driven_minutes = round(state.total_miles * 60 / AVERAGE_SPEED_MPH)
+        sim.day = state.day
+        sim.step = state.step
+        sim._fuel_due = state.fuel_due
+        if timeline is not None:
+            sim.timeline = timeline
+        if routes:
+            sim.routes = dict(routes)
+        if checkpoints is not None:
+            sim._checkpoints = array("d", checkpoints)
+        return sim
+
     # ---- public interface ----
 
     def add_pickup(self, location: str, lat: float = 0, lng: float = 0):
@@ -73,10 +180,38 @@ class TripSimulator:
         lng_from: float = 0,
         lat_to: float = 0,
         lng_to: float = 0,
+        route: RouteIndex | None = None,
+        leg: int | None = None,
+        done_miles: float = 0.0,
     ):
-        total_distance = distance_miles
+        """
+        Drive one leg, inserting breaks, rests, restarts and fuel stops.
+
+        Event positions are interpolated in a straight line between the two
+        endpoints. If ``route`` (the leg's road geometry) is given, each
+        event's progress along the leg is recorded as well, and
+        place_on_routes() later moves every event onto the road. ``leg``
+        numbers the route (default: next free number).
+
+        ``done_miles`` resumes a leg part-way: the leg is ``done_miles +
+        distance_miles`` long and only the remainder is driven.
+        """
+        total_distance = done_miles + distance_miles
+        if route is not None and total_distance > 0:
+            self._leg = len(self.routes) if leg is None else leg
+            self.routes[self._leg] = route
+
         remaining = distance_miles
+        self._seg_total = total_distance
+        if self._fuel_due and remaining > 0.5:
+            # resumed from a checkpoint taken right at a fuel stop
+            self._seg_remaining = remaining
+            self._leg_fuel_stop(
+                total_distance, remaining, location_from, lat_from, lng_from, lat_to, lng_to
+            )
+
         while remaining > 0.5:
+            self._seg_remaining = remaining
             to_fuel = FUEL_STOP_INTERVAL_MILES - self.miles_since_fuel
             chunk_mi = min(remaining, max(to_fuel, 0.5))
             chunk_min = max(1, round((chunk_mi / AVERAGE_SPEED_MPH) * 60))
@@ -96,23 +231,108 @@ class TripSimulator:
             actual_mi = (driven / 60) * AVERAGE_SPEED_MPH
             remaining -= actual_mi
             self.miles_since_fuel += actual_mi
-            self.total_miles += actual_mi
+            self.driven_minutes += driven
+            self._seg_remaining = remaining
+            self._chunk_driven = 0
 
             if self.miles_since_fuel >= FUEL_STOP_INTERVAL_MILES and remaining > 0.5:
-                # Interpolate fuel stop position
-                fuel_covered = total_distance - remaining
-                fuel_frac = fuel_covered / total_distance if total_distance > 0 else 0
-                fuel_lat = lat_from + (lat_to - lat_from) * fuel_frac
-                fuel_lng = lng_from + (lng_to - lng_from) * fuel_frac
-                self._fuel_stop(location_from, fuel_lat, fuel_lng)
+                self._fuel_due = True
+                self._leg_fuel_stop(
+                    total_distance, remaining, location_from, lat_from, lng_from, lat_to, lng_to
+                )
+
+        self._leg = -1
+        self._seg_total = self._seg_remaining = 0.0
+
+    def _leg_fuel_stop(
+        self, total_distance: float, remaining: float, location_from: str,
+        lat_from: float, lng_from: float, lat_to: float, lng_to: float,
+    ):
+        # Interpolate fuel stop position
+        fuel_covered = total_distance - remaining
+        fuel_frac = fuel_covered / total_distance if total_distance > 0 else 0
+        fuel_lat = lat_from + (lat_to - lat_from) * fuel_frac
+        fuel_lng = lng_from + (lng_to - lng_from) * fuel_frac
+        self._leg_progress = fuel_frac
+        self._fuel_stop(location_from, fuel_lat, fuel_lng)
+
+    def place_on_routes(self, start: int = 0):
+        """
+        Move events recorded against a route onto its geometry.
+
+        One vectorized lookup per leg, after simulation, instead of a
+        geometry walk per event. ``start`` skips events already placed.
+        """
+        self.timeline.place_on_routes(self.routes, start)
+
+    def snapshot(self) -> HOSState:
+        """The current state (after the last event)."""
+        return self._decode(self._state_values())
+
+    def state_at(self, index: int) -> HOSState:
+        """
+        The state just before timeline event ``index`` — resuming from it
+        with the timeline truncated to ``index`` events re-creates the tail.
+        """
+        if index == len(self.timeline):
+            return self.snapshot()
+        if not 0 <= index < len(self.timeline):
+            raise IndexError("timeline index out of range")
+        if self._checkpoints is None:
+            raise ValueError("simulator was created with checkpoints=False")
+        base = index * _CHECKPOINT_FIELDS
+        return self._decode(self._checkpoints[base:base + _CHECKPOINT_FIELDS])
+
+    def checkpoint_bytes(self) -> bytes | None:
+        """The checkpoints, zlib-compressed little-endian doubles (for storage)."""
+        if self._checkpoints is None:
+            return None
+        values = array("d", self._checkpoints)
+        if sys.byteorder != "little":
+            values.byteswap()
+        return zlib.compress(values.tobytes())
+
+    @classmethod
+    def restore(cls, timeline: Timeline, checkpoints: bytes) -> "TripSimulator":
+        """
+        A finished simulation rebuilt from its timeline and checkpoint_bytes(),
+        for state_at() / checkpoints_before() — i.e. to be resumed from, not
+        driven further.
+        """
+        values = array("d")
+        values.frombytes(zlib.decompress(checkpoints))
+        if sys.byteorder != "little":
+            values.byteswap()
+        sim = cls(start_time=timeline.start)
+        sim.timeline = timeline
+        sim._checkpoints = values
+        return sim
+
+    def checkpoints_before(self, index: int) -> array:
+        """The checkpoints of events before ``index``, for resume()."""
+        if self._checkpoints is None:
+            raise ValueError("simulator was created with checkpoints=False")
+        return self._checkpoints[:index * _CHECKPOINT_FIELDS]
+
+    @property
+    def clock(self) -> datetime:
+        return self.start_time + timedelta(minutes=self.elapsed)
 
     def get_timeline(self) -> list[dict]:
-        return self.timeline
+        """The timeline as a list of event dicts (serialization boundary)."""
+        return self.timeline.to_dicts()
+
+    @property
+    def total_miles(self) -> float:
+        return (self.driven_minutes / 60) * AVERAGE_SPEED_MPH
 
     def get_total_miles(self) -> float:
-        return round(self.total_miles, 1)
+        """Miles driven, to 0.1 mi; a tie (x.x5) rounds to even, as round() does."""
+        # tenths of a mile are minutes * speed / 6, rounded exactly so float
+        # noise in total_miles can't decide a tie either way
+        return round(Fraction(self.driven_minutes * AVERAGE_SPEED_MPH, 6)) / 10
 
-    # ---- core drive loop (recursive on HOS splits) ----
+    # ---- core drive loop ----
 
     def _drive(
         self, mins: int, frm: str, to: str,
@@ -120,73 +340,57 @@ class TripSimulator:
         lat_to: float = 0, lng_to: float = 0,
         total_dist: float = 0, covered_dist: float = 0,
     ) -> int:
-        if mins <= 0:
-            return 0
-
-        self._check_cycle(frm, lat, lng)
-        self._open_window()
-
-        # Calculate limits
-        # 1. Driving within shift
-        limit_driving = MAX_DRIVING_MINUTES - self.shift_driving
-        # 2. 14-hour duty window
-        limit_window = self._window_left()
-        # 3. 8-hour consecutive driving limit
-        limit_break = MAX_DRIVING_BEFORE_BREAK - self.since_break
-        # 4. 70-hour / 8-day cycle limit
-        limit_cycle = MAX_CYCLE_MINUTES - self.cycle_used
-
-        # Determine the constraining factor
-        avail = min(limit_driving, limit_window, limit_break, limit_cycle)
-        
-        # If we have no available driving time, perform the required action
-        if avail <= 0:
-            if limit_cycle <= 0:
-                self._check_cycle(frm, lat, lng) # Force restart if no cycle hours
-            elif limit_driving <= 0 or limit_window <= 0:
-                self._rest(frm, lat, lng) # 10h rest at current interpolated position
-            elif limit_break <= 0:
-                self._break(frm, lat, lng) # 30m break at current interpolated position
-            
-            # Recurse to try driving again after the action
-            return self._drive(
-                mins, frm, to, lat, lng,
-                lat_to, lng_to, total_dist, covered_dist,
-            )
-
-        # Drive for as much as possible up to 'mins' or 'avail'
-        now = min(mins, avail)
-
-        # Calculate the position at the end of this driving chunk
-        chunk_mi = (now / 60) * AVERAGE_SPEED_MPH
-        new_covered = covered_dist + chunk_mi
-        if total_dist > 0:
-            end_frac = min(new_covered / total_dist, 1.0)
-            # Use lat_to/lng_to from segment origin to extrapolate
-            # We already have the current interpolated lat/lng as starting pos
-            drive_end_lat = lat + (lat_to - lat) * min(chunk_mi / max(total_dist - covered_dist, 1), 1.0)
-            drive_end_lng = lng + (lng_to - lng) * min(chunk_mi / max(total_dist - covered_dist, 1), 1.0)
-        else:
-            drive_end_lat, drive_end_lng = lat, lng
+        """
+        Drive ``mins`` minutes, splitting at every HOS limit on the way.
 
+        Each pass works out which limit binds next (11h driving, 14h window,
+        8h break, 70h cycle) and drives straight up to it, so the number of
+        iterations equals the number of timeline events produced.
+        """
         label = f"Driving: {frm} → {to}" if frm and to else "Driving"
-        self._event(DRIVING, now, frm, lat, lng, label)
-
-        self.shift_driving += now
-        self.since_break += now
-        self.cycle_used += now
-
-        left = mins - now
-        if left <= 0:
-            return now
-
-        # If we have remaining miles but stopped due to a limit, 
-        # recurse to handle the break/rest and continue driving
-        # using the updated position along the route.
-        return now + self._drive(
-            left, frm, to, drive_end_lat, drive_end_lng,
-            lat_to, lng_to, total_dist, new_covered,
-        )
+        driven = 0
+
+        while mins > 0:
+            self._chunk_driven = driven
+            if total_dist > 0:
+                self._leg_progress = covered_dist / total_dist
+            self._check_cycle(frm, lat, lng)
+            self._open_window()
+
+            limit_driving = MAX_DRIVING_MINUTES - self.shift_driving
+            limit_window = self._window_left()
+            limit_break = MAX_DRIVING_BEFORE_BREAK - self.since_break
+            limit_cycle = MAX_CYCLE_MINUTES - self.cycle_used
+            avail = min(limit_driving, limit_window, limit_break, limit_cycle)
+
+            # No driving time left: take the required stop at the current
+            # interpolated position, then re-evaluate the limits.
+            if avail <= 0:
+                if limit_cycle <= 0:
+                    self._check_cycle(frm, lat, lng)
+                elif limit_driving <= 0 or limit_window <= 0:
+                    self._rest(frm, lat, lng)
+                elif limit_break <= 0:
+                    self._break(frm, lat, lng)
+                continue
+
+            now = min(mins, avail)
+            self._event(DRIVING, now, frm, lat, lng, label)
+            self.shift_driving += now
+            self.since_break += now
+            self.cycle_used += now
+            driven += now
+            mins -= now
+
+            # Advance the position towards the segment end for the next split
+            if total_dist > 0:
+                chunk_mi = (now / 60) * AVERAGE_SPEED_MPH
+                step = min(chunk_mi / max(total_dist - covered_dist, 1), 1.0)
+                lat += (lat_to - lat) * step
+                lng += (lng_to - lng) * step
+                covered_dist += chunk_mi
+
+        return driven
 
     # ---- HOS actions ----
 
@@ -210,6 +414,7 @@ class TripSimulator:
         self._open_window()
         self._event(ON_DUTY_NOT_DRIVING, FUEL_STOP_DURATION_MINUTES, loc or "Fuel station", lat, lng, "Fuel stop")
         self.miles_since_fuel = 0
+        self._fuel_due = False
         self.cycle_used += FUEL_STOP_DURATION_MINUTES
         self.since_break = 0  # 30min non-driving counts as break
 
@@ -224,13 +429,12 @@ class TripSimulator:
 
     def _open_window(self):
         if self.window_start is None:
-            self.window_start = self.clock
+            self.window_start = self.elapsed
 
     def _window_left(self) -> int:
-        if not self.window_start:
+        if self.window_start is None:
             return MAX_DUTY_WINDOW_MINUTES
-        elapsed = (self.clock - self.window_start).total_seconds() / 60
-        return max(0, int(MAX_DUTY_WINDOW_MINUTES - elapsed))
+        return max(0, MAX_DUTY_WINDOW_MINUTES - (self.elapsed - self.window_start))
 
     def _reset_shift(self):
         self.shift_driving = 0
@@ -241,25 +445,57 @@ class TripSimulator:
         self._reset_shift()
         self.cycle_used = 0
 
+    def _state_values(self) -> tuple:
+        # Mid-chunk, the miles driven so far in the chunk are not yet added
+        # to the counters (drive_segment adds them when _drive returns).
+        pending = (self._chunk_driven / 60) * AVERAGE_SPEED_MPH
+        remaining = max(self._seg_remaining - pending, 0.0)
+        return (
+            self.elapsed,
+            self.shift_driving,
+            -1 if self.window_start is None else self.window_start,
+            self.since_break,
+            self.cycle_used,
+            self.miles_since_fuel + pending,
+            ((self.driven_minutes + self._chunk_driven) / 60) * AVERAGE_SPEED_MPH,
+            self.day,
+            self.step,
+            self._seg_total - remaining if self._seg_total else 0.0,
+            remaining,
+            1.0 if self._fuel_due else 0.0,
+        )
+
+    def _decode(self, values) -> HOSState:
+        (elapsed, shift_driving, window_start, since_break, cycle_used,
+         miles_since_fuel, total_miles, day, step, leg_done, leg_remaining, fuel_due) = values
+        return HOSState(
+            start_time=self.start_time,
+            elapsed=int(elapsed),
+            shift_driving=int(shift_driving),
+            window_start=None if window_start < 0 else int(window_start),
+            since_break=int(since_break),
+            cycle_used=int(cycle_used),
+            miles_since_fuel=miles_since_fuel,
+            total_miles=total_miles,
+            day=int(day),
+            step=int(step),
+            leg_done=leg_done,
+            leg_remaining=leg_remaining,
+            fuel_due=bool(fuel_due),
+        )
+
     # ---- timeline recording ----
 
     def _event(self, status: str, mins: int, loc: str = "", lat: float = 0, lng: float = 0, note: str = ""):
-        start = self.clock
-        end = start + timedelta(minutes=mins)
+        if self._checkpoints is not None:
+            self._checkpoints.extend(self._state_values())
+        start = self.elapsed
+        end = start + mins
 
         d = self.day
-        if start.date() != end.date():
-            self.day += (end.date() - start.date()).days
-
-        self.timeline.append({
-            "status": status,
-            "start_time": start.isoformat(),
-            "end_time": end.isoformat(),
-            "duration_mins": mins,
-            "location": loc,
-            "lat": lat,
-            "lng": lng,
-            "note": note,
-            "day": d,
-        })
-        self.clock = end
+        start_day = int((self._start_secs + start * 60) // 86400)
+        end_day = int((self._start_secs + end * 60) // 86400)
+        self.day += end_day - start_day
+
+        self.timeline.append(status, start, mins, loc, lat, lng, note, d, self._leg, self._leg_progress)
+        self.elapsed = end
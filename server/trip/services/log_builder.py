@@ -10,13 +10,35 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 
 from .constants import DRIVING, OFF_DUTY, ON_DUTY_NOT_DRIVING, SLEEPER_BERTH
+from .timeline import STATUS_CODES, STATUSES, Timeline
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional speedup
+    np = None
 
-def build_daily_logs(timeline: list[dict], driver_name: str = "Driver") -> list[dict]:
+MINUTES_PER_DAY = 1440
+
+# Below this many events the per-event Python path is already cheaper than
+# setting up NumPy arrays.
+NUMPY_MIN_EVENTS = 100
+
+# Grid hour and "HH:MM" label for every minute of the day (0..1440). Using
+# lookups keeps both paths bit-identical to round(hour + minute / 60, 2).
+_HOUR_AT = [round(m // 60 + (m % 60) / 60, 2) for m in range(MINUTES_PER_DAY)] + [24.0]
+_LABEL_AT = [f"{m // 60:02d}:{m % 60:02d}" for m in range(MINUTES_PER_DAY)]
+
+
+def build_daily_logs(timeline: list[dict] | Timeline, driver_name: str = "Driver") -> list[dict]:
     """Group the flat timeline into per-day ELD log sheets."""
     if not timeline:
         return []
 
+    if isinstance(timeline, Timeline) and timeline.minute_aligned:
+        if np is not None and len(timeline) >= NUMPY_MIN_EVENTS:
+            return _build_numpy(timeline)
+        return _build_compact(timeline)
+
     by_date = _split_by_date(timeline)
     logs = []
 
@@ -152,3 +174,184 @@ def _remarks(events: list[dict]) -> list[dict]:
         t = datetime.fromisoformat(ev["start_time"])
         out.append({"time": t.strftime("%H:%M"), "location": ev.get("location", ""), "note": note})
     return out
+
+
+# ---- compact-timeline path (integer minutes, no timestamp parsing) ----
+
+def _build_compact(tl: Timeline) -> list[dict]:
+    """Same output as the dict path, computed from minute offsets."""
+    start = tl.start
+    base = start.hour * 60 + start.minute   # trip start, minutes past midnight
+    base_date = start.date()
+
+    # day index → [(event index, slice start, slice end)], minutes since
+    # midnight of the trip's first day
+    by_day: dict[int, list[tuple[int, int, int]]] = defaultdict(list)
+    offsets, durations = tl.offsets, tl.durations
+
+    for i in range(len(offsets)):
+        cur = base + offsets[i]
+        end = cur + durations[i]
+        while cur // MINUTES_PER_DAY < end // MINUTES_PER_DAY:
+            midnight = (cur // MINUTES_PER_DAY + 1) * MINUTES_PER_DAY
+            by_day[cur // MINUTES_PER_DAY].append((i, cur, midnight))
+            cur = midnight
+        if cur < end:
+            by_day[cur // MINUTES_PER_DAY].append((i, cur, end))
+
+    logs = []
+    for day in sorted(by_day):
+        slices = by_day[day]
+        segments = _fill_gaps(_compact_segments(tl, slices, day))
+        logs.append({
+            "date": (base_date + timedelta(days=day)).isoformat(),
+            "segments": segments,
+            "totals": _sum_totals(segments),
+            "remarks": _compact_remarks(tl, slices, day),
+        })
+    return logs
+
+
+def _compact_segments(tl: Timeline, slices: list[tuple], day: int) -> list[dict]:
+    day_start = day * MINUTES_PER_DAY
+    raw = []
+    for i, cur, end in slices:
+        s_min = cur - day_start
+        e_min = min(end - day_start, MINUTES_PER_DAY)
+        if e_min > s_min:
+            raw.append({
+                "status": STATUSES[tl.statuses[i]],
+                "start_hour": _HOUR_AT[s_min],
+                "end_hour": _HOUR_AT[e_min],
+                "duration_mins": end - cur,
+            })
+    return raw
+
+
+def _compact_remarks(tl: Timeline, slices: list[tuple], day: int) -> list[dict]:
+    day_start = day * MINUTES_PER_DAY
+    out = []
+    for i, cur, _end in slices:
+        note = tl.note(i)
+        if not note or note.startswith("Driving"):
+            continue
+        out.append({"time": _LABEL_AT[cur - day_start], "location": tl.location(i), "note": note})
+    return out
+
+
+# ---- NumPy path (whole timeline in bulk arrays) ----
+
+def _build_numpy(tl: Timeline) -> list[dict]:
+    """
+    Same output as _build_compact, with midnight splits, grid hours, gap
+    fills and per-status totals computed as array operations.
+    """
+    start = tl.start
+    base = start.hour * 60 + start.minute
+    base_date = start.date()
+
+    starts = np.frombuffer(tl.offsets, dtype=f"i{tl.offsets.itemsize}").astype(np.int64) + base
+    ends = starts + np.frombuffer(tl.durations, dtype=f"i{tl.durations.itemsize}")
+    statuses = np.frombuffer(tl.statuses, dtype=np.uint8)
+
+    # 1) midnight splits: one slice per calendar day an event touches
+    first_day = starts // MINUTES_PER_DAY
+    last_day = ends // MINUTES_PER_DAY
+    n_slices = (last_day - first_day) + ((ends % MINUTES_PER_DAY != 0) & (ends > starts))
+    ev = np.repeat(np.arange(len(starts)), n_slices)
+    seq = np.arange(len(ev)) - np.repeat(np.cumsum(n_slices) - n_slices, n_slices)
+    day = first_day[ev] + seq
+    day_start = day * MINUTES_PER_DAY
+    s_min = np.maximum(starts[ev], day_start) - day_start
+    e_min = np.minimum(ends[ev], day_start + MINUTES_PER_DAY) - day_start
+
+    keep = e_min > s_min
+    ev, day, s_min, e_min = ev[keep], day[keep], s_min[keep], e_min[keep]
+
+    # 2) 24h grid hours and gap fill (gaps only appear for non-contiguous input)
+    hour_at = np.asarray(_HOUR_AT)
+    sh, eh = hour_at[s_min], hour_at[e_min]
+    seg_status = statuses[ev].astype(np.int64)
+
+    first_of_day = np.ones(len(day), dtype=bool)
+    first_of_day[1:] = day[1:] != day[:-1]
+    last_of_day = np.ones(len(day), dtype=bool)
+    last_of_day[:-1] = first_of_day[1:]
+
+    gap_before = np.where(first_of_day, sh > 0, False)
+    gap_between = np.zeros(len(day), dtype=bool)
+    gap_between[1:] = ~first_of_day[1:] & (eh[:-1] < sh[1:])
+    gap_after = last_of_day & (eh < 24.0)
+
+    gap_start = np.where(first_of_day, 0.0, np.roll(eh, 1))
+    gap_hours = np.where(gap_before | gap_between, sh - gap_start, 0.0)
+    tail_hours = np.where(gap_after, 24.0 - eh, 0.0)
+
+    # 3) per-day, per-status totals
+    day_ids, day_pos = np.unique(day, return_inverse=True)
+    n_days = len(day_ids)
+    n_status = len(STATUSES)
+    totals = np.bincount(
+        day_pos * n_status + seg_status, weights=eh - sh, minlength=n_days * n_status,
+    ).reshape(n_days, n_status)
+    totals[:, STATUS_CODES[OFF_DUTY]] += (
+        np.bincount(day_pos, weights=gap_hours + tail_hours, minlength=n_days)
+    )
+    totals = np.round(totals, 2)
+
+    # 4) assemble the per-day dicts from the bulk arrays
+    remark_note = [
+        bool(note) and not note.startswith("Driving") for note in tl._strings
+    ]
+    durations = (e_min - s_min).tolist()
+    logs = []
+    bounds = np.flatnonzero(first_of_day).tolist() + [len(day)]
+
+    ev_l, s_l = ev.tolist(), s_min.tolist()
+    sh_l, eh_l = sh.tolist(), eh.tolist()
+    status_l = seg_status.tolist()
+    gb_l, gw_l, ga_l = gap_before.tolist(), gap_between.tolist(), gap_after.tolist()
+
+    for d, (lo, hi) in enumerate(zip(bounds, bounds[1:])):
+        segments = []
+        remarks = []
+        for j in range(lo, hi):
+            if gb_l[j]:
+                segments.append(_off_gap(0.0, sh_l[j]))
+            elif gw_l[j]:
+                segments.append(_off_gap(eh_l[j - 1], sh_l[j]))
+            segments.append({
+                "status": STATUSES[status_l[j]],
+                "start_hour": sh_l[j],
+                "end_hour": eh_l[j],
+                "duration_mins": durations[j],
+            })
+            if ga_l[j]:
+                segments.append(_off_gap(eh_l[j], 24.0))
+
+            i = ev_l[j]
+            if remark_note[tl.notes[i]]:
+                remarks.append({
+                    "time": _LABEL_AT[s_l[j]],
+                    "location": tl.location(i),
+                    "note": tl.note(i),
+                })
+
+        row = totals[d]
+        logs.append({
+            "date": (base_date + timedelta(days=int(day_ids[d]))).isoformat(),
+            "segments": segments,
+            "totals": {status: float(row[code]) for code, status in enumerate(STATUSES)},
+            "remarks": remarks,
+        })
+    return logs
+
+
+def _off_gap(start_hour: float, end_hour: float) -> dict:
+    """An OFF_DUTY filler segment, same shape as _fill_gaps produces."""
+    return {
+        "status": OFF_DUTY,
+        "start_hour": start_hour,
+        "end_hour": end_hour,
+        "duration_mins": int((end_hour - start_hour) * 60),
+    }
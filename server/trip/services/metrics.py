@@ -0,0 +1,124 @@
+"""
+Prometheus text exposition for /api/metrics/.
+
+Everything here is per worker process (as are the caches and histograms it
+reads), so with several gunicorn workers each scrape sees one worker; scrape
+every worker, or aggregate on the `instance` label.
+"""
+
+from . import timing, upstream
+from .autocomplete import suggest_stats
+from .geocoding import cache_stats as geocode_cache_stats
+from .rate_limit import nominatim_limiter
+from .routing import route_cache_stats
+from .trip_planner import plan_cache_stats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render_prometheus() -> str:
+    out: list[str] = []
+
+    _histogram(
+        out, "eld_stage_duration_seconds",
+        "Time per request spent in each pipeline stage, by view.",
+        {(("view", view), ("stage", stage)): snap
+         for (view, stage), snap in timing.stage_stats().items()},
+    )
+
+    latency = upstream.latency_stats()
+    _histogram(
+        out, "eld_upstream_request_duration_seconds",
+        "Upstream API call latency, including retries.",
+        {(("upstream", name),): snap for name, snap in latency.items()},
+    )
+    _metric(
+        out, "eld_upstream_request_errors_total", "counter",
+        "Upstream calls that failed or answered >= 400.",
+        {(("upstream", name),): snap["errors"] for name, snap in latency.items()},
+    )
+
+    geocode = geocode_cache_stats()
+    suggest = suggest_stats()
+    plans = plan_cache_stats()
+    caches = {
+        "plan": plans["cache"],
+        "route": route_cache_stats(),
+        "geocode": geocode["memory"],
+        "suggest": suggest["query_cache"],
+    }
+    hits = {(("cache", name),): stats["hits"] for name, stats in caches.items()}
+    misses = {(("cache", name),): stats["misses"] for name, stats in caches.items()}
+    hits[(("cache", "geocode_db"),)] = geocode["db_hits"]
+    misses[(("cache", "geocode_db"),)] = geocode["db_misses"]
+    _metric(out, "eld_cache_hits_total", "counter", "Cache lookups that hit.", hits)
+    _metric(out, "eld_cache_misses_total", "counter", "Cache lookups that missed.", misses)
+    _metric(
+        out, "eld_cache_entries", "gauge", "Entries currently cached.",
+        {(("cache", name),): stats["size"] for name, stats in caches.items()},
+    )
+
+    flights = {"plan": plans["coalescing"], "suggest": suggest["upstream"]}
+    _metric(
+        out, "eld_coalesced_calls_total", "counter",
+        "Calls that shared an identical in-flight call's result.",
+        {(("flight", name),): stats["coalesced"] for name, stats in flights.items()},
+    )
+    _metric(
+        out, "eld_suggest_local_hits_total", "counter",
+        "Suggest queries answered from the in-process place index.",
+        {(): suggest["local_hits"]},
+    )
+
+    limiter = nominatim_limiter.stats()
+    _metric(
+        out, "eld_rate_limit_acquired_total", "counter",
+        "Nominatim rate-limit slots granted.", {(): limiter["acquired"]},
+    )
+    _metric(
+        out, "eld_rate_limit_rejected_total", "counter",
+        "Nominatim calls refused because the wait would be too long.",
+        {(): limiter["rejected"]},
+    )
+    _metric(
+        out, "eld_rate_limit_wait_seconds_total", "counter",
+        "Time spent waiting for Nominatim rate-limit slots.",
+        {(): limiter["wait_seconds_total"]},
+    )
+    _metric(
+        out, "eld_rate_limit_queue_depth", "gauge",
+        "Callers holding a future Nominatim slot, across processes.",
+        {(): limiter["queue_depth"]},
+    )
+    return "\n".join(out) + "\n"
+
+
+def _metric(out: list, name: str, kind: str, help_text: str, samples: dict):
+    out.append(f"# HELP {name} {help_text}")
+    out.append(f"# TYPE {name} {kind}")
+    for labels, value in samples.items():
+        out.append(f"{name}{_labels(labels)} {_number(value)}")
+
+
+def _histogram(out: list, name: str, help_text: str, snapshots: dict):
+    """``snapshots``: labels → LatencyHistogram.snapshot() (millisecond buckets)."""
+    out.append(f"# HELP {name} {help_text}")
+    out.append(f"# TYPE {name} histogram")
+    for labels, snap in snapshots.items():
+        for bucket, n in snap["buckets"].items():
+            bound = bucket.removeprefix("le_")
+            le = "+Inf" if bound == "inf" else _number(int(bound) / 1000)
+            out.append(f"{name}_bucket{_labels(labels + (('le', le),))} {n}")
+        out.append(f"{name}_sum{_labels(labels)} {_number(snap['total_ms'] / 1000)}")
+        out.append(f"{name}_count{_labels(labels)} {snap['count']}")
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    # label values are our own identifiers (view, stage, cache names): no escaping needed
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,180 @@
+"""
+In-process prefix index for location autocomplete.
+
+A sorted array of normalized keys searched with bisect: every key starting
+with the typed prefix sits in one contiguous run, so a lookup is a binary
+search plus a short scan. The index is seeded from a bundled gazetteer of
+North American cities and learns from suggestions Nominatim returned and
+the canonical names of addresses that geocoded successfully, so repeat
+prefixes never leave the process.
+"""
+
+import bisect
+import csv
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER = Path(__file__).resolve().parent.parent / "data" / "na_places.csv"
+
+# Empty string disables the bundled gazetteer
+SUGGEST_GAZETTEER = os.getenv("SUGGEST_GAZETTEER", str(DEFAULT_GAZETTEER))
+SUGGEST_INDEX_MAX_LEARNED = int(os.getenv("SUGGEST_INDEX_MAX_LEARNED", 5000))
+
+# Candidates examined per lookup before ranking (short prefixes match a lot)
+SCAN_LIMIT = 200
+
+# Results this close (decimal degrees, ~1 km) are one place under two names,
+# e.g. a gazetteer city and the same city learned from Nominatim
+SAME_PLACE_DECIMALS = 2
+
+
+class Place(NamedTuple):
+    label: str
+    lat: float
+    lng: float
+    population: int     # gazetteer rank; 0 for learned entries
+    learned: int        # learn sequence number (newer = higher); 0 for gazetteer
+
+
+def normalize_key(text: str) -> str:
+    """Lowercase, punctuation to spaces, single-spaced: "St. Louis, MO" → "st louis mo"."""
+    return " ".join(re.sub(r"[\W_]+", " ", text.lower()).split())
+
+
+class PlaceIndex:
+    """Sorted-array prefix index (thread-safe)."""
+
+    def __init__(self, max_learned: int = SUGGEST_INDEX_MAX_LEARNED):
+        self.max_learned = max_learned
+        self._keys: list[str] = []
+        self._places: list[Place] = []          # parallel to _keys
+        self._learned: OrderedDict = OrderedDict()   # (key, label) in learn order
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def add(self, label: str, lat: float, lng: float, keys: list[str] | None = None):
+        """Learn a place (suggestion or geocode); re-adding refreshes it."""
+        keys = [normalize_key(k) for k in keys] if keys else [normalize_key(label)]
+        with self._lock:
+            self._seq += 1
+            place = Place(label, float(lat), float(lng), 0, self._seq)
+            for key in keys:
+                if not key:
+                    continue
+                self._insert(key, place)
+                self._learned[(key, label)] = None
+                self._learned.move_to_end((key, label))
+
+            while len(self._learned) > self.max_learned:
+                (key, old_label), _ = self._learned.popitem(last=False)
+                self._remove(key, old_label)
+
+    def add_gazetteer(self, label: str, lat: float, lng: float, population: int, keys: list[str]):
+        with self._lock:
+            place = Place(label, float(lat), float(lng), population, 0)
+            for key in keys:
+                key = normalize_key(key)
+                if key:
+                    self._insert(key, place)
+
+    def search(self, query: str, limit: int = 5) -> list[Place]:
+        """
+        Places whose key starts with ``query``: learned entries first (newest
+        first), then gazetteer cities by population. Each label, and each
+        location, appears once.
+        """
+        prefix = normalize_key(query)
+        if not prefix:
+            return []
+
+        with self._lock:
+            i = bisect.bisect_left(self._keys, prefix)
+            end = min(len(self._keys), i + SCAN_LIMIT)
+            candidates = []
+            while i < end and self._keys[i].startswith(prefix):
+                candidates.append(self._places[i])
+                i += 1
+
+        candidates.sort(key=lambda p: (-p.learned, -p.population))
+        results, seen = [], set()
+        for place in candidates:
+            spot = (round(place.lat, SAME_PLACE_DECIMALS), round(place.lng, SAME_PLACE_DECIMALS))
+            if place.label in seen or spot in seen:
+                continue
+            seen.update((place.label, spot))
+            results.append(place)
+            if len(results) == limit:
+                break
+        return results
+
+    def load_gazetteer(self, path: str) -> int:
+        """
+        Load a CSV with columns city, region, region_name, country, lat, lng,
+        population. Each city is findable as "city region" and
+        "city region_name". Returns the number of cities loaded.
+        """
+        count = 0
+        with open(path, newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                city, region = row["city"], row["region"]
+                self.add_gazetteer(
+                    f"{city}, {region}, {row['country']}",
+                    row["lat"], row["lng"], int(row["population"] or 0),
+                    keys=[f"{city} {region}", f"{city} {row['region_name']}"],
+                )
+                count += 1
+        return count
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # ---- sorted-array maintenance (caller holds the lock) ----
+
+    def _insert(self, key: str, place: Place):
+        i = bisect.bisect_left(self._keys, key)
+        j = i
+        while j < len(self._keys) and self._keys[j] == key:
+            if self._places[j].label == place.label:
+                self._places[j] = place
+                return
+            j += 1
+        self._keys.insert(i, key)
+        self._places.insert(i, place)
+
+    def _remove(self, key: str, label: str):
+        i = bisect.bisect_left(self._keys, key)
+        while i < len(self._keys) and self._keys[i] == key:
+            if self._places[i].label == label:
+                if self._places[i].learned:
+                    del self._keys[i]
+                    del self._places[i]
+                return
+            i += 1
+
+
+_index: PlaceIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_place_index() -> PlaceIndex:
+    """The process-wide index, seeded from the gazetteer on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = PlaceIndex()
+                if SUGGEST_GAZETTEER:
+                    try:
+                        n = index.load_gazetteer(SUGGEST_GAZETTEER)
+                        logger.info("Loaded %d gazetteer places from %s", n, SUGGEST_GAZETTEER)
+                    except (OSError, KeyError, ValueError) as exc:
+                        logger.warning("Gazetteer %s not loaded: %s", SUGGEST_GAZETTEER, exc)
+                _index = index
+    return _index
@@ -0,0 +1,209 @@
+"""
+Persisted plans.
+
+Every computed plan (plan_trip(), the streamed variant and replans) is
+written to the TripPlan table under its plan_id, so a trip can be reopened
+later, or on another device, with one primary-key read. The row keeps the
+resolved stops and cycle hours, per-leg miles and minutes, the summary,
+the timeline (Timeline.to_bytes(): a few hundred bytes for a week-long
+trip) and the simulator checkpoints replan_trip() resumes from (about as
+much again). Leg geometry goes to RouteGeometry keyed by its digest, so the many
+plans over a busy lane reference one copy of each polyline.
+
+Rows are indexed by driver and by lane (pickup → final dropoff, see
+lane_key()) with the newest first, for recent_plans(). Writes are
+best-effort like the geocode DB tier: a failed write is logged and the plan
+is still returned. PLAN_STORE=off disables them.
+"""
+
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import NamedTuple
+
+from .geocoding import normalize_address
+from .routing import decode_polyline
+from .timeline import Timeline
+
+logger = logging.getLogger(__name__)
+
+# "db" stores plans in the default database; "off" keeps nothing
+PLAN_STORE = os.getenv("PLAN_STORE", "db").lower()
+
+RECENT_PLANS_LIMIT = 100
+
+
+class StoredPlan(NamedTuple):
+    plan_id: str
+    driver_id: str
+    names: list[str]
+    points: list[tuple[float, float]]
+    cycle_used_hours: float
+    legs: list[dict]          # distance_miles, duration_minutes, geometry, polyline
+    summary: dict
+    timeline: Timeline
+    checkpoints: bytes | None  # TripSimulator.checkpoint_bytes()
+    resumed_from: dict | None
+    created_at: datetime
+
+
+def lane_key(pickup: str, dropoff: str) -> str:
+    """Index key for a pickup → dropoff lane (normalized names, hashed)."""
+    lane = f"{normalize_address(pickup)}\n{normalize_address(dropoff)}"
+    return hashlib.blake2b(lane.encode(), digest_size=12).hexdigest()
+
+
+def geometry_digest(polyline: str) -> str:
+    return hashlib.blake2b(polyline.encode(), digest_size=16).hexdigest()
+
+
+def save_plan(
+    plan_id: str,
+    names: list[str],
+    points: list[tuple[float, float]],
+    legs: list[dict],
+    cycle_used_hours: float,
+    timeline: Timeline,
+    summary: dict,
+    driver_id: str | None = None,
+    resumed_from: dict | None = None,
+    checkpoints: bytes | None = None,
+) -> bool:
+    """
+    Store a plan; ``legs`` are routing legs (distance_miles,
+    duration_minutes, polyline) and ``checkpoints`` the simulator's
+    checkpoint_bytes(), without which the plan can't be re-planned once it
+    has left this worker's memory. An existing row for ``plan_id`` is kept
+    as it is — the same inputs plan to the same result. Returns whether
+    the plan is stored.
+    """
+    if PLAN_STORE != "db":
+        return False
+
+    geometries, route_legs = {}, []
+    for leg in legs:
+        digest = None
+        if leg["polyline"]:
+            digest = geometry_digest(leg["polyline"])
+            geometries[digest] = leg["polyline"]
+        route_legs.append({
+            "distance_miles": leg["distance_miles"],
+            "duration_minutes": leg["duration_minutes"],
+            "geometry": digest,
+        })
+
+    try:
+        from ..models import RouteGeometry, TripPlan
+
+        RouteGeometry.objects.bulk_create(
+            [RouteGeometry(digest=d, polyline=p) for d, p in geometries.items()],
+            ignore_conflicts=True,
+        )
+        TripPlan.objects.bulk_create([TripPlan(
+            plan_id=plan_id,
+            driver_id=driver_id or "",
+            lane=lane_key(names[1], names[-1]),
+            inputs={
+                "stops": [
+                    {"location": name, "lat": lat, "lng": lng}
+                    for name, (lat, lng) in zip(names, points)
+                ],
+                "cycle_used_hours": cycle_used_hours,
+                "start_time": timeline.start.isoformat(),
+            },
+            route={"legs": route_legs},
+            summary=summary,
+            timeline=timeline.to_bytes(),
+            checkpoints=checkpoints,
+            resumed_from=resumed_from,
+        )], ignore_conflicts=True)
+    except Exception as exc:  # DB not migrated / unavailable
+        logger.warning("Plan %s not stored: %s", plan_id, exc)
+        return False
+    return True
+
+
+def load_plan(plan_id: str) -> StoredPlan | None:
+    """The stored plan, or None if there is none (or the store is unavailable)."""
+    try:
+        from ..models import RouteGeometry, TripPlan
+
+        row = TripPlan.objects.filter(plan_id=plan_id).first()
+        if row is None:
+            return None
+        digests = {leg["geometry"] for leg in row.route["legs"] if leg["geometry"]}
+        polylines = dict(
+            RouteGeometry.objects.filter(digest__in=digests).values_list("digest", "polyline")
+        )
+    except Exception as exc:
+        logger.warning("Plan store unavailable: %s", exc)
+        return None
+
+    legs = []
+    for leg in row.route["legs"]:
+        polyline = polylines.get(leg["geometry"], "")
+        legs.append({
+            "distance_miles": leg["distance_miles"],
+            "duration_minutes": leg["duration_minutes"],
+            "geometry": decode_polyline(polyline) if polyline else [],
+            "polyline": polyline,
+        })
+
+    stops = row.inputs["stops"]
+    return StoredPlan(
+        plan_id=row.plan_id,
+        driver_id=row.driver_id,
+        names=[stop["location"] for stop in stops],
+        points=[(stop["lat"], stop["lng"]) for stop in stops],
+        cycle_used_hours=row.inputs["cycle_used_hours"],
+        legs=legs,
+        summary=row.summary,
+        timeline=Timeline.from_bytes(bytes(row.timeline)),
+        checkpoints=bytes(row.checkpoints) if row.checkpoints is not None else None,
+        resumed_from=row.resumed_from,
+        created_at=row.created_at,
+    )
+
+
+def plan_exists(plan_id: str) -> bool:
+    """Whether ``plan_id`` is stored (an index-only read, for If-None-Match)."""
+    try:
+        from ..models import TripPlan
+
+        return TripPlan.objects.filter(plan_id=plan_id).exists()
+    except Exception as exc:
+        logger.warning("Plan store unavailable: %s", exc)
+        return False
+
+
+def recent_plans(
+    driver_id: str | None = None,
+    lane: str | None = None,
+    limit: int = 20,
+) -> list[dict]:
+    """
+    Newest stored plans for a driver and/or a lane_key(), without their
+    timelines: plan_id, driver_id, stop names, totals and created_at.
+    """
+    from ..models import TripPlan
+
+    rows = TripPlan.objects.order_by("-created_at")
+    if driver_id is not None:
+        rows = rows.filter(driver_id=driver_id)
+    if lane is not None:
+        rows = rows.filter(lane=lane)
+    rows = rows.values("plan_id", "driver_id", "inputs", "summary", "created_at")
+
+    return [
+        {
+            "plan_id": row["plan_id"],
+            "driver_id": row["driver_id"],
+            "stops": [stop["location"] for stop in row["inputs"]["stops"]],
+            "start_time": row["inputs"]["start_time"],
+            "total_days": row["summary"].get("total_days"),
+            "total_driving_miles": row["summary"].get("total_driving_miles"),
+            "created_at": row["created_at"].isoformat(),
+        }
+        for row in rows[:min(limit, RECENT_PLANS_LIMIT)]
+    ]
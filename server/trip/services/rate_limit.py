@@ -0,0 +1,197 @@
+"""
+Rate limiting for upstream APIs.
+
+Nominatim allows 1 request/sec per client, across *all* of our endpoints
+and all gunicorn workers on the host, so geocoding and autocomplete share
+one token bucket whose state lives in a small file guarded by flock().
+No external service is needed.
+"""
+
+import asyncio
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from . import timing
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: per-process limiting only
+    fcntl = None
+
+# (tokens, updated_at). Tokens go negative while callers are queued for
+# future slots, so -tokens is the shared queue depth.
+_STATE = struct.Struct("<dd")
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a slot would not free up within the caller's max wait."""
+
+
+class TokenBucket:
+    """
+    Token bucket shared between processes through a state file.
+
+    Callers reserve a token under the lock (possibly driving the balance
+    negative, i.e. queueing) and sleep until their slot outside it. A caller
+    whose slot is further away than ``max_wait`` gets RateLimitExceeded
+    instead of tying up a worker.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        capacity: float = 1.0,
+        path: str | None = None,
+        max_wait: float = 5.0,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.path = path
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+        self._local = (capacity, time.time())   # used when there's no file
+
+        # per-process metrics
+        self.acquired = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def acquire(self, max_wait: float | None = None) -> float:
+        """
+        Block until a request may be sent. Returns seconds waited.
+
+        Raises:
+            RateLimitExceeded: If the wait would exceed ``max_wait``.
+        """
+        wait = self.reserve(max_wait)
+        if wait > 0:
+            timing.add("rate_limit_wait", wait * 1000)
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, max_wait: float | None = None) -> float:
+        """acquire() that yields to the event loop instead of sleeping."""
+        wait = self.reserve(max_wait)
+        if wait > 0:
+            timing.add("rate_limit_wait", wait * 1000)
+            await asyncio.sleep(wait)
+        return wait
+
+    def reserve(self, max_wait: float | None = None) -> float:
+        """
+        Claim the next slot without waiting for it. Returns the seconds
+        until the slot; the caller must not send before then.
+
+        Raises:
+            RateLimitExceeded: If the wait would exceed ``max_wait``.
+        """
+        limit = self.max_wait if max_wait is None else max_wait
+
+        with self._lock, self._shared_state() as state:
+            tokens, updated = state.read()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate) - 1
+            wait = -tokens / self.rate if tokens < 0 else 0.0
+
+            if wait > limit:
+                self.rejected += 1
+                state.write(tokens + 1, now)
+                raise RateLimitExceeded(
+                    f"Upstream rate limit: next slot in {wait:.1f}s (max wait {limit:.1f}s)"
+                )
+            state.write(tokens, now)
+
+        self.acquired += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        return wait
+
+    def queue_depth(self) -> int:
+        """Callers currently holding a future slot, across all processes."""
+        with self._lock, self._shared_state() as state:
+            tokens, updated = state.read()
+        tokens += max(0.0, time.time() - updated) * self.rate
+        return math.ceil(-tokens) if tokens < 0 else 0
+
+    def stats(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "queue_depth": self.queue_depth(),
+            "wait_seconds_total": round(self.wait_total, 3),
+            "wait_seconds_max": round(self.wait_max, 3),
+            "wait_seconds_avg": round(self.wait_total / self.acquired, 3) if self.acquired else 0.0,
+        }
+
+    # ---- state storage ----
+
+    def _shared_state(self):
+        if self.path and fcntl is not None:
+            return _FileState(self._file())
+        return _LocalState(self)
+
+    def _file(self) -> int:
+        # flock() locks belong to the open file description, so each process
+        # (e.g. every forked gunicorn worker) needs its own descriptor.
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+
+class _FileState:
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def __enter__(self):
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def read(self) -> tuple[float, float]:
+        raw = os.pread(self.fd, _STATE.size, 0)
+        if len(raw) < _STATE.size:
+            return (1.0, 0.0)
+        return _STATE.unpack(raw)
+
+    def write(self, tokens: float, updated: float):
+        os.pwrite(self.fd, _STATE.pack(tokens, updated), 0)
+
+
+class _LocalState:
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def read(self) -> tuple[float, float]:
+        return self.bucket._local
+
+    def write(self, tokens: float, updated: float):
+        self.bucket._local = (tokens, updated)
+
+
+# Shared by geocoding.py and autocomplete.py (and every worker on the host)
+nominatim_limiter = TokenBucket(
+    rate=float(os.getenv("NOMINATIM_RATE_PER_SEC", 1.0)),
+    capacity=1.0,
+    path=os.getenv(
+        "NOMINATIM_RATE_LIMIT_FILE",
+        os.path.join(tempfile.gettempdir(), "eld-nominatim.ratelimit"),
+    ),
+    max_wait=float(os.getenv("NOMINATIM_MAX_WAIT", 5.0)),
+)
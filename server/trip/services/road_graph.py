@@ -0,0 +1,679 @@
+"""
+Local truck routing over an OpenStreetMap extract.
+
+    graph = build_graph("region.osm")          # parse + contract (offline)
+    graph.save("region.chgraph")
+    graph = RoadGraph.load("region.chgraph")   # memory-mapped, instant
+    graph.directions([(lat, lng), (lat, lng)]) # ORS-shaped route dict
+
+Preprocessing keeps the ways a loaded truck may use (speeds per highway
+class capped by maxspeed; hgv/access=no, low maxheight and low maxweight
+excluded; one-way aware), restricts them to the largest strongly connected
+component, and builds contraction hierarchies: nodes are contracted from
+least to most important, adding shortcut arcs wherever that removes the
+only shortest path between two neighbours. A query is then a bidirectional
+Dijkstra that only climbs the hierarchy and settles a few hundred nodes,
+and shortcuts are unpacked back into road geometry.
+
+The saved format is a small header plus flat int64/int32/float32 arrays,
+read through mmap and memoryview casts: workers share one copy in the page
+cache and loading does no parsing. Nearest-node snapping uses a grid of
+cells stored sorted in the same file.
+"""
+
+import array
+import bisect
+import heapq
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import xml.etree.ElementTree as ET
+
+try:
+    import osmium
+except ImportError:  # pragma: no cover - optional: .pbf input
+    osmium = None
+
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEGREE_LAT = 111_320
+
+# Loaded-truck speeds (km/h) by highway class; unlisted classes are not routable
+HGV_SPEEDS_KMH = {
+    "motorway": 88, "motorway_link": 50,
+    "trunk": 80, "trunk_link": 45,
+    "primary": 70, "primary_link": 40,
+    "secondary": 60, "secondary_link": 35,
+    "tertiary": 50, "tertiary_link": 30,
+    "unclassified": 40, "residential": 25,
+    "service": 15, "living_street": 10,
+}
+HGV_MAX_SPEED_KMH = 90
+HGV_HEIGHT_M = 4.1          # 13'6"
+HGV_WEIGHT_T = 36.3         # 80,000 lb gross
+
+# access values that shut trucks out (checked most-specific key first)
+_ACCESS_KEYS = ("hgv", "motor_vehicle", "vehicle", "access")
+_NO_ACCESS = {"no", "private", "agricultural", "forestry"}
+
+# Witness searches during contraction give up after this many settled nodes
+WITNESS_SETTLE_LIMIT = 200
+
+# Snapping grid cell size (degrees) and how far a waypoint may be from a road
+SNAP_CELL_DEG = 0.01
+MAX_SNAP_M = float(os.getenv("LOCAL_ROUTING_MAX_SNAP_M", 5000))
+_GRID_COLS = 40_000         # > 360 / SNAP_CELL_DEG
+
+_MAGIC = b"ELDCH\x00\x01\x00"
+_HEADER = struct.Struct("<8sIIII")   # magic, nodes, arcs, up-out entries, up-in entries
+
+_INF = float("inf")
+
+
+class RoadGraphError(Exception):
+    """Raised for unreadable extracts and for points with no truck route."""
+
+
+# ---- OSM input ----
+
+def way_profile(tags: dict) -> tuple[float, bool, bool] | None:
+    """(speed km/h, forward allowed, backward allowed) for a truck, or None."""
+    speed = HGV_SPEEDS_KMH.get(tags.get("highway"))
+    if speed is None:
+        return None
+    for key in _ACCESS_KEYS:
+        if key in tags:
+            if tags[key] in _NO_ACCESS:
+                return None
+            break
+
+    height = _measure(tags.get("maxheight"), feet=True)
+    weight = _measure(tags.get("maxweight"))
+    if (height is not None and height < HGV_HEIGHT_M) or (weight is not None and weight < HGV_WEIGHT_T):
+        return None
+
+    limit = _measure(tags.get("maxspeed"), mph=True)
+    if limit is not None:
+        speed = min(speed, limit)
+    speed = min(speed, HGV_MAX_SPEED_KMH)
+
+    oneway = tags.get("oneway")
+    if oneway is None and (tags["highway"] in ("motorway", "motorway_link")
+                           or tags.get("junction") == "roundabout"):
+        oneway = "yes"
+    if oneway in ("yes", "true", "1"):
+        return speed, True, False
+    if oneway == "-1":
+        return speed, False, True
+    return speed, True, True
+
+
+_NUMBER = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(mph|ft|'|t|lbs)?")
+_FEET_INCHES = re.compile(r"^\s*(\d+)\s*'\s*(\d+)\s*\"?")
+
+
+def _measure(value: str | None, feet: bool = False, mph: bool = False) -> float | None:
+    """
+    A maxspeed (→ km/h), maxheight (→ m) or maxweight (→ t) tag value;
+    None if absent or not numeric (e.g. "none", "default").
+    """
+    if not value:
+        return None
+    if feet and (m := _FEET_INCHES.match(value)):
+        return (int(m.group(1)) * 12 + int(m.group(2))) * 0.0254
+    m = _NUMBER.match(value)
+    if m is None:
+        return None
+    number, unit = float(m.group(1)), m.group(2)
+    if unit == "mph" and mph:
+        return number * 1.609344
+    if unit in ("ft", "'"):
+        return number * 0.3048
+    if unit == "lbs":
+        return number * 0.000453592
+    return number
+
+
+def read_osm(path: str) -> list[tuple[tuple, list]]:
+    """
+    Routable ways from an .osm (XML) or .osm.pbf extract, as
+    (way_profile(), [(node_id, lat, lng), ...]) pairs.
+    """
+    if path.endswith(".pbf"):
+        return _read_pbf(path)
+    return _read_xml(path)
+
+
+def _read_xml(path: str) -> list[tuple[tuple, list]]:
+    # pass 1: ways (they come after the nodes, so coordinates need pass 2)
+    ways, needed = [], set()
+    try:
+        for _, elem in ET.iterparse(path):
+            if elem.tag == "way":
+                profile = way_profile({t.get("k"): t.get("v") for t in elem.iter("tag")})
+                refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+                if profile is not None and len(refs) >= 2:
+                    ways.append((profile, refs))
+                    needed.update(refs)
+                elem.clear()
+            elif elem.tag in ("node", "relation"):
+                elem.clear()
+
+        coords = {}
+        for _, elem in ET.iterparse(path):
+            if elem.tag == "node":
+                node_id = int(elem.get("id"))
+                if node_id in needed:
+                    coords[node_id] = (float(elem.get("lat")), float(elem.get("lon")))
+            if elem.tag in ("node", "way", "relation"):
+                elem.clear()
+    except (OSError, ET.ParseError) as exc:
+        raise RoadGraphError(f"Cannot read OSM extract {path}: {exc}") from exc
+
+    return [
+        (profile, [(ref, *coords[ref]) for ref in refs if ref in coords])
+        for profile, refs in ways
+    ]
+
+
+def _read_pbf(path: str) -> list[tuple[tuple, list]]:
+    if osmium is None:
+        raise RoadGraphError(
+            "Reading .pbf extracts needs the osmium package (pip install osmium); "
+            "or convert the extract to .osm XML."
+        )
+
+    class Handler(osmium.SimpleHandler):
+        def __init__(self):
+            super().__init__()
+            self.ways = []
+
+        def way(self, way):
+            profile = way_profile({tag.k: tag.v for tag in way.tags})
+            if profile is None:
+                return
+            nodes = [
+                (n.ref, n.location.lat, n.location.lon)
+                for n in way.nodes if n.location.valid()
+            ]
+            if len(nodes) >= 2:
+                self.ways.append((profile, nodes))
+
+    handler = Handler()
+    try:
+        handler.apply_file(path, locations=True)
+    except RuntimeError as exc:
+        raise RoadGraphError(f"Cannot read OSM extract {path}: {exc}") from exc
+    return handler.ways
+
+
+# ---- preprocessing ----
+
+def build_graph(path: str) -> "RoadGraph":
+    """Parse an extract and contract it into a queryable RoadGraph."""
+    index: dict[int, int] = {}
+    lats, lngs = [], []
+    edges: dict[tuple[int, int], tuple[int, float]] = {}    # (u, v) → (ms, meters)
+
+    for (speed_kmh, forward, backward), nodes in read_osm(path):
+        mps = speed_kmh / 3.6
+        prev = None
+        for node_id, lat, lng in nodes:
+            i = index.get(node_id)
+            if i is None:
+                i = index[node_id] = len(lats)
+                lats.append(lat)
+                lngs.append(lng)
+            if prev is not None and prev != i:
+                meters = haversine_m(lats[prev], lngs[prev], lat, lng)
+                ms = max(1, round(meters / mps * 1000))
+                if forward:
+                    _keep_faster(edges, prev, i, ms, meters)
+                if backward:
+                    _keep_faster(edges, i, prev, ms, meters)
+            prev = i
+
+    if not edges:
+        raise RoadGraphError(f"No truck-routable roads in {path}.")
+
+    keep = _largest_scc(len(lats), edges)
+    renumber = {old: new for new, old in enumerate(keep)}
+    lats = [lats[old] for old in keep]
+    lngs = [lngs[old] for old in keep]
+    edges = {
+        (renumber[u], renumber[v]): w
+        for (u, v), w in edges.items()
+        if u in renumber and v in renumber
+    }
+    return _contract(lats, lngs, edges)
+
+
+def _keep_faster(edges: dict, u: int, v: int, ms: int, meters: float):
+    current = edges.get((u, v))
+    if current is None or ms < current[0]:
+        edges[(u, v)] = (ms, meters)
+
+
+def _largest_scc(n: int, edges: dict) -> list[int]:
+    """Nodes of the largest strongly connected component (Kosaraju, iterative)."""
+    out = [[] for _ in range(n)]
+    inn = [[] for _ in range(n)]
+    for u, v in edges:
+        out[u].append(v)
+        inn[v].append(u)
+
+    # pass 1: nodes in order of DFS finishing time
+    seen = [False] * n
+    order = []
+    for root in range(n):
+        if seen[root]:
+            continue
+        seen[root] = True
+        stack = [(root, 0)]
+        while stack:
+            u, i = stack[-1]
+            if i < len(out[u]):
+                stack[-1] = (u, i + 1)
+                v = out[u][i]
+                if not seen[v]:
+                    seen[v] = True
+                    stack.append((v, 0))
+            else:
+                stack.pop()
+                order.append(u)
+
+    # pass 2: components on the reversed graph, latest finisher first
+    comp = [-1] * n
+    sizes = []
+    for root in reversed(order):
+        if comp[root] >= 0:
+            continue
+        c = len(sizes)
+        comp[root] = c
+        stack, size = [root], 0
+        while stack:
+            u = stack.pop()
+            size += 1
+            for v in inn[u]:
+                if comp[v] < 0:
+                    comp[v] = c
+                    stack.append(v)
+        sizes.append(size)
+
+    biggest = max(range(len(sizes)), key=sizes.__getitem__)
+    return [u for u in range(n) if comp[u] == biggest]
+
+
+def _contract(lats: list, lngs: list, edges: dict) -> "RoadGraph":
+    n = len(lats)
+    tail, head = array.array("i"), array.array("i")
+    time, length = array.array("i"), array.array("f")
+    child1, child2 = array.array("i"), array.array("i")
+
+    def new_arc(u, v, ms, meters, c1=-1, c2=-1) -> int:
+        tail.append(u)
+        head.append(v)
+        time.append(ms)
+        length.append(meters)
+        child1.append(c1)
+        child2.append(c2)
+        return len(tail) - 1
+
+    # adjacency among not-yet-contracted nodes: node → {neighbour: arc}
+    out = [{} for _ in range(n)]
+    inn = [{} for _ in range(n)]
+    for (u, v), (ms, meters) in edges.items():
+        arc = new_arc(u, v, ms, meters)
+        out[u][v] = arc
+        inn[v][u] = arc
+
+    def witness(source: int, skip: int, limit: int) -> dict:
+        dist = {source: 0}
+        heap = [(0, source)]
+        settled = 0
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist[x]:
+                continue
+            if d > limit or settled >= WITNESS_SETTLE_LIMIT:
+                break
+            settled += 1
+            for y, arc in out[x].items():
+                if y != skip:
+                    nd = d + time[arc]
+                    if nd < dist.get(y, _INF):
+                        dist[y] = nd
+                        heapq.heappush(heap, (nd, y))
+        return dist
+
+    def shortcuts(v: int, apply: bool) -> int:
+        """Shortcuts needed to contract v (added to the graph if ``apply``)."""
+        count = 0
+        outs = list(out[v].items())
+        for u, arc_in in list(inn[v].items()):
+            t_in = time[arc_in]
+            vias = [(w, arc_out, t_in + time[arc_out]) for w, arc_out in outs if w != u]
+            if not vias:
+                continue
+            dist = witness(u, v, max(via for _, _, via in vias))
+            for w, arc_out, via in vias:
+                if dist.get(w, _INF) <= via:
+                    continue
+                count += 1
+                if apply:
+                    existing = out[u].get(w)
+                    if existing is not None and time[existing] <= via:
+                        continue
+                    arc = new_arc(u, w, via, length[arc_in] + length[arc_out], arc_in, arc_out)
+                    out[u][w] = arc
+                    inn[w][u] = arc
+        return count
+
+    removed_neighbours = [0] * n
+
+    def priority(v: int) -> int:
+        # edge difference, plus a nudge to spread contraction evenly
+        return shortcuts(v, False) - len(inn[v]) - len(out[v]) + removed_neighbours[v]
+
+    rank = [-1] * n
+    heap = [(priority(v), v) for v in range(n)]
+    heapq.heapify(heap)
+    next_rank = 0
+    while heap:
+        _, v = heapq.heappop(heap)
+        if rank[v] >= 0:
+            continue
+        p = priority(v)                      # lazy update
+        if heap and p > heap[0][0]:
+            heapq.heappush(heap, (p, v))
+            continue
+
+        shortcuts(v, True)
+        rank[v] = next_rank
+        next_rank += 1
+        for u in inn[v]:
+            del out[u][v]
+            removed_neighbours[u] += 1
+        for w in out[v]:
+            del inn[w][v]
+            removed_neighbours[w] += 1
+        out[v] = inn[v] = None
+
+    # upward arcs: forward search leaves a node on out_arcs, backward on in_arcs
+    up_out = [[] for _ in range(n)]
+    up_in = [[] for _ in range(n)]
+    for arc in range(len(tail)):
+        u, v = tail[arc], head[arc]
+        if rank[v] > rank[u]:
+            up_out[u].append(arc)
+        else:
+            up_in[v].append(arc)
+
+    out_first, out_arcs = _csr(up_out)
+    in_first, in_arcs = _csr(up_in)
+
+    cells = sorted((_cell_key(lats[i], lngs[i]), i) for i in range(n))
+    return RoadGraph(
+        grid_keys=array.array("q", (key for key, _ in cells)),
+        lat=array.array("i", (round(x * 1e6) for x in lats)),
+        lng=array.array("i", (round(x * 1e6) for x in lngs)),
+        grid_nodes=array.array("i", (i for _, i in cells)),
+        tail=tail, head=head, time=time, child1=child1, child2=child2,
+        out_first=out_first, out_arcs=out_arcs,
+        in_first=in_first, in_arcs=in_arcs,
+        length=length,
+    )
+
+
+def _csr(lists: list[list[int]]) -> tuple[array.array, array.array]:
+    first = array.array("i", [0])
+    flat = array.array("i")
+    for items in lists:
+        flat.extend(items)
+        first.append(len(flat))
+    return first, flat
+
+
+def _cell_key(lat: float, lng: float) -> int:
+    row = int((lat + 90) // SNAP_CELL_DEG)
+    col = int((lng + 180) // SNAP_CELL_DEG)
+    return row * _GRID_COLS + col
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+# ---- the graph ----
+
+# (attribute, typecode) in file order; grid_keys first keeps the int64s aligned
+_LAYOUT = (
+    ("grid_keys", "q"),
+    ("lat", "i"), ("lng", "i"), ("grid_nodes", "i"),
+    ("tail", "i"), ("head", "i"), ("time", "i"), ("child1", "i"), ("child2", "i"),
+    ("out_first", "i"), ("out_arcs", "i"), ("in_first", "i"), ("in_arcs", "i"),
+    ("length", "f"),
+)
+
+
+class RoadGraph:
+    """
+    A contracted road graph. Arrays are array.array after build_graph() and
+    memoryviews over an mmap after load(); the query code reads both alike.
+
+    Nodes have lat / lng (micro-degrees). Arcs — original roads and
+    shortcuts — have tail, head, time (ms), length (m) and, for shortcuts,
+    the two arcs they replace (child1, child2; -1 for roads).
+    """
+
+    def __init__(self, **arrays):
+        for name, _ in _LAYOUT:
+            setattr(self, name, arrays[name])
+        self._mmap = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.lat)
+
+    @property
+    def arc_count(self) -> int:
+        return len(self.tail)
+
+    # ---- storage ----
+
+    def save(self, path: str):
+        if sys.byteorder != "little":  # pragma: no cover
+            raise RoadGraphError("Road graph files are little-endian only.")
+        with open(path, "wb") as fh:
+            fh.write(_HEADER.pack(
+                _MAGIC, self.node_count, self.arc_count, len(self.out_arcs), len(self.in_arcs)
+            ))
+            for name, _ in _LAYOUT:
+                fh.write(bytes(getattr(self, name)))
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        """Memory-map a file written by save()."""
+        if sys.byteorder != "little":  # pragma: no cover
+            raise RoadGraphError("Road graph files are little-endian only.")
+        try:
+            with open(path, "rb") as fh:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as exc:
+            raise RoadGraphError(f"Cannot open road graph {path}: {exc}") from exc
+
+        magic, nodes, arcs, n_out, n_in = _HEADER.unpack_from(mm)
+        if magic != _MAGIC:
+            raise RoadGraphError(f"{path} is not a road graph file (or an older format).")
+        sizes = {
+            "grid_keys": nodes, "lat": nodes, "lng": nodes, "grid_nodes": nodes,
+            "tail": arcs, "head": arcs, "time": arcs, "child1": arcs, "child2": arcs,
+            "out_first": nodes + 1, "out_arcs": n_out,
+            "in_first": nodes + 1, "in_arcs": n_in,
+            "length": arcs,
+        }
+        view, offset, arrays = memoryview(mm), _HEADER.size, {}
+        for name, code in _LAYOUT:
+            size = sizes[name] * struct.calcsize(code)
+            arrays[name] = view[offset:offset + size].cast(code)
+            offset += size
+
+        graph = cls(**arrays)
+        graph._mmap = mm
+        return graph
+
+    # ---- queries ----
+
+    def nearest(self, lat: float, lng: float) -> tuple[int, float]:
+        """Closest node to (lat, lng) within MAX_SNAP_M, and its distance in meters."""
+        row0 = int((lat + 90) // SNAP_CELL_DEG)
+        col0 = int((lng + 180) // SNAP_CELL_DEG)
+        cell_m = SNAP_CELL_DEG * METERS_PER_DEGREE_LAT * max(0.1, math.cos(math.radians(lat)))
+        best, best_m = -1, _INF
+
+        for ring in range(int(MAX_SNAP_M // cell_m) + 2):
+            if best_m <= (ring - 1) * cell_m:
+                break
+            for row in range(row0 - ring, row0 + ring + 1):
+                edge_row = row in (row0 - ring, row0 + ring)
+                step = 1 if edge_row else 2 * ring
+                for col in range(col0 - ring, col0 + ring + 1, step or 1):
+                    key = row * _GRID_COLS + col
+                    lo = bisect.bisect_left(self.grid_keys, key)
+                    hi = bisect.bisect_right(self.grid_keys, key, lo)
+                    for i in range(lo, hi):
+                        node = self.grid_nodes[i]
+                        d = haversine_m(lat, lng, self.lat[node] / 1e6, self.lng[node] / 1e6)
+                        if d < best_m:
+                            best, best_m = node, d
+
+        if best < 0 or best_m > MAX_SNAP_M:
+            raise RoadGraphError(
+                f"({lat:.5f}, {lng:.5f}) is not within {MAX_SNAP_M / 1000:g} km "
+                "of a road in the local road graph."
+            )
+        return best, best_m
+
+    def shortest_path(self, source: int, target: int) -> tuple[int, list[int]] | None:
+        """(travel ms, road arcs in order) from source to target, or None."""
+        if source == target:
+            return 0, []
+
+        time, head, tail = self.time, self.head, self.tail
+        out_first, out_arcs = self.out_first, self.out_arcs
+        in_first, in_arcs = self.in_first, self.in_arcs
+
+        dist_f, dist_b = {source: 0}, {target: 0}
+        pred_f, pred_b = {source: -1}, {target: -1}
+        heap_f, heap_b = [(0, source)], [(0, target)]
+        best, meet = _INF, -1
+
+        while heap_f or heap_b:
+            forward = bool(heap_f) and (not heap_b or heap_f[0][0] <= heap_b[0][0])
+            heap = heap_f if forward else heap_b
+            d, u = heapq.heappop(heap)
+            dist, other = (dist_f, dist_b) if forward else (dist_b, dist_f)
+            if d > dist[u]:
+                continue
+            if d >= best:
+                heap.clear()        # this direction can't improve on best
+                continue
+            if u in other and d + other[u] < best:
+                best, meet = d + other[u], u
+
+            if forward:
+                for i in range(out_first[u], out_first[u + 1]):
+                    arc = out_arcs[i]
+                    v, nd = head[arc], d + time[arc]
+                    if nd < dist_f.get(v, _INF):
+                        dist_f[v], pred_f[v] = nd, arc
+                        heapq.heappush(heap_f, (nd, v))
+            else:
+                for i in range(in_first[u], in_first[u + 1]):
+                    arc = in_arcs[i]
+                    v, nd = tail[arc], d + time[arc]
+                    if nd < dist_b.get(v, _INF):
+                        dist_b[v], pred_b[v] = nd, arc
+                        heapq.heappush(heap_b, (nd, v))
+
+        if meet < 0:
+            return None
+
+        arcs = []
+        node = meet
+        while pred_f[node] >= 0:
+            arcs.append(pred_f[node])
+            node = tail[pred_f[node]]
+        arcs.reverse()
+        node = meet
+        while pred_b[node] >= 0:
+            arcs.append(pred_b[node])
+            node = head[pred_b[node]]
+        return best, self._unpack(arcs)
+
+    def _unpack(self, arcs: list[int]) -> list[int]:
+        """Replace shortcuts by the road arcs they stand for."""
+        roads, stack = [], arcs[::-1]
+        while stack:
+            arc = stack.pop()
+            if self.child1[arc] < 0:
+                roads.append(arc)
+            else:
+                stack.append(self.child2[arc])
+                stack.append(self.child1[arc])
+        return roads
+
+    def directions(self, points: list[tuple[float, float]]) -> dict:
+        """
+        Route through (lat, lng) waypoints in order, shaped like an ORS
+        directions route: summary and per-leg segments (meters, seconds),
+        way_points indices and an encoded polyline.
+
+        Raises:
+            RoadGraphError: A waypoint is off the graph or unreachable.
+        """
+        from .routing import encode_polyline
+
+        geometry, way_points, segments = [], [], []
+        for a, b in zip(points, points[1:]):
+            source, _ = self.nearest(*a)
+            target, _ = self.nearest(*b)
+            found = self.shortest_path(source, target)
+            if found is None:
+                raise RoadGraphError("No truck route between the given locations.")
+            ms, roads = found
+
+            nodes = [source] + [self.head[arc] for arc in roads]
+            leg = [[self.lat[v] / 1e6, self.lng[v] / 1e6] for v in nodes]
+            if geometry:
+                leg = leg[1:]
+            else:
+                way_points.append(0)
+            geometry.extend(leg)
+            way_points.append(len(geometry) - 1)
+            segments.append({
+                "distance": sum(self.length[arc] for arc in roads),
+                "duration": ms / 1000,
+            })
+
+        return {
+            "summary": {
+                "distance": sum(s["distance"] for s in segments),
+                "duration": sum(s["duration"] for s in segments),
+            },
+            "segments": segments,
+            "way_points": way_points,
+            "geometry": encode_polyline(geometry),
+        }
+
+
+def load_graph(path: str) -> RoadGraph:
+    """A saved .chgraph file (memory-mapped), or an OSM extract built in memory."""
+    if path.endswith(".chgraph"):
+        return RoadGraph.load(path)
+    return build_graph(path)
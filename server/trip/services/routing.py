@@ -2,26 +2,83 @@
 Routing service using OpenRouteService (ORS).
 
 Calculates driving distance, duration, and road geometry between coordinates.
-Requires a free API key from openrouteservice.org.
+Requires a free API key from openrouteservice.org — or, with
+ROUTING_BACKEND=local, none at all: routes then come from a contracted
+OpenStreetMap extract on disk (see road_graph; LOCAL_ROUTING_GRAPH).
+
+Results are cached per lane: origin and destination are snapped to a grid
+(ROUTE_CACHE_GRID_METERS, ~100 m by default) so repeat lanes between the
+same yards and customers skip ORS entirely. Geometry is kept in the cache as
+the encoded polyline string ORS sends, not the decoded point list.
 """
 
+import abc
+import asyncio
+import bisect
 import logging
 import math
 import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import accumulate
+from typing import NamedTuple
 
+import httpx
 import requests
 from dotenv import load_dotenv
 
+from . import upstream
+from .aio import async_request
+from .cache import TTLCache
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional speedup
+    np = None
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-ORS_DIRECTIONS_URL = "https://api.openrouteservice.org/v2/directions/driving-hgv"
+ORS_DIRECTIONS_URL = os.getenv(
+    "ORS_DIRECTIONS_URL",
+    "https://api.openrouteservice.org/v2/directions/driving-hgv",
+)
 ORS_API_KEY = os.getenv("OPENROUTESERVICE_API_KEY", "")
+ORS_TIMEOUT = float(os.getenv("ORS_TIMEOUT", 30))
+
+# "ors" (default) or "local": an offline graph built by `manage.py build_road_graph`
+ROUTING_BACKEND = os.getenv("ROUTING_BACKEND", "ors").lower()
+LOCAL_ROUTING_GRAPH = os.getenv("LOCAL_ROUTING_GRAPH", "")
 
 # Conversion constants
 METERS_TO_MILES = 0.000621371
 SECONDS_TO_MINUTES = 1 / 60
+METERS_PER_DEGREE_LAT = 111_320
+EARTH_RADIUS_MILES = 3958.8
+WEB_MERCATOR_METERS_PER_PIXEL = 156_543.03   # 256-px tiles, zoom 0, equator
+
+# Douglas-Peucker spans shorter than this are scanned without NumPy
+SIMPLIFY_NUMPY_SPAN = 128
+
+# Route cache tuning
+ROUTE_CACHE_GRID_METERS = float(os.getenv("ROUTE_CACHE_GRID_METERS", 100))
+ROUTE_CACHE_TTL = int(os.getenv("ROUTE_CACHE_TTL", 7 * 24 * 3600))
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", 512))
+
+# value is (distance_miles, duration_minutes, encoded_geometry)
+_route_cache = TTLCache(maxsize=ROUTE_CACHE_SIZE, ttl=ROUTE_CACHE_TTL, name="route")
+
+# encoded polyline → RouteIndex (decoded points + cumulative mileage)
+_index_cache = TTLCache(maxsize=64, ttl=ROUTE_CACHE_TTL)
+
+# Road-vs-straight-line distance, learned per region from routed legs
+DETOUR_REGION_DEG = float(os.getenv("DETOUR_REGION_DEG", 5))
+DETOUR_MIN_SAMPLES = int(os.getenv("DETOUR_MIN_SAMPLES", 5))
+DETOUR_MAX_SAMPLES = 200            # lanes kept per region (newest win)
+DETOUR_MIN_MILES = 10               # shorter legs say more about streets than regions
+DETOUR_DEFAULT = (1.2, 1.1, 1.4)    # US road circuity: typical, low, high
 
 
 class RoutingError(Exception):
@@ -47,10 +104,308 @@ def get_route(
             - duration_minutes (float): Estimated driving time in minutes.
             - geometry (list[list[float]]): [[lat, lng], ...] coordinate pairs
               for drawing the route polyline.
+            - polyline (str): The same geometry, encoded (see route_index()).
+
+    Raises:
+        RoutingError: If the route cannot be calculated.
+    """
+    key = (snap_coord(origin), snap_coord(destination))
+    cached = _route_cache.get(key)
+    if cached is None:
+        cached = _parse_route(_request_directions([origin, destination]))
+        _cache_leg(key, cached)
+    else:
+        logger.info("Route cache hit for %s → %s", key[0], key[1])
+
+    return _leg_result(cached)
+
+
+async def get_route_async(
+    origin: tuple[float, float],
+    destination: tuple[float, float],
+) -> dict:
+    """get_route() over the pooled async HTTP client (same cache)."""
+    key = (snap_coord(origin), snap_coord(destination))
+    cached = _route_cache.get(key)
+    if cached is None:
+        cached = _parse_route(await _request_directions_async([origin, destination]))
+        _cache_leg(key, cached)
+
+    return _leg_result(cached)
+
+
+def snap_coord(
+    coord: tuple[float, float],
+    grid_meters: float | None = None,
+) -> tuple[float, float]:
+    """
+    Snap (lat, lng) to the route-cache grid.
+
+    The longitude step widens with latitude so cells stay roughly square.
+    """
+    grid = ROUTE_CACHE_GRID_METERS if grid_meters is None else grid_meters
+    if grid <= 0:
+        return (float(coord[0]), float(coord[1]))
+
+    lat_step = grid / METERS_PER_DEGREE_LAT
+    lat = round(round(coord[0] / lat_step) * lat_step, 6)
+    lng_step = lat_step / max(math.cos(math.radians(lat)), 0.01)
+    lng = round(round(coord[1] / lng_step) * lng_step, 6)
+    return (lat, lng)
+
+
+def route_cache_stats() -> dict:
+    return _route_cache.stats()
+
+
+def clear_route_cache():
+    _route_cache.clear()
+
+
+def get_multi_leg_route(waypoints: list[tuple[float, float]]) -> dict:
+    """
+    Route through an ordered list of waypoints with a single ORS request.
+
+    Each consecutive pair of waypoints is a leg. Legs already in the route
+    cache are reused; if any leg is missing, the whole route is requested
+    once and every leg is written back to the cache.
+
+    Args:
+        waypoints: Two or more (latitude, longitude) points, in visiting order.
+
+    Returns:
+        dict with keys:
+            - distance_miles / duration_minutes: Totals over all legs.
+            - geometry: Full [[lat, lng], ...] polyline.
+            - legs: One get_route()-style dict per leg.
 
     Raises:
         RoutingError: If the route cannot be calculated.
     """
+    if len(waypoints) < 2:
+        raise RoutingError("At least two waypoints are required for a route.")
+
+    keys, cached = _lookup_legs(waypoints)
+    if cached is None:
+        cached = _split_legs(_request_directions(waypoints), len(waypoints))
+        _store_legs(keys, cached)
+    else:
+        logger.info("Route cache hit for all %d legs", len(keys))
+
+    return _multi_leg_result(cached)
+
+
+async def get_multi_leg_route_async(waypoints: list[tuple[float, float]]) -> dict:
+    """get_multi_leg_route() over the pooled async HTTP client (same cache)."""
+    if len(waypoints) < 2:
+        raise RoutingError("At least two waypoints are required for a route.")
+
+    keys, cached = _lookup_legs(waypoints)
+    if cached is None:
+        route = await _request_directions_async(waypoints)
+        cached = _split_legs(route, len(waypoints))
+        _store_legs(keys, cached)
+
+    return _multi_leg_result(cached)
+
+
+def _lookup_legs(waypoints: list[tuple[float, float]]) -> tuple[list, list | None]:
+    """Cache keys per leg, plus the cached legs if *every* leg is cached."""
+    keys = [
+        (snap_coord(a), snap_coord(b))
+        for a, b in zip(waypoints, waypoints[1:])
+    ]
+    cached = [_route_cache.get(key) for key in keys]
+    if any(leg is None for leg in cached):
+        return keys, None
+    return keys, cached
+
+
+def _store_legs(keys: list, legs: list[tuple[float, float, str]]):
+    for key, leg in zip(keys, legs):
+        _cache_leg(key, leg)
+
+
+def _cache_leg(key: tuple, leg: tuple[float, float, str]):
+    _route_cache.set(key, leg)
+    _detour_model.observe(key[0], key[1], leg[0])
+
+
+class DetourFactor(NamedTuple):
+    """Road miles per straight-line mile for a lane, with its spread."""
+
+    factor: float       # median
+    low: float          # 10th percentile
+    high: float         # 90th percentile
+    samples: int        # routed legs behind it; 0 = built-in default
+    region: str         # "lat,lng" cell corner, "all" or "default"
+
+
+class DetourModel:
+    """
+    Ratios of routed to great-circle leg distance, per DETOUR_REGION_DEG
+    cell of the leg's midpoint (thread-safe). Regions with fewer than
+    DETOUR_MIN_SAMPLES lanes fall back to every lane seen, then to a
+    built-in US default.
+    """
+
+    def __init__(self, region_deg: float = DETOUR_REGION_DEG, max_samples: int = DETOUR_MAX_SAMPLES):
+        self.region_deg = region_deg
+        self.max_samples = max_samples
+        self._regions: dict[tuple[int, int], OrderedDict] = {}
+        self._all: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, origin: tuple[float, float], destination: tuple[float, float], road_miles: float):
+        straight = _haversine(origin, destination)
+        if straight < DETOUR_MIN_MILES or road_miles <= 0:
+            return
+        ratio = road_miles / straight
+        if not 1.0 <= ratio <= 3.0:         # ferries, snapping mishaps
+            return
+        lane = (tuple(origin), tuple(destination))
+        region = self._region(origin, destination)
+        with self._lock:
+            regional = self._regions.setdefault(region, OrderedDict())
+            for samples, limit in ((regional, self.max_samples), (self._all, 10 * self.max_samples)):
+                samples[lane] = ratio
+                samples.move_to_end(lane)
+                while len(samples) > limit:
+                    samples.popitem(last=False)
+
+    def factor(self, origin: tuple[float, float], destination: tuple[float, float]) -> DetourFactor:
+        region = self._region(origin, destination)
+        with self._lock:
+            local = list(self._regions.get(region, {}).values())
+            everywhere = list(self._all.values())
+
+        for ratios, name in (
+            (local, f"{region[0] * self.region_deg:g},{region[1] * self.region_deg:g}"),
+            (everywhere, "all"),
+        ):
+            if len(ratios) >= DETOUR_MIN_SAMPLES:
+                ratios.sort()
+                return DetourFactor(
+                    round(_percentile(ratios, 0.5), 3),
+                    round(_percentile(ratios, 0.1), 3),
+                    round(_percentile(ratios, 0.9), 3),
+                    len(ratios),
+                    name,
+                )
+        return DetourFactor(*DETOUR_DEFAULT, 0, "default")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"lanes": len(self._all), "regions": len(self._regions)}
+
+    def _region(self, origin, destination) -> tuple[int, int]:
+        lat = (origin[0] + destination[0]) / 2
+        lng = (origin[1] + destination[1]) / 2
+        return (math.floor(lat / self.region_deg), math.floor(lng / self.region_deg))
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    pos = q * (len(ordered) - 1)
+    i = int(pos)
+    if i + 1 >= len(ordered):
+        return ordered[-1]
+    return ordered[i] + (pos - i) * (ordered[i + 1] - ordered[i])
+
+
+_detour_model = DetourModel()
+
+
+def detour_factor(origin: tuple[float, float], destination: tuple[float, float]) -> DetourFactor:
+    """Learned road-detour factor for the lane origin → destination."""
+    return _detour_model.factor(origin, destination)
+
+
+def detour_stats() -> dict:
+    return _detour_model.stats()
+
+
+def _leg_result(leg: tuple[float, float, str]) -> dict:
+    distance_miles, duration_minutes, encoded = leg
+    return {
+        "distance_miles": distance_miles,
+        "duration_minutes": duration_minutes,
+        "geometry": decode_polyline(encoded) if encoded else [],
+        "polyline": encoded,
+    }
+
+
+def _multi_leg_result(cached: list[tuple[float, float, str]]) -> dict:
+    legs = [_leg_result(leg) for leg in cached]
+
+    geometry = []
+    for leg in legs:
+        # consecutive legs share their joining waypoint
+        geometry.extend(leg["geometry"][1:] if geometry else leg["geometry"])
+
+    return {
+        "distance_miles": round(sum(leg["distance_miles"] for leg in legs), 1),
+        "duration_minutes": round(sum(leg["duration_minutes"] for leg in legs), 1),
+        "geometry": geometry,
+        "legs": legs,
+    }
+
+
+def _parse_route(route: dict) -> tuple[float, float, str]:
+    """ORS route → (distance_miles, duration_minutes, encoded geometry)."""
+    summary = route["summary"]
+
+    # Distance in miles, duration in minutes
+    distance_miles = round(summary.get("distance", 0) * METERS_TO_MILES, 1)
+    duration_minutes = round(summary.get("duration", 0) * SECONDS_TO_MINUTES, 1)
+
+    # ORS returns an encoded polyline by default; keep it encoded
+    # until a caller actually needs the points.
+    geometry_encoded = route.get("geometry") or ""
+
+    logger.info(
+        "Route calculated: %.1f miles, %.1f minutes",
+        distance_miles,
+        duration_minutes,
+    )
+
+    return (distance_miles, duration_minutes, geometry_encoded)
+
+
+def _split_legs(route: dict, n_waypoints: int) -> list[tuple[float, float, str]]:
+    """
+    Split a multi-waypoint ORS route into per-leg tuples.
+
+    ORS returns one "segment" per leg and, in "way_points", the index of
+    each waypoint within the decoded geometry; slicing between consecutive
+    way_points gives each leg's polyline.
+    """
+    segments = route.get("segments") or []
+    way_points = route.get("way_points") or []
+
+    if len(segments) != n_waypoints - 1 or len(way_points) != n_waypoints:
+        raise RoutingError("Routing service returned an incomplete multi-stop route.")
+
+    geometry = decode_polyline(route.get("geometry") or "")
+
+    legs = []
+    for i, seg in enumerate(segments):
+        leg_geometry = geometry[way_points[i]:way_points[i + 1] + 1]
+        legs.append((
+            round(seg.get("distance", 0) * METERS_TO_MILES, 1),
+            round(seg.get("duration", 0) * SECONDS_TO_MINUTES, 1),
+            encode_polyline(leg_geometry),
+        ))
+
+    logger.info(
+        "Multi-stop route calculated: %d legs, %.1f miles",
+        len(legs),
+        sum(leg[0] for leg in legs),
+    )
+    return legs
+
+
+def _directions_request(points: list[tuple[float, float]]) -> tuple[dict, dict]:
+    """JSON body and headers for an ORS directions call."""
     if not ORS_API_KEY:
         raise RoutingError(
             "OpenRouteService API key not configured. "
@@ -59,10 +414,7 @@ def get_route(
 
     # ORS expects coordinates as [longitude, latitude]
     body = {
-        "coordinates": [
-            [origin[1], origin[0]],
-            [destination[1], destination[0]],
-        ],
+        "coordinates": [[p[1], p[0]] for p in points],
     }
 
     headers = {
@@ -70,65 +422,170 @@ def get_route(
         "Content-Type": "application/json; charset=utf-8",
         "Accept": "application/json, application/geo+json",
     }
+    return body, headers
 
-    try:
-        response = requests.post(
-            ORS_DIRECTIONS_URL,
-            json=body,
-            headers=headers,
-            timeout=30,
+
+def _first_route(data: dict) -> dict:
+    if "routes" not in data or not data["routes"]:
+        raise RoutingError(
+            "No route found between the given locations. "
+            "Please check your addresses."
         )
-        response.raise_for_status()
-        data = response.json()
+    return data["routes"][0]
+
+
+def _routing_error(code: int | None, exc: Exception) -> RoutingError:
+    msg = "Routing service error."
+    if code is not None:
+        if code == 401 or code == 403:
+            msg = "Invalid ORS API Key or unauthorized."
+        elif code == 429:
+            msg = "Routing service quota exceeded."
+        logger.error("Routing request failed (%s): %s", code, exc)
+    else:
+        logger.error("Routing request failed: %s", exc)
+
+    return RoutingError(f"{msg} Please try again later.")
+
+
+class RoutingBackend(abc.ABC):
+    """
+    Where routes come from. directions() takes (lat, lng) points and returns
+    one ORS-shaped route dict — summary and per-leg segments in meters and
+    seconds, way_points indices and an encoded polyline — so parsing,
+    leg splitting and caching are the same for every backend. A backend
+    without directions() can't be instantiated.
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def directions(self, points: list[tuple[float, float]]) -> dict:
+        """The ORS-shaped route through ``points``."""
+
+    async def directions_async(self, points: list[tuple[float, float]]) -> dict:
+        return await asyncio.to_thread(self.directions, points)
+
+
+class ORSBackend(RoutingBackend):
+    name = "ors"
+
+    def directions(self, points):
+        return _ors_directions(points)
+
+    async def directions_async(self, points):
+        return await _ors_directions_async(points)
+
+
+class LocalBackend(RoutingBackend):
+    """Truck routes from a contracted OSM graph, loaded once per process."""
+
+    name = "local"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._graph = None
+        self._lock = threading.Lock()
+
+    def graph(self):
+        from .road_graph import RoadGraphError, load_graph
 
-        if "routes" not in data or not data["routes"]:
+        if self._graph is None:
+            with self._lock:
+                if self._graph is None:
+                    if not self.path:
+                        raise RoutingError(
+                            "Local routing graph not configured. "
+                            "Set LOCAL_ROUTING_GRAPH in your .env file."
+                        )
+                    try:
+                        self._graph = load_graph(self.path)
+                    except RoadGraphError as exc:
+                        raise RoutingError(str(exc)) from exc
+        return self._graph
+
+    def directions(self, points):
+        from .road_graph import RoadGraphError
+
+        graph = self.graph()
+        t0 = time.perf_counter()
+        try:
+            return graph.directions(points)
+        except RoadGraphError as exc:
+            raise RoutingError(str(exc)) from exc
+        finally:
+            upstream.observe("local", time.perf_counter() - t0)
+
+
+_BACKENDS = {
+    "ors": ORSBackend,
+    "local": lambda: LocalBackend(LOCAL_ROUTING_GRAPH),
+}
+_backend: RoutingBackend | None = None
+
+
+def get_backend() -> RoutingBackend:
+    """The configured routing backend (ROUTING_BACKEND), created on first use."""
+    global _backend
+    if _backend is None:
+        factory = _BACKENDS.get(ROUTING_BACKEND)
+        if factory is None:
             raise RoutingError(
-                "No route found between the given locations. "
-                "Please check your addresses."
+                f"Unknown ROUTING_BACKEND {ROUTING_BACKEND!r}; "
+                f"expected one of {', '.join(_BACKENDS)}."
             )
+        _backend = factory()
+    return _backend
 
-        route = data["routes"][0]
-        summary = route["summary"]
 
-        # Distance in miles, duration in minutes
-        distance_miles = round(summary["distance"] * METERS_TO_MILES, 1)
-        duration_minutes = round(summary["duration"] * SECONDS_TO_MINUTES, 1)
+def _request_directions(points: list[tuple[float, float]]) -> dict:
+    """First route through ``points`` from the configured backend."""
+    return get_backend().directions(points)
 
-        # Decode geometry — ORS returns encoded polyline by default
-        # We need to decode it to get [[lat, lng], ...] pairs
-        geometry_encoded = route.get("geometry")
-        if geometry_encoded:
-            geometry = decode_polyline(geometry_encoded)
-        else:
-            geometry = []
 
-        logger.info(
-            "Route calculated: %.1f miles, %.1f minutes, %d geometry points",
-            distance_miles,
-            duration_minutes,
-            len(geometry),
-        )
+async def _request_directions_async(points: list[tuple[float, float]]) -> dict:
+    return await get_backend().directions_async(points)
 
-        return {
-            "distance_miles": distance_miles,
-            "duration_minutes": duration_minutes,
-            "geometry": geometry,
-        }
 
+def _ors_directions(points: list[tuple[float, float]]) -> dict:
+    """POST (lat, lng) points to ORS directions and return the first route."""
+    body, headers = _directions_request(points)
+
+    try:
+        response = upstream.request(
+            "ors", "POST",
+            ORS_DIRECTIONS_URL,
+            json=body,
+            headers=headers,
+            timeout=ORS_TIMEOUT,
+        )
+        response.raise_for_status()
+        return _first_route(response.json())
 
     except requests.RequestException as exc:
-        msg = "Routing service error."
-        if exc.response is not None:
-            code = exc.response.status_code
-            if code == 401 or code == 403:
-                msg = "Invalid ORS API Key or unauthorized."
-            elif code == 429:
-                msg = "Routing service quota exceeded."
-            logger.error("Routing request failed (%s): %s", code, exc)
-        else:
-            logger.error("Routing request failed: %s", exc)
-            
-        raise RoutingError(f"{msg} Please try again later.") from exc
+        code = exc.response.status_code if exc.response is not None else None
+        raise _routing_error(code, exc) from exc
+
+
+async def _ors_directions_async(points: list[tuple[float, float]]) -> dict:
+    """Async _ors_directions() over the shared httpx client."""
+    body, headers = _directions_request(points)
+
+    try:
+        response = await async_request(
+            "ors", "POST",
+            ORS_DIRECTIONS_URL,
+            json=body,
+            headers=headers,
+            timeout=ORS_TIMEOUT,
+        )
+        response.raise_for_status()
+        return _first_route(response.json())
+
+    except httpx.HTTPStatusError as exc:
+        raise _routing_error(exc.response.status_code, exc) from exc
+    except httpx.HTTPError as exc:
+        raise _routing_error(None, exc) from exc
 
 
 def decode_polyline(encoded: str) -> list[list[float]]:
@@ -144,6 +601,9 @@ def decode_polyline(encoded: str) -> list[list[float]]:
     Returns:
         List of [latitude, longitude] pairs.
     """
+    if np is not None:
+        return decode_polyline_array(encoded).tolist()
+
     decoded = []
     index = 0
     lat = 0
@@ -179,8 +639,217 @@ def decode_polyline(encoded: str) -> list[list[float]]:
     return decoded
 
 
+def decode_polyline_array(encoded: str):
+    """
+    Vectorized decode_polyline(): returns an (n, 2) float64 array of
+    [lat, lng] rows, or a list of pairs when NumPy is unavailable.
+
+    Every character carries 5 payload bits; characters below 0x20 (after the
+    -63 offset) end a value. Values are rebuilt with one shift + reduceat,
+    zigzag-decoded, then turned back into absolute coordinates by cumsum.
+    """
+    if np is None:
+        return decode_polyline(encoded)
+    if not encoded:
+        return np.empty((0, 2))
+
+    chunks = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    is_last = chunks < 0x20
+    ends = np.flatnonzero(is_last)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+
+    # bit offset of each chunk within its value
+    shift = 5 * (np.arange(len(chunks)) - np.repeat(starts, ends - starts + 1))
+    values = np.add.reduceat((chunks & 0x1F) << shift, starts)
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+
+    coords = np.cumsum(deltas.reshape(-1, 2), axis=0)
+    return coords / 1e5
+
+
+def encode_polyline(points: list[list[float]]) -> str:
+    """
+    Encode [lat, lng] pairs as a Google polyline string (precision 5).
+
+    Inverse of decode_polyline().
+    """
+    out = []
+    prev_lat = prev_lng = 0
+
+    for lat, lng in points:
+        ilat = round(lat * 1e5)
+        ilng = round(lng * 1e5)
+        for delta in (ilat - prev_lat, ilng - prev_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                out.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            out.append(chr(value + 63))
+        prev_lat, prev_lng = ilat, ilng
+
+    return "".join(out)
+
+
+def zoom_tolerance_meters(zoom: int, lat: float = 0.0, pixels: float = 1.0) -> float:
+    """Ground distance covered by ``pixels`` web-map pixels at ``zoom`` and ``lat``."""
+    return pixels * WEB_MERCATOR_METERS_PER_PIXEL * math.cos(math.radians(lat)) / 2 ** zoom
+
+
+def simplify_polyline(points: list[list[float]], tolerance_m: float) -> list[list[float]]:
+    """
+    Douglas–Peucker: drop [lat, lng] points closer than ``tolerance_m`` to
+    the line through their kept neighbours. First and last points are always
+    kept. Distances use a flat projection around the route's mid latitude,
+    which is plenty accurate at map-pixel tolerances.
+    """
+    n = len(points)
+    if n < 3 or tolerance_m <= 0:
+        return points
+
+    kx = METERS_PER_DEGREE_LAT * math.cos(math.radians(points[n // 2][0]))
+    xs = [p[1] * kx for p in points]
+    ys = [p[0] * METERS_PER_DEGREE_LAT for p in points]
+    # NumPy pays off on long spans; short ones are cheaper in plain Python
+    xa, ya = (np.array(xs), np.array(ys)) if np is not None else (None, None)
+
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    limit = tolerance_m * tolerance_m
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        if xa is not None and last - first > SIMPLIFY_NUMPY_SPAN:
+            i, d2 = _farthest_np(xa, ya, first, last)
+        else:
+            i, d2 = _farthest_py(xs, ys, first, last)
+        if d2 > limit:
+            keep[i] = True
+            stack.append((first, i))
+            stack.append((i, last))
+
+    return [p for p, k in zip(points, keep) if k]
+
+
+def _farthest_np(xs, ys, first: int, last: int) -> tuple[int, float]:
+    """Index and squared distance of the point farthest from segment first–last."""
+    x0, y0 = xs[first], ys[first]
+    dx, dy = xs[last] - x0, ys[last] - y0
+    px, py = xs[first + 1:last] - x0, ys[first + 1:last] - y0
+    seg2 = dx * dx + dy * dy
+    if seg2 > 0:
+        t = np.clip((px * dx + py * dy) / seg2, 0.0, 1.0)
+        px, py = px - t * dx, py - t * dy
+    d2 = px * px + py * py
+    j = int(d2.argmax())
+    return first + 1 + j, float(d2[j])
+
+
+def _farthest_py(xs, ys, first: int, last: int) -> tuple[int, float]:
+    x0, y0 = xs[first], ys[first]
+    dx, dy = xs[last] - x0, ys[last] - y0
+    seg2 = dx * dx + dy * dy
+    best, best_d2 = first + 1, -1.0
+    for i in range(first + 1, last):
+        px, py = xs[i] - x0, ys[i] - y0
+        if seg2 > 0:
+            t = min(1.0, max(0.0, (px * dx + py * dy) / seg2))
+            px, py = px - t * dx, py - t * dy
+        d2 = px * px + py * py
+        if d2 > best_d2:
+            best, best_d2 = i, d2
+    return best, best_d2
+
+
+class RouteIndex:
+    """
+    Route geometry with a precomputed cumulative-mileage array.
+
+    Built once per route (see route_index()), after which any point along
+    the road can be located by mileage with a binary search instead of
+    re-measuring every segment.
+    """
+
+    __slots__ = ("lats", "lngs", "cumulative", "total_miles", "_arrays")
+
+    def __init__(self, geometry):
+        if np is not None:
+            pts = np.asarray(geometry, dtype=np.float64).reshape(-1, 2)
+            lats, lngs = pts[:, 0], pts[:, 1]
+            cumulative = np.zeros(len(pts))
+            if len(pts) > 1:
+                np.cumsum(_haversine_array(lats[:-1], lngs[:-1], lats[1:], lngs[1:]), out=cumulative[1:])
+            self._arrays = (lats, lngs, cumulative)
+            self.lats, self.lngs = lats.tolist(), lngs.tolist()
+            self.cumulative = cumulative.tolist()
+        else:
+            self._arrays = None
+            self.lats = [p[0] for p in geometry]
+            self.lngs = [p[1] for p in geometry]
+            self.cumulative = [0.0] + list(accumulate(
+                _haversine(geometry[i - 1], geometry[i]) for i in range(1, len(geometry))
+            ))
+        if not self.lats:
+            raise ValueError("Geometry is empty")
+        self.total_miles = self.cumulative[-1]
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def point_at_distance(self, miles: float) -> list[float]:
+        """[lat, lng] at ``miles`` along the route (clamped to its ends)."""
+        cum = self.cumulative
+        if miles <= 0:
+            return [self.lats[0], self.lngs[0]]
+        if miles >= self.total_miles:
+            return [self.lats[-1], self.lngs[-1]]
+
+        # first vertex at or beyond the target; interpolate on the segment before it
+        j = bisect.bisect_left(cum, miles)
+        seg = cum[j] - cum[j - 1]
+        f = (miles - cum[j - 1]) / seg if seg > 0 else 0
+        lat0, lng0 = self.lats[j - 1], self.lngs[j - 1]
+        return [
+            lat0 + f * (self.lats[j] - lat0),
+            lng0 + f * (self.lngs[j] - lng0),
+        ]
+
+    def point_at_fraction(self, fraction: float) -> list[float]:
+        return self.point_at_distance(max(0.0, min(1.0, fraction)) * self.total_miles)
+
+    def points_at_distances(self, miles) -> list[list[float]]:
+        """point_at_distance() for many mileages in one vectorized pass."""
+        if self._arrays is None:
+            return [self.point_at_distance(m) for m in miles]
+
+        lats, lngs, cum = self._arrays
+        target = np.clip(np.asarray(miles, dtype=np.float64), 0.0, self.total_miles)
+        if len(cum) == 1:
+            return np.column_stack([np.full_like(target, lats[0]), np.full_like(target, lngs[0])]).tolist()
+
+        j = np.clip(np.searchsorted(cum, target, side="left"), 1, len(cum) - 1)
+        seg = cum[j] - cum[j - 1]
+        f = np.divide(target - cum[j - 1], seg, out=np.zeros_like(target), where=seg > 0)
+        return np.column_stack([
+            lats[j - 1] + f * (lats[j] - lats[j - 1]),
+            lngs[j - 1] + f * (lngs[j] - lngs[j - 1]),
+        ]).tolist()
+
+
+def route_index(encoded: str) -> RouteIndex:
+    """Decoded RouteIndex for an encoded polyline, cached per route."""
+    index = _index_cache.get(encoded)
+    if index is None:
+        index = RouteIndex(decode_polyline_array(encoded))
+        _index_cache.set(encoded, index)
+    return index
+
+
 def get_intermediate_point(
-    geometry: list[list[float]],
+    geometry,
     fraction: float,
 ) -> list[float]:
     """
@@ -189,46 +858,28 @@ def get_intermediate_point(
     Useful for placing fuel stop markers at approximate mileage points.
 
     Args:
-        geometry: List of [lat, lng] coordinate pairs from get_route().
+        geometry: List of [lat, lng] coordinate pairs from get_route(), or a
+                  RouteIndex (O(log n) per call — use one when placing many
+                  points on the same route).
         fraction: A value between 0.0 and 1.0 representing the position
                   along the route.
 
     Returns:
         [latitude, longitude] at the given fraction.
     """
-    if not geometry:
+    if isinstance(geometry, RouteIndex):
+        return geometry.point_at_fraction(fraction)
+    if not len(geometry):
         raise ValueError("Geometry is empty")
 
     fraction = max(0.0, min(1.0, fraction))
 
     if fraction == 0.0:
-        return geometry[0]
+        return list(geometry[0])
     if fraction == 1.0:
-        return geometry[-1]
-
-    # Calculate cumulative distances between consecutive points
-    total_distance = 0.0
-    segment_distances = []
-
-    for i in range(1, len(geometry)):
-        d = _haversine(geometry[i - 1], geometry[i])
-        segment_distances.append(d)
-        total_distance += d
-
-    target_distance = total_distance * fraction
-    accumulated = 0.0
+        return list(geometry[-1])
 
-    for i, seg_dist in enumerate(segment_distances):
-        if accumulated + seg_dist >= target_distance:
-            # Interpolate within this segment
-            remaining = target_distance - accumulated
-            seg_fraction = remaining / seg_dist if seg_dist > 0 else 0
-            lat = geometry[i][0] + seg_fraction * (geometry[i + 1][0] - geometry[i][0])
-            lng = geometry[i][1] + seg_fraction * (geometry[i + 1][1] - geometry[i][1])
-            return [lat, lng]
-        accumulated += seg_dist
-
-    return geometry[-1]
+    return RouteIndex(geometry).point_at_fraction(fraction)
 
 
 def _haversine(coord1: list[float], coord2: list[float]) -> float:
@@ -242,7 +893,7 @@ def _haversine(coord1: list[float], coord2: list[float]) -> float:
     Returns:
         Distance in miles.
     """
-    R = 3958.8  # Earth's radius in miles
+    R = EARTH_RADIUS_MILES
 
     lat1 = math.radians(coord1[0])
     lat2 = math.radians(coord2[0])
@@ -256,3 +907,13 @@ def _haversine(coord1: list[float], coord2: list[float]) -> float:
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
     return R * c
+
+
+def _haversine_array(lat1, lng1, lat2, lng2):
+    """Vectorized _haversine() over coordinate arrays (degrees → miles)."""
+    lat1, lng1, lat2, lng2 = (np.radians(a) for a in (lat1, lng1, lat2, lng2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return EARTH_RADIUS_MILES * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
@@ -0,0 +1,197 @@
+"""
+Compact, array-backed HOS timeline.
+
+The simulator appends events as integer minute offsets from the trip start,
+one-byte status codes and interned location / note ids. Dicts with ISO
+timestamps are only built when a caller asks for them (API serialization),
+so the simulator → log builder → stop markers path never formats or parses
+a timestamp. to_bytes() / from_bytes() store the columns as they are, for
+persisted plans.
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta
+
+from .constants import DRIVING, OFF_DUTY, ON_DUTY_NOT_DRIVING, SLEEPER_BERTH
+
+STATUSES = (OFF_DUTY, SLEEPER_BERTH, DRIVING, ON_DUTY_NOT_DRIVING)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Column → fixed-size typecode used by to_bytes() ("l" / "L" vary by platform)
+_PACKED_COLUMNS = (
+    ("offsets", "q"), ("durations", "q"), ("statuses", "B"), ("locations", "I"),
+    ("lats", "d"), ("lngs", "d"), ("notes", "I"), ("days", "I"),
+    ("legs", "q"), ("progress", "d"),
+)
+
+
+class Timeline:
+    """Column-oriented event store. Iterating yields event dicts."""
+
+    __slots__ = (
+        "start", "offsets", "durations", "statuses", "locations",
+        "lats", "lngs", "notes", "days", "legs", "progress",
+        "_strings", "_string_ids",
+    )
+
+    def __init__(self, start: datetime):
+        self.start = start
+        self.offsets = array("l")      # minutes from start
+        self.durations = array("l")    # minutes
+        self.statuses = array("B")     # index into STATUSES
+        self.locations = array("L")    # id into _strings
+        self.lats = array("d")
+        self.lngs = array("d")
+        self.notes = array("L")        # id into _strings
+        self.days = array("L")         # trip day number (1-based)
+        self.legs = array("l")         # route index the event lies on, -1 = none
+        self.progress = array("d")     # fraction of that route covered
+        self._strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+
+    def append(
+        self, status: str, offset: int, duration: int,
+        location: str, lat: float, lng: float, note: str, day: int,
+        leg: int = -1, progress: float = 0.0,
+    ):
+        self.offsets.append(offset)
+        self.durations.append(duration)
+        self.statuses.append(STATUS_CODES[status])
+        self.locations.append(self.intern(location))
+        self.lats.append(lat)
+        self.lngs.append(lng)
+        self.notes.append(self.intern(note))
+        self.days.append(day)
+        self.legs.append(leg)
+        self.progress.append(progress)
+
+    def intern(self, value: str) -> int:
+        sid = self._string_ids.get(value)
+        if sid is None:
+            sid = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return sid
+
+    # ---- column accessors ----
+
+    def status(self, i: int) -> str:
+        return STATUSES[self.statuses[i]]
+
+    def location(self, i: int) -> str:
+        return self._strings[self.locations[i]]
+
+    def note(self, i: int) -> str:
+        return self._strings[self.notes[i]]
+
+    def time_at(self, offset: int) -> datetime:
+        return self.start + timedelta(minutes=offset)
+
+    @property
+    def minute_aligned(self) -> bool:
+        """True when every event boundary falls on a whole minute."""
+        return self.start.second == 0 and self.start.microsecond == 0
+
+    def place_on_routes(self, routes, start: int = 0):
+        """
+        Overwrite lat/lng of every event from ``start`` on that was recorded
+        against a route with the point at its progress along that route's
+        geometry. ``routes`` maps leg number → RouteIndex.
+        """
+        by_leg: dict[int, list[int]] = {}
+        for i in range(start, len(self.legs)):
+            leg = self.legs[i]
+            if leg >= 0:
+                by_leg.setdefault(leg, []).append(i)
+
+        for leg, idx in by_leg.items():
+            route = routes[leg]
+            miles = [min(self.progress[i], 1.0) * route.total_miles for i in idx]
+            for i, (lat, lng) in zip(idx, route.points_at_distances(miles)):
+                self.lats[i] = lat
+                self.lngs[i] = lng
+
+    def truncated(self, n: int) -> "Timeline":
+        """A copy holding the first ``n`` events."""
+        copy = Timeline(self.start)
+        for name in ("offsets", "durations", "statuses", "locations", "lats",
+                     "lngs", "notes", "days", "legs", "progress"):
+            setattr(copy, name, getattr(self, name)[:n])
+        copy._strings = list(self._strings)
+        copy._string_ids = dict(self._string_ids)
+        return copy
+
+    # ---- storage ----
+
+    def to_bytes(self) -> bytes:
+        """
+        zlib-compressed columns plus a small JSON header (start, strings,
+        byte order); the inverse of from_bytes().
+        """
+        header = json.dumps({
+            "start": self.start.isoformat(),
+            "count": len(self.offsets),
+            "strings": self._strings,
+            "byteorder": sys.byteorder,
+        }).encode()
+        columns = b"".join(
+            array(code, getattr(self, name)).tobytes() for name, code in _PACKED_COLUMNS
+        )
+        return zlib.compress(struct.pack("<I", len(header)) + header + columns)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Timeline":
+        raw = zlib.decompress(data)
+        (size,) = struct.unpack_from("<I", raw)
+        header = json.loads(raw[4:4 + size])
+        timeline = cls(datetime.fromisoformat(header["start"]))
+        timeline._strings = header["strings"]
+        timeline._string_ids = {value: i for i, value in enumerate(timeline._strings)}
+
+        pos, count = 4 + size, header["count"]
+        for name, code in _PACKED_COLUMNS:
+            packed = array(code)
+            end = pos + count * packed.itemsize
+            packed.frombytes(raw[pos:end])
+            if header["byteorder"] != sys.byteorder:
+                packed.byteswap()
+            setattr(timeline, name, array(getattr(timeline, name).typecode, packed))
+            pos = end
+        return timeline
+
+    # ---- materialization ----
+
+    def event(self, i: int) -> dict:
+        offset = self.offsets[i]
+        duration = self.durations[i]
+        return {
+            "status": STATUSES[self.statuses[i]],
+            "start_time": self.time_at(offset).isoformat(),
+            "end_time": self.time_at(offset + duration).isoformat(),
+            "duration_mins": duration,
+            "location": self._strings[self.locations[i]],
+            "lat": self.lats[i],
+            "lng": self.lngs[i],
+            "note": self._strings[self.notes[i]],
+            "day": self.days[i],
+        }
+
+    def to_dicts(self) -> list[dict]:
+        return [self.event(i) for i in range(len(self.offsets))]
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __iter__(self):
+        for i in range(len(self.offsets)):
+            yield self.event(i)
+
+    def __getitem__(self, i: int) -> dict:
+        if i < 0:
+            i += len(self.offsets)
+        if not 0 <= i < len(self.offsets):
+            raise IndexError("timeline index out of range")
+        return self.event(i)
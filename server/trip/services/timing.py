@@ -0,0 +1,190 @@
+"""
+Lightweight per-stage wall-clock timing for the planning pipeline.
+
+Each API request gets a StageTimer (see trip.middleware.ServerTimingMiddleware)
+held in a context variable, so code anywhere below the view — geocoding,
+upstream calls, caches, the JSON renderer — can add to it with measure() and
+count() without it being passed around. The finished timer becomes the
+request's Server-Timing header and feeds the process-wide stage histograms
+behind /api/metrics/.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+STAGE_BUCKETS_MS = (1, 5, 10) + LATENCY_BUCKETS_MS      # stages can be sub-ms
+
+
+class StageTimer:
+    """Accumulates elapsed milliseconds per named stage, plus event counts."""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._stages: dict[str, float] = {}
+        self._counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000)
+
+    def add(self, name: str, ms: float):
+        with self._lock:
+            self._stages[name] = self._stages.get(name, 0.0) + ms
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + n
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def stages(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._stages)
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def as_dict(self) -> dict[str, float]:
+        """Stage durations in ms, plus the total since the timer was created."""
+        out = {f"{name}_ms": round(ms, 1) for name, ms in self.stages().items()}
+        out["total_ms"] = round(self.elapsed_ms(), 1)
+        return out
+
+    def server_timing(self) -> str:
+        """
+        A Server-Timing header value: one metric per stage with its
+        duration, one per counter with the count as its description.
+        """
+        metrics = [f"{name};dur={ms:.1f}" for name, ms in self.stages().items()]
+        metrics += [f'{name};desc="{n}"' for name, n in self.counts().items()]
+        metrics.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(metrics)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (thread-safe)."""
+
+    def __init__(self, buckets_ms: tuple = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)   # last slot is +Inf
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, error: bool = False):
+        ms = seconds * 1000
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+            if error:
+                self.errors += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound (ms) of the bucket holding the q-th quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets_ms, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, seen = {}, 0
+            for bound, n in zip(self.buckets_ms, self.counts):
+                seen += n
+                cumulative[f"le_{bound}"] = seen
+            cumulative["le_inf"] = self.count
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "total_ms": round(self.total_ms, 1),
+                "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+                "p50_ms": self.quantile(0.5),
+                "p95_ms": self.quantile(0.95),
+                "buckets": cumulative,
+            }
+
+
+# ---- the current request's timer ----
+
+_current: ContextVar[StageTimer | None] = ContextVar("stage_timer", default=None)
+
+
+def current_timer() -> StageTimer | None:
+    return _current.get()
+
+
+@contextmanager
+def activate(timer: StageTimer):
+    """Make ``timer`` the current one for this context (and tasks/threads it spawns)."""
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def measure(name: str):
+    """Time a stage into the current timer, if there is one."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def add(name: str, ms: float):
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, ms)
+
+
+def count(name: str, n: int = 1):
+    timer = _current.get()
+    if timer is not None:
+        timer.count(name, n)
+
+
+# ---- process-wide totals (for /api/metrics/) ----
+
+_stage_histograms: dict[tuple[str, str], LatencyHistogram] = {}
+_totals_lock = threading.Lock()
+
+
+def record(timer: StageTimer, view: str):
+    """Fold a finished request's stage times into the per-view histograms."""
+    stages = timer.stages()
+    stages["total"] = timer.elapsed_ms()
+    with _totals_lock:
+        for name, ms in stages.items():
+            hist = _stage_histograms.get((view, name))
+            if hist is None:
+                hist = _stage_histograms[(view, name)] = LatencyHistogram(STAGE_BUCKETS_MS)
+            hist.observe(ms / 1000)
+
+
+def stage_stats() -> dict:
+    """{(view, stage): histogram snapshot} for this process."""
+    with _totals_lock:
+        items = sorted(_stage_histograms.items())
+    return {key: hist.snapshot() for key, hist in items}
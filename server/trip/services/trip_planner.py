@@ -3,23 +3,86 @@ Trip planning orchestrator.
 
 Geocode → Route → HOS simulate → Build logs.
 Single entry point: plan_trip().
+
+Network-bound stages run concurrently: the three locations are resolved
+together (Nominatim spacing is enforced by the shared limiter), then all
+legs are routed with a single multi-waypoint ORS request. plan_trip_async()
+runs the same pipeline on an event loop for the ASGI views.
 """
 
+import asyncio
+import contextvars
+import hashlib
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import NamedTuple
 
-from .geocoding import geocode_address
+from . import plan_store
+from .cache import TTLCache
+from .coalesce import SingleFlight
+from .db import in_worker
+from .geocoding import geocode_address, geocode_address_async, normalize_address
 from .hos_calculator import TripSimulator
+from .constants import DRIVING
 from .log_builder import build_daily_logs
-from .routing import get_route
+from .routing import (
+    RouteIndex,
+    encode_polyline,
+    get_multi_leg_route,
+    get_multi_leg_route_async,
+    route_index,
+    simplify_polyline,
+    zoom_tolerance_meters,
+)
+from .timeline import STATUS_CODES, Timeline
+from .timing import StageTimer, current_timer
 
 logger = logging.getLogger(__name__)
 
+# Shared pool for upstream I/O (geocoding fan-out); tasks run under in_worker()
+_io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="plan-io")
+
+DRIVING_CODE = STATUS_CODES[DRIVING]
+
+# Whole-plan results by plan key. The key includes the start minute, so a
+# TTL much beyond a minute only helps clients that pin start_time.
+PLAN_CACHE_TTL = int(os.getenv("PLAN_CACHE_TTL", 60))
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", 256))
+
+_plan_cache = TTLCache(maxsize=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL, name="plan")
+_plan_flight = SingleFlight(name="plan")
+
+# Simulator state per plan_id for replan_trip(); drivers re-plan hours later
+REPLAN_TTL = int(os.getenv("REPLAN_TTL", 24 * 3600))
+REPLAN_CACHE_SIZE = int(os.getenv("REPLAN_CACHE_SIZE", 512))
+
+_plan_contexts = TTLCache(maxsize=REPLAN_CACHE_SIZE, ttl=REPLAN_TTL)
+
+# Timeline events per "timeline" message in plan_trip_stream()
+STREAM_TIMELINE_CHUNK = int(os.getenv("STREAM_TIMELINE_CHUNK", 50))
+
 
 class TripPlannerError(Exception):
     """Pipeline-level error."""
 
 
+class PlanNotFoundError(TripPlannerError):
+    """replan_trip() was given a plan this process no longer holds."""
+
+
+class PlanContext(NamedTuple):
+    """What replan_trip() needs from an earlier plan."""
+
+    names: list[str]
+    points: list[tuple[float, float]]
+    legs: list[dict]
+    cycle_used_hours: float
+    sim: TripSimulator
+    driver_id: str | None = None
+
+
 def _resolve_coords(location_name: str, coords: tuple) -> tuple[float, float]:
     """
     Return (lat, lng) from pre-resolved coords if both are present,
@@ -40,79 +103,723 @@ def plan_trip(
     current_coords: tuple = (None, None),
     pickup_coords: tuple = (None, None),
     dropoff_coords: tuple = (None, None),
+    intermediate_stops: list[dict] | None = None,
+    start_time: datetime | None = None,
+    driver_id: str | None = None,
 ) -> dict:
     """
     Run the full planning pipeline and return everything the frontend needs:
     route geometry, HOS timeline, daily log sheets, and stop markers.
+
+    ``intermediate_stops`` are extra drops between pickup and the final
+    dropoff, each a dict with "location" and optional "lat" / "lng".
+    ``start_time`` defaults to the current minute. The plan is stored (see
+    plan_store) under its plan_id, tagged with ``driver_id`` if given.
+
+    Identical plans (same plan_key()) are computed once: concurrent
+    duplicates wait on the first caller, and the result is then served from
+    a short-lived cache. "timings" are this call's own stage timings, not
+    the first caller's. Callers must not mutate the returned dict's values.
+    """
+    start = start_time or _current_minute()
+    names, given = _stop_inputs(
+        current_location, pickup_location, dropoff_location,
+        current_coords, pickup_coords, dropoff_coords, intermediate_stops,
+    )
+    key = _plan_key(names, given, cycle_used_hours, start, driver_id)
+
+    timer = _stage_timer()
+    result = _plan_cache.get(key)
+    if result is None:
+        result = _plan_flight.do(
+            key, _plan, timer, key, names, given, cycle_used_hours, start, driver_id
+        )
+    return _with_timings(result, timer)
+
+
+async def plan_trip_async(
+    current_location: str,
+    pickup_location: str,
+    dropoff_location: str,
+    cycle_used_hours: float,
+    current_coords: tuple = (None, None),
+    pickup_coords: tuple = (None, None),
+    dropoff_coords: tuple = (None, None),
+    intermediate_stops: list[dict] | None = None,
+    start_time: datetime | None = None,
+    driver_id: str | None = None,
+) -> dict:
+    """
+    plan_trip() for ASGI views.
+
+    Geocoding and routing await the shared async HTTP client, so a worker
+    holds no thread while Nominatim / ORS respond. The CPU-bound tail
+    (simulation, logs, markers) runs in a worker thread.
+    """
+    start = start_time or _current_minute()
+    names, given = _stop_inputs(
+        current_location, pickup_location, dropoff_location,
+        current_coords, pickup_coords, dropoff_coords, intermediate_stops,
+    )
+    key = _plan_key(names, given, cycle_used_hours, start, driver_id)
+
+    timer = _stage_timer()
+    result = _plan_cache.get(key)
+    if result is None:
+        result = await _plan_flight.do_async(
+            key, _plan_async, timer, key, names, given, cycle_used_hours, start, driver_id
+        )
+    return _with_timings(result, timer)
+
+
+def plan_key(
+    current_location: str,
+    pickup_location: str,
+    dropoff_location: str,
+    cycle_used_hours: float,
+    current_coords: tuple = (None, None),
+    pickup_coords: tuple = (None, None),
+    dropoff_coords: tuple = (None, None),
+    intermediate_stops: list[dict] | None = None,
+    start_time: datetime | None = None,
+    driver_id: str | None = None,
+) -> str:
+    """
+    Digest of the normalized plan inputs (the coalescing / cache key).
+
+    Takes plan_trip()'s arguments; pass the same ``start_time`` to both.
+    """
+    names, given = _stop_inputs(
+        current_location, pickup_location, dropoff_location,
+        current_coords, pickup_coords, dropoff_coords, intermediate_stops,
+    )
+    return _plan_key(names, given, cycle_used_hours, start_time or _current_minute(), driver_id)
+
+
+def plan_cache_stats() -> dict:
+    return {"cache": _plan_cache.stats(), "coalescing": _plan_flight.stats()}
+
+
+def with_geometry(result: dict, encoding: str = "full", zoom: int | None = None) -> dict:
+    """
+    ``result`` (a plan_trip() response) with each leg's geometry reshaped
+    by shape_geometry(). The cached plan is shared, so this copies.
+    """
+    if encoding == "full" and zoom is None:
+        return result
+    route = result["route"]
+    legs = [shape_geometry(leg, encoding, zoom) for leg in route["legs"]]
+    return {**result, "route": {**route, "legs": legs}}
+
+
+def shape_geometry(leg: dict, encoding: str = "full", zoom: int | None = None) -> dict:
     """
+    Copy of ``leg`` (anything with a "geometry" point list) for the wire:
+    with ``zoom``, Douglas–Peucker simplified to one map pixel at that zoom;
+    with encoding="polyline", "geometry" is replaced by a "polyline" string
+    (Google encoding, precision 5).
+    """
+    points = leg["geometry"]
+    if zoom is not None and points:
+        lat = points[len(points) // 2][0]
+        points = simplify_polyline(points, zoom_tolerance_meters(zoom, lat))
+
+    shaped = {k: v for k, v in leg.items() if k != "geometry"}
+    if encoding == "polyline":
+        shaped["polyline"] = encode_polyline(points)
+    else:
+        shaped["geometry"] = points
+    return shaped
+
+
+def plan_trip_stream(
+    current_location: str,
+    pickup_location: str,
+    dropoff_location: str,
+    cycle_used_hours: float,
+    current_coords: tuple = (None, None),
+    pickup_coords: tuple = (None, None),
+    dropoff_coords: tuple = (None, None),
+    intermediate_stops: list[dict] | None = None,
+    start_time: datetime | None = None,
+    driver_id: str | None = None,
+):
+    """
+    plan_trip() as a stream of ``(event, data)`` pairs, each sent as soon as
+    its stage finishes:
+
+        route       plan_id, per-leg distance / duration, totals (no geometry)
+        geometry    {"leg": i, "geometry": [[lat, lng], ...]}, one per leg
+        timeline    {"events": [...]}, in chunks of STREAM_TIMELINE_CHUNK
+        daily_log   one per day
+        stops       {"stops": [...]}
+        summary     as in plan_trip()
+        timings     as in plan_trip()
+        done        {"plan_id": ...}
+
+    The finished plan is cached like plan_trip()'s, so it can be replanned
+    and re-fetched. Raises TripPlannerError (possibly mid-stream).
+    """
+    start = start_time or _current_minute()
+    names, given = _stop_inputs(
+        current_location, pickup_location, dropoff_location,
+        current_coords, pickup_coords, dropoff_coords, intermediate_stops,
+    )
+    key = _plan_key(names, given, cycle_used_hours, start, driver_id)
+
+    timer = _stage_timer()
+    cached = _plan_cache.get(key)
+    if cached is not None:
+        yield from _result_events(cached, timer)
+        return
+
     try:
-        # 1) geocode (skip if coords already provided by frontend)
-        logger.info("Geocoding...")
-        cur = _resolve_coords(current_location, current_coords)
-        pick = _resolve_coords(pickup_location, pickup_coords)
-        drop = _resolve_coords(dropoff_location, dropoff_coords)
-
-        # 2) route both legs
-        logger.info("Routing...")
-        leg1 = get_route(cur, pick)
-        leg2 = get_route(pick, drop)
-        total_mi = leg1["distance_miles"] + leg2["distance_miles"]
-
-        # 3) HOS simulation
-        logger.info("Simulating HOS...")
-        sim = TripSimulator(
-            cycle_used_hours=cycle_used_hours,
-            start_time=datetime.now().replace(second=0, microsecond=0),
+        points, route = _geocode_and_route(timer, names, given)
+        yield from _streamed_plan(
+            timer, key, names, points, route, cycle_used_hours, start, driver_id
         )
+    except Exception as exc:
+        logger.exception("Trip planning failed: %s", exc)
+        raise TripPlannerError(str(exc)) from exc
+
 
-        sim.drive_segment(
-            leg1["distance_miles"],
-            current_location, pickup_location,
-            cur[0], cur[1], pick[0], pick[1],
+async def plan_trip_stream_async(
+    current_location: str,
+    pickup_location: str,
+    dropoff_location: str,
+    cycle_used_hours: float,
+    current_coords: tuple = (None, None),
+    pickup_coords: tuple = (None, None),
+    dropoff_coords: tuple = (None, None),
+    intermediate_stops: list[dict] | None = None,
+    start_time: datetime | None = None,
+    driver_id: str | None = None,
+):
+    """plan_trip_stream() as an async generator for the ASGI views."""
+    start = start_time or _current_minute()
+    names, given = _stop_inputs(
+        current_location, pickup_location, dropoff_location,
+        current_coords, pickup_coords, dropoff_coords, intermediate_stops,
+    )
+    key = _plan_key(names, given, cycle_used_hours, start, driver_id)
+
+    timer = _stage_timer()
+    cached = _plan_cache.get(key)
+    if cached is not None:
+        for item in _result_events(cached, timer):
+            yield item
+        return
+
+    try:
+        points, route = await _geocode_and_route_async(timer, names, given)
+        # the CPU-bound stages run off the event loop, one event at a time
+        events = _streamed_plan(
+            timer, key, names, points, route, cycle_used_hours, start, driver_id
         )
-        sim.add_pickup(pickup_location, pick[0], pick[1])
+        while (item := await asyncio.to_thread(in_worker, next, events, None)) is not None:
+            yield item
+    except Exception as exc:
+        logger.exception("Trip planning failed: %s", exc)
+        raise TripPlannerError(str(exc)) from exc
 
-        sim.drive_segment(
-            leg2["distance_miles"],
-            pickup_location, dropoff_location,
-            pick[0], pick[1], drop[0], drop[1],
+
+def _plan(timer, key, names, given, cycle_used_hours, start, driver_id) -> dict:
+    try:
+        points, route = _geocode_and_route(timer, names, given)
+        result = _finish_plan(
+            timer, names, points, route, cycle_used_hours, start, key, driver_id
         )
-        sim.add_dropoff(dropoff_location, drop[0], drop[1])
 
-        timeline = sim.get_timeline()
+    except Exception as exc:
+        logger.exception("Trip planning failed: %s", exc)
+        raise TripPlannerError(str(exc)) from exc
 
-        # 4) daily logs
-        daily_logs = build_daily_logs(timeline)
+    _plan_cache.set(key, result)
+    return result
 
-        # 5) stop markers for the map
-        stops = _build_stops(timeline)
 
-        return {
-            "route": {
-                "legs": [
-                    _leg_data(current_location, pickup_location, leg1),
-                    _leg_data(pickup_location, dropoff_location, leg2),
-                ],
-                "total_distance_miles": round(total_mi, 1),
-                "total_duration_hours": round(
-                    (leg1["duration_minutes"] + leg2["duration_minutes"]) / 60, 1
-                ),
-            },
-            "timeline": timeline,
-            "daily_logs": daily_logs,
-            "stops": stops,
-            "summary": {
-                "total_days": len(daily_logs),
-                "total_driving_miles": sim.get_total_miles(),
-                "cycle_hours_at_start": cycle_used_hours,
-                "cycle_hours_at_end": round(sim.cycle_used / 60, 1),
-            },
-        }
+async def _plan_async(timer, key, names, given, cycle_used_hours, start, driver_id) -> dict:
+    try:
+        points, route = await _geocode_and_route_async(timer, names, given)
+        result = await asyncio.to_thread(
+            in_worker, _finish_plan,
+            timer, names, points, route, cycle_used_hours, start, key, driver_id,
+        )
 
     except Exception as exc:
         logger.exception("Trip planning failed: %s", exc)
         raise TripPlannerError(str(exc)) from exc
 
+    _plan_cache.set(key, result)
+    return result
+
+
+def _geocode_and_route(timer: StageTimer, names: list[str], given: list[tuple]) -> tuple[list, dict]:
+    # 1) geocode (skip if coords already provided by frontend)
+    logger.info("Geocoding...")
+    with timer.stage("geocode"):
+        futures = [
+            _io_pool.submit(
+                contextvars.copy_context().run, in_worker, _resolve_coords, name, coords
+            )
+            for name, coords in zip(names, given)
+        ]
+        points = [f.result() for f in futures]
+
+    # 2) route every leg in one request
+    logger.info("Routing...")
+    with timer.stage("route"):
+        route = get_multi_leg_route(points)
+    return points, route
+
+
+async def _geocode_and_route_async(
+    timer: StageTimer, names: list[str], given: list[tuple]
+) -> tuple[list, dict]:
+    logger.info("Geocoding...")
+    with timer.stage("geocode"):
+        points = await asyncio.gather(*(
+            _resolve_coords_async(name, coords)
+            for name, coords in zip(names, given)
+        ))
+
+    logger.info("Routing...")
+    with timer.stage("route"):
+        route = await get_multi_leg_route_async(points)
+    return points, route
+
+
+def _streamed_plan(timer, key, names, points, route, cycle_used_hours, start, driver_id=None):
+    """Events for a freshly routed plan; stores and caches the result at the end."""
+    legs = route["legs"]
+    result = {"plan_id": key, "route": _route_data(names, legs)}
+    yield from _route_events(key, result["route"])
+
+    sim = _simulate(timer, names, points, legs, cycle_used_hours, start, key, driver_id)
+    for name, value in _plan_parts(timer, cycle_used_hours, sim):
+        result[name] = value
+        yield from _part_events(name, value)
+    yield "timings", timer.as_dict()
+
+    _store_plan(timer, key, names, points, legs, cycle_used_hours, sim, result["summary"], driver_id)
+    _plan_cache.set(key, result)
+    yield "done", {"plan_id": key}
+
+
+def _result_events(result: dict, timer: StageTimer):
+    """Replay a finished plan as stream events, with this request's timings."""
+    yield from _route_events(result["plan_id"], result["route"])
+    for name in ("timeline", "daily_logs", "stops", "summary"):
+        yield from _part_events(name, result[name])
+    yield "timings", timer.as_dict()
+    yield "done", {"plan_id": result["plan_id"]}
+
+
+def _route_events(key: str, route_data: dict):
+    yield "route", {
+        "plan_id": key,
+        "legs": [
+            {k: v for k, v in leg.items() if k != "geometry"}
+            for leg in route_data["legs"]
+        ],
+        "total_distance_miles": route_data["total_distance_miles"],
+        "total_duration_hours": route_data["total_duration_hours"],
+    }
+    for i, leg in enumerate(route_data["legs"]):
+        yield "geometry", {"leg": i, "geometry": leg["geometry"]}
+
+
+def _part_events(name: str, value):
+    if name == "timeline":
+        for i in range(0, len(value), STREAM_TIMELINE_CHUNK):
+            yield "timeline", {"events": value[i:i + STREAM_TIMELINE_CHUNK]}
+    elif name == "daily_logs":
+        for log in value:
+            yield "daily_log", log
+    elif name == "stops":
+        yield "stops", {"stops": value}
+    else:
+        yield name, value
+
+
+def _with_timings(result: dict, timer: StageTimer) -> dict:
+    """
+    A shallow copy of a (possibly cached, shared) plan with ``timer``'s
+    stage timings; cached plans never hold a particular request's timings.
+    """
+    return {**result, "timings": timer.as_dict()}
+
+
+def _stage_timer() -> StageTimer:
+    """The request's timer (see timing.activate()), else a fresh one."""
+    return current_timer() or StageTimer()
+
+
+def _current_minute() -> datetime:
+    return datetime.now().replace(second=0, microsecond=0)
+
+
+def _plan_key(names, given, cycle_used_hours, start, driver_id=None) -> str:
+    parts = (
+        tuple(normalize_address(name) for name in names),
+        tuple(
+            None if c is None or c[0] is None or c[1] is None
+            else (round(float(c[0]), 6), round(float(c[1]), 6))
+            for c in given
+        ),
+        round(float(cycle_used_hours), 2),
+        start.isoformat(timespec="minutes"),
+    )
+    if driver_id:
+        # two drivers on the same trip get their own stored plans
+        parts += (driver_id,)
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+async def _resolve_coords_async(location_name: str, coords: tuple) -> tuple[float, float]:
+    if coords and coords[0] is not None and coords[1] is not None:
+        return (float(coords[0]), float(coords[1]))
+    logger.info("Geocoding '%s' via Nominatim...", location_name)
+    return await geocode_address_async(location_name)
+
+
+def _stop_inputs(
+    current_location, pickup_location, dropoff_location,
+    current_coords, pickup_coords, dropoff_coords, intermediate_stops,
+) -> tuple[list[str], list[tuple]]:
+    """Ordered stop names and their (lat, lng) hints, None where unknown."""
+    stops_in = intermediate_stops or []
+    names = [
+        current_location,
+        pickup_location,
+        *(stop["location"] for stop in stops_in),
+        dropoff_location,
+    ]
+    given = [
+        current_coords,
+        pickup_coords,
+        *((stop.get("lat"), stop.get("lng")) for stop in stops_in),
+        dropoff_coords,
+    ]
+    return names, given
+
+
+def _finish_plan(
+    timer: StageTimer,
+    names: list[str],
+    points: list[tuple[float, float]],
+    route: dict,
+    cycle_used_hours: float,
+    start: datetime,
+    key: str,
+    driver_id: str | None = None,
+    store: bool = True,
+) -> dict:
+    """Simulate, build logs and markers, assemble the response and store it."""
+    legs = route["legs"]
+    sim = _simulate(timer, names, points, legs, cycle_used_hours, start, key, driver_id)
+    result = _assemble(timer, key, names, legs, cycle_used_hours, sim)
+    if store:
+        _store_plan(
+            timer, key, names, points, legs, cycle_used_hours, sim, result["summary"], driver_id
+        )
+    return result
+
+
+def _simulate(
+    timer, names, points, legs, cycle_used_hours, start, key, driver_id=None
+) -> TripSimulator:
+    # 3) HOS simulation
+    logger.info("Simulating HOS...")
+    with timer.stage("simulate"):
+        sim = simulate_trip(
+            names,
+            points,
+            [leg["distance_miles"] for leg in legs],
+            cycle_used_hours,
+            start,
+            routes=_leg_routes(legs),
+        )
+
+    _remember_plan(key, PlanContext(names, points, legs, cycle_used_hours, sim, driver_id))
+    return sim
+
+
+def replan_trip(
+    plan_id: str,
+    timeline_index: int,
+    remaining_miles: float | None = None,
+    from_store: bool = True,
+) -> dict:
+    """
+    Re-plan a trip from part-way through, e.g. after a delay.
+
+    Events before ``timeline_index`` are kept as they were; the simulator
+    resumes from the HOS state checkpointed just before that event and
+    only the rest of the trip is simulated, over the legs already routed
+    for ``plan_id``. Plans planned by this worker are resumed from memory,
+    others (another worker, before a restart) from the plan store unless
+    ``from_store`` is False. ``remaining_miles`` replaces what is left of the leg
+    being driven at that point (detour, updated odometer).
+
+    The result has the same shape as plan_trip()'s, with its own plan_id so
+    re-plans can be chained.
+
+    Raises:
+        PlanNotFoundError: ``plan_id`` is neither held by this worker nor stored.
+        TripPlannerError: The index is out of range.
+    """
+    timer = _stage_timer()
+    ctx = _plan_context(timer, plan_id, from_store)
+    if ctx is None:
+        raise PlanNotFoundError(f"Plan '{plan_id}' is unknown or expired; plan the trip again.")
+    if not 0 <= timeline_index < len(ctx.sim.timeline):
+        raise TripPlannerError(
+            f"timeline_index must be between 0 and {len(ctx.sim.timeline) - 1}."
+        )
+
+    legs = ctx.legs
+    with timer.stage("simulate"):
+        state = ctx.sim.state_at(timeline_index)
+        leg, at_stop = divmod(state.step, 2)
+        drive_remaining = None
+        if not at_stop:
+            drive_remaining = state.leg_remaining
+            if remaining_miles is not None:
+                drive_remaining = remaining_miles
+                legs = list(legs)
+                legs[leg] = _resized_leg(legs[leg], state.leg_done + remaining_miles)
+
+        routes = _leg_routes(legs)
+        sim = TripSimulator.resume(
+            state,
+            ctx.sim.timeline.truncated(timeline_index),
+            {i: r for i, r in enumerate(routes) if r is not None},
+            ctx.sim.checkpoints_before(timeline_index),
+        )
+        _run_steps(
+            sim, ctx.names, ctx.points, [leg["distance_miles"] for leg in legs], routes,
+            first_step=state.step, done_miles=state.leg_done, remaining_miles=drive_remaining,
+        )
+        sim.place_on_routes(start=timeline_index)
+
+    key = hashlib.blake2b(
+        repr((plan_id, timeline_index, remaining_miles)).encode(), digest_size=12
+    ).hexdigest()
+    _remember_plan(
+        key, PlanContext(ctx.names, ctx.points, legs, ctx.cycle_used_hours, sim, ctx.driver_id)
+    )
+
+    result = _assemble(timer, key, ctx.names, legs, ctx.cycle_used_hours, sim)
+    result["resumed_from"] = {
+        "plan_id": plan_id,
+        "timeline_index": timeline_index,
+        "state": state.as_dict(),
+    }
+    result["timings"] = timer.as_dict()
+    _store_plan(
+        timer, key, ctx.names, ctx.points, legs, ctx.cycle_used_hours, sim,
+        result["summary"], ctx.driver_id, result["resumed_from"],
+    )
+    return result
+
+
+def _plan_context(timer: StageTimer, plan_id: str, from_store: bool) -> PlanContext | None:
+    """The plan's replan context: this worker's copy, else rebuilt from the store."""
+    ctx = _plan_contexts.get(plan_id)
+    if ctx is not None or not from_store:
+        return ctx
+
+    with timer.stage("load"):
+        plan = plan_store.load_plan(plan_id)
+    if plan is None or plan.checkpoints is None:
+        return None
+    ctx = PlanContext(
+        plan.names, plan.points, plan.legs, plan.cycle_used_hours,
+        TripSimulator.restore(plan.timeline, plan.checkpoints), plan.driver_id or None,
+    )
+    _remember_plan(plan_id, ctx)
+    return ctx
+
+
+def stored_plan(plan_id: str) -> dict | None:
+    """
+    A plan stored by an earlier request (see plan_store), in plan_trip()'s
+    shape plus driver_id and created_at. Daily logs and stop markers are
+    rebuilt from the stored timeline; nothing is geocoded, routed or
+    simulated. None if no such plan is stored.
+    """
+    timer = _stage_timer()
+    with timer.stage("load"):
+        plan = plan_store.load_plan(plan_id)
+    if plan is None:
+        return None
+
+    result = {
+        "plan_id": plan.plan_id,
+        "driver_id": plan.driver_id or None,
+        "created_at": plan.created_at.isoformat(),
+        "route": _route_data(plan.names, plan.legs),
+        **dict(_timeline_parts(timer, plan.timeline)),
+        "summary": plan.summary,
+    }
+    if plan.resumed_from is not None:
+        result["resumed_from"] = plan.resumed_from
+    result["timings"] = timer.as_dict()
+    return result
+
+
+def _assemble(
+    timer: StageTimer,
+    key: str,
+    names: list[str],
+    legs: list[dict],
+    cycle_used_hours: float,
+    sim: TripSimulator,
+) -> dict:
+    return {
+        "plan_id": key,
+        "route": _route_data(names, legs),
+        **dict(_plan_parts(timer, cycle_used_hours, sim)),
+    }
+
+
+def _route_data(names: list[str], legs: list[dict]) -> dict:
+    return {
+        "legs": [
+            _leg_data(names[i], names[i + 1], leg)
+            for i, leg in enumerate(legs)
+        ],
+        "total_distance_miles": round(sum(leg["distance_miles"] for leg in legs), 1),
+        "total_duration_hours": round(sum(leg["duration_minutes"] for leg in legs) / 60, 1),
+    }
+
+
+def _plan_parts(timer: StageTimer, cycle_used_hours: float, sim: TripSimulator):
+    """The post-simulation response keys, each yielded once it is built."""
+    parts = {}
+    for name, value in _timeline_parts(timer, sim.timeline):
+        parts[name] = value
+        yield name, value
+
+    yield "summary", {
+        "total_days": len(parts["daily_logs"]),
+        "total_driving_miles": sim.get_total_miles(),
+        "cycle_hours_at_start": cycle_used_hours,
+        "cycle_hours_at_end": round(sim.cycle_used / 60, 1),
+    }
+
+
+def _timeline_parts(timer: StageTimer, timeline: Timeline):
+    """Timeline events, daily logs and stop markers, in that order."""
+    yield "timeline", timeline.to_dicts()
+
+    # 4) daily logs
+    with timer.stage("daily_logs"):
+        daily_logs = build_daily_logs(timeline)
+    yield "daily_logs", daily_logs
+
+    # 5) stop markers for the map
+    with timer.stage("stops"):
+        stops = _build_stops(timeline)
+    yield "stops", stops
+
+
+def _store_plan(
+    timer, key, names, points, legs, cycle_used_hours, sim, summary, driver_id,
+    resumed_from=None,
+):
+    with timer.stage("store"):
+        plan_store.save_plan(
+            key, names, points, legs, cycle_used_hours, sim.timeline, summary,
+            driver_id=driver_id, resumed_from=resumed_from,
+            checkpoints=sim.checkpoint_bytes(),
+        )
+
+
+def _remember_plan(key: str, ctx: "PlanContext"):
+    # Keep the geometry out of the context; _leg_routes() rebuilds it from
+    # the polylines (usually an _index_cache hit).
+    ctx.sim.routes = {}
+    _plan_contexts.set(key, ctx)
+
+
+def _leg_routes(legs: list[dict]) -> list[RouteIndex | None]:
+    return [route_index(leg["polyline"]) if leg["polyline"] else None for leg in legs]
+
+
+def _resized_leg(leg: dict, miles: float) -> dict:
+    """``leg`` with a new length; duration scales with it."""
+    scale = miles / leg["distance_miles"] if leg["distance_miles"] else 1.0
+    return {**leg, "distance_miles": miles, "duration_minutes": leg["duration_minutes"] * scale}
+
+
+def simulate_trip(
+    names: list[str],
+    points: list[tuple[float, float]],
+    leg_miles: list[float],
+    cycle_used_hours: float,
+    start_time: datetime,
+    routes: list[RouteIndex | None] | None = None,
+    checkpoints: bool = True,
+) -> TripSimulator:
+    """
+    Run the HOS simulation for an ordered list of stops.
+
+    The first leg ends at the pickup; every later leg ends at a dropoff.
+    With ``routes`` (one RouteIndex per leg), en-route events are placed on
+    the road geometry instead of the straight line between stops. Pass
+    ``checkpoints=False`` when the result will never be resumed.
+    """
+    sim = TripSimulator(
+        cycle_used_hours=cycle_used_hours, start_time=start_time, checkpoints=checkpoints
+    )
+    _run_steps(sim, names, points, leg_miles, routes)
+
+    if routes:
+        sim.place_on_routes()
+    return sim
+
+
+def _run_steps(
+    sim: TripSimulator,
+    names: list[str],
+    points: list[tuple[float, float]],
+    leg_miles: list[float],
+    routes: list[RouteIndex | None] | None,
+    first_step: int = 0,
+    done_miles: float = 0.0,
+    remaining_miles: float | None = None,
+):
+    """
+    Drive each leg and make the stop at its end, from ``first_step`` on
+    (2k = drive leg k, 2k + 1 = stop after leg k). When resuming mid-leg,
+    ``done_miles`` / ``remaining_miles`` describe that first leg.
+    """
+    for step in range(first_step, 2 * len(leg_miles)):
+        sim.step = step
+        i, at_stop = divmod(step, 2)
+        frm, to = names[i], names[i + 1]
+        (lat_from, lng_from), (lat_to, lng_to) = points[i], points[i + 1]
+
+        if not at_stop:
+            done = done_miles if step == first_step else 0.0
+            miles = leg_miles[i] - done
+            if step == first_step and remaining_miles is not None:
+                miles = remaining_miles
+            sim.drive_segment(
+                miles,
+                frm, to,
+                lat_from, lng_from, lat_to, lng_to,
+                route=routes[i] if routes else None,
+                leg=i,
+                done_miles=done,
+            )
+        elif i == 0:
+            sim.add_pickup(to, lat_to, lng_to)
+        else:
+            sim.add_dropoff(to, lat_to, lng_to)
+
 
 def _leg_data(frm: str, to: str, leg: dict) -> dict:
     return {
@@ -124,35 +831,43 @@ def _leg_data(frm: str, to: str, leg: dict) -> dict:
     }
 
 
-def _build_stops(timeline: list[dict]) -> list[dict]:
+def _build_stops(timeline: Timeline) -> list[dict]:
     """Pull non-driving events into map markers."""
     stops = []
-    for ev in timeline:
-        if ev["status"] == "D":
+    kinds: dict[int, str] = {}  # note id → marker type (notes are interned)
+
+    for i in range(len(timeline)):
+        if timeline.statuses[i] == DRIVING_CODE:
             continue
 
-        note = ev.get("note", "")
-        if "pickup" in note.lower():
-            kind = "pickup"
-        elif "dropoff" in note.lower():
-            kind = "dropoff"
-        elif "fuel" in note.lower():
-            kind = "fuel"
-        elif "rest" in note.lower() or "restart" in note.lower():
-            kind = "rest"
-        elif "break" in note.lower():
-            kind = "break"
-        else:
-            kind = "stop"
+        note_id = timeline.notes[i]
+        kind = kinds.get(note_id)
+        if kind is None:
+            kind = kinds[note_id] = _stop_kind(timeline.note(i))
 
         stops.append({
             "type": kind,
-            "location": ev.get("location", ""),
-            "lat": ev.get("lat", 0),
-            "lng": ev.get("lng", 0),
-            "start_time": ev["start_time"],
-            "duration_mins": ev["duration_mins"],
-            "note": note,
+            "location": timeline.location(i),
+            "lat": timeline.lats[i],
+            "lng": timeline.lngs[i],
+            "start_time": timeline.time_at(timeline.offsets[i]).isoformat(),
+            "duration_mins": timeline.durations[i],
+            "note": timeline.note(i),
         })
 
     return stops
+
+
+def _stop_kind(note: str) -> str:
+    note = note.lower()
+    if "pickup" in note:
+        return "pickup"
+    if "dropoff" in note:
+        return "dropoff"
+    if "fuel" in note:
+        return "fuel"
+    if "rest" in note or "restart" in note:
+        return "rest"
+    if "break" in note:
+        return "break"
+    return "stop"
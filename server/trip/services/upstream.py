@@ -0,0 +1,171 @@
+"""
+Pooled HTTP sessions for the upstream APIs (ORS, Nominatim).
+
+Every service module sends through request() so calls reuse keep-alive
+connections instead of paying a TCP + TLS handshake each time. 429 / 5xx
+answers are retried with backoff, honouring Retry-After up to
+HTTP_RETRY_AFTER_MAX (retry_delay(), shared with aio.async_request()).
+Every attempt of a rate-limited upstream takes a token from its limiter,
+retries included. Each attempt's latency lands in a per-upstream
+histogram (latency_stats()).
+
+One session per process: connection pools can't be shared across a fork,
+so each gunicorn worker builds its own on first use.
+"""
+
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import timing
+from .timing import LatencyHistogram
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 4))   # hosts kept
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 16))          # sockets per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", 1.0))
+HTTP_RETRY_AFTER_MAX = float(os.getenv("HTTP_RETRY_AFTER_MAX", 5.0))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: requests.Session | None = None
+_session_pid: int | None = None
+_session_lock = threading.Lock()
+
+_histograms: dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """This process's pooled session."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def _build_session() -> requests.Session:
+    # Only failed connects are retried down here (nothing reached the
+    # upstream); 429 / 5xx answers are retried by request(), which can
+    # take a rate-limit token for each attempt.
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=0,                          # a read timeout already cost the full wait
+        status=0,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        respect_retry_after_header=False,   # or urllib3 retries 429 / 503 itself
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def request(
+    upstream: str,
+    method: str,
+    url: str,
+    timeout: float,
+    limiter=None,
+    limiter_wait: float | None = None,
+    **kwargs,
+) -> requests.Response:
+    """
+    Send through the pooled session and record each attempt's latency
+    under ``upstream``. 429 / 5xx answers are retried (see retry_delay());
+    the last one is returned for the caller's raise_for_status().
+
+    ``timeout`` is the read timeout; the connect timeout is HTTP_CONNECT_TIMEOUT.
+    With a ``limiter`` (rate_limit.TokenBucket), every attempt first takes
+    a token, waiting at most ``limiter_wait``.
+
+    Raises:
+        RateLimitExceeded: No token within ``limiter_wait``.
+        requests.RequestException: The request failed.
+    """
+    session = get_session()
+    for attempt in range(HTTP_RETRIES + 1):
+        if limiter is not None:
+            limiter.acquire(max_wait=limiter_wait)
+        start = time.perf_counter()
+        try:
+            response = session.request(
+                method, url, timeout=(HTTP_CONNECT_TIMEOUT, timeout), **kwargs
+            )
+        except requests.RequestException:
+            observe(upstream, time.perf_counter() - start, error=True)
+            raise
+        observe(upstream, time.perf_counter() - start, error=response.status_code >= 400)
+
+        delay = retry_delay(response.status_code, response.headers, attempt, timeout)
+        if delay is None:
+            return response
+        timing.count(f"{upstream}_retries")
+        response.close()
+        time.sleep(delay)
+
+
+def retry_delay(status: int, headers, attempt: int, timeout: float) -> float | None:
+    """
+    Seconds to wait before retrying an answer to attempt ``attempt``
+    (0-based), or None if it is final: not a RETRY_STATUSES status, or
+    HTTP_RETRIES retries already made. Backoff doubles from
+    HTTP_RETRY_BACKOFF; a Retry-After header is honoured, but never waited
+    out beyond HTTP_RETRY_AFTER_MAX or the call's own ``timeout``.
+    """
+    if status not in RETRY_STATUSES or attempt >= HTTP_RETRIES:
+        return None
+    retry_after = _retry_after_seconds(headers.get("Retry-After"))
+    if retry_after is None:
+        return HTTP_RETRY_BACKOFF * 2 ** attempt
+    return min(retry_after, HTTP_RETRY_AFTER_MAX, timeout)
+
+
+def _retry_after_seconds(value: str | None) -> float | None:
+    """Retry-After as seconds from now (delta-seconds or an HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def observe(upstream: str, seconds: float, error: bool = False):
+    """
+    Record one call's latency (also used by the async code paths), in the
+    process histogram and in the current request's timer.
+    """
+    hist = _histograms.get(upstream)
+    if hist is None:
+        with _histograms_lock:
+            hist = _histograms.setdefault(upstream, LatencyHistogram())
+    hist.observe(seconds, error)
+    timing.add(upstream, seconds * 1000)
+    timing.count(f"{upstream}_calls")
+
+
+def latency_stats() -> dict:
+    """Per-upstream latency histograms for this process."""
+    return {name: hist.snapshot() for name, hist in sorted(_histograms.items())}
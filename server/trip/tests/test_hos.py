@@ -0,0 +1,162 @@
+"""
+HOS simulator regression tests.
+
+The golden fixture pins the exact timeline and totals produced for a grid
+of trip lengths and cycle balances, so engine rewrites have to prove they
+are behaviour-preserving. Regenerate it only after an intentional change:
+
+    python -m trip.tests.test_hos --write-golden
+"""
+
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from trip.services.hos_calculator import TripSimulator
+from trip.services.trip_planner import _run_steps, simulate_trip
+
+GOLDEN_PATH = Path(__file__).parent / "fixtures" / "hos_golden.json"
+START = datetime(2025, 1, 1, 6, 0)
+
+GOLDEN_DISTANCES = [0.3, 50, 300, 700, 1000, 1500, 2999, 4200]
+GOLDEN_CYCLES = [0, 35, 62.5, 69]
+
+# (leg miles, cycle hours) — these once resumed 0.1 mi off in total
+RESUME_TRIPS = [
+    ([465.1, 1210.0, 1402.4], 55),
+    ([649.0, 249.8, 1551.2], 69),
+    ([1006.4, 1774.4, 1291.3], 0),
+    ([20, 2600, 1010.1], 20),
+]
+RESUME_STOPS = ["P0", "P1", "P2", "P3"]
+RESUME_POINTS = [(41.88, -87.63), (32.78, -96.8), (34.05, -118.24), (39.74, -104.99)]
+
+
+def scenarios() -> list[dict]:
+    """Golden grid: single legs, a few pickup/dropoff trips and summary-total ties."""
+    out = [
+        {"name": f"leg-{d}mi-cycle{c}", "cycle": c, "legs": [d]}
+        for d in GOLDEN_DISTANCES
+        for c in GOLDEN_CYCLES
+    ]
+    out += [
+        {"name": "trip-300-175-cycle10", "cycle": 10, "legs": [300, 175]},
+        {"name": "trip-950-1400-cycle55", "cycle": 55, "legs": [950, 1400]},
+        {"name": "trip-20-2600-cycle68", "cycle": 68, "legs": [20, 2600]},
+    ]
+    # driven miles landing exactly on a 0.05 mi tie, where summing floats
+    # used to round the total either way
+    out += [
+        {"name": "tie-30.2-cycle55", "cycle": 55, "legs": [30.2]},
+        {"name": "tie-1768-cycle35", "cycle": 35, "legs": [1768.0]},
+        {"name": "tie-293.4-1733.3-cycle35", "cycle": 35, "legs": [293.4, 1733.3]},
+        {"name": "tie-2210.4-488.3-1456.4-cycle62.5", "cycle": 62.5,
+         "legs": [2210.4, 488.3, 1456.4]},
+        {"name": "tie-2121.1-1422.9-429.5-cycle0", "cycle": 0, "legs": [2121.1, 1422.9, 429.5]},
+    ]
+    return out
+
+
+def simulate(cycle: float, legs: list[float]) -> TripSimulator:
+    """Drive each leg between made-up endpoints, with pickup then dropoff stops."""
+    sim = TripSimulator(cycle_used_hours=cycle, start_time=START)
+    lat, lng = 41.88, -87.63
+    for i, miles in enumerate(legs):
+        lat_to, lng_to = lat - 0.004 * miles, lng + 0.012 * miles
+        sim.drive_segment(miles, f"P{i}", f"P{i + 1}", lat, lng, lat_to, lng_to)
+        if i == 0 and len(legs) > 1:
+            sim.add_pickup(f"P{i + 1}", lat_to, lng_to)
+        else:
+            sim.add_dropoff(f"P{i + 1}", lat_to, lng_to)
+        lat, lng = lat_to, lng_to
+    return sim
+
+
+def rows(sim: TripSimulator) -> list[list]:
+    return [
+        [
+            e["status"], e["start_time"], e["end_time"], e["duration_mins"],
+            e["location"], round(e["lat"], 6), round(e["lng"], 6), e["note"], e["day"],
+        ]
+        for e in sim.get_timeline()
+    ]
+
+
+def golden_output() -> dict:
+    out = {}
+    for sc in scenarios():
+        sim = simulate(sc["cycle"], sc["legs"])
+        out[sc["name"]] = {
+            "total_miles": sim.get_total_miles(),
+            "cycle_used": sim.cycle_used,
+            "timeline": rows(sim),
+        }
+    return out
+
+
+class GoldenTimelineTests(SimpleTestCase):
+    def test_matches_golden_fixture(self):
+        expected = json.loads(GOLDEN_PATH.read_text())
+        actual = golden_output()
+        self.assertEqual(sorted(actual), sorted(expected))
+        for name, want in expected.items():
+            got = actual[name]
+            with self.subTest(name):
+                self.assertEqual(
+                    (got["total_miles"], got["cycle_used"]),
+                    (want["total_miles"], want["cycle_used"]),
+                )
+                self.assertEqual(len(got["timeline"]), len(want["timeline"]))
+                for i, (a, b) in enumerate(zip(got["timeline"], want["timeline"])):
+                    self.assertEqual(a, b, f"event {i}")
+
+
+class TotalMilesTests(SimpleTestCase):
+    def test_rounds_exact_ties_to_even(self):
+        sim = TripSimulator(cycle_used_hours=0, start_time=START)
+        # 55 mph: 3 min = 2.75 mi, 9 min = 8.25 mi, 1929 min = 1768.25 mi
+        for minutes, want in ((3, 2.8), (9, 8.2), (1929, 1768.2), (1935, 1773.8), (60, 55.0)):
+            sim.driven_minutes = minutes
+            with self.subTest(minutes=minutes):
+                self.assertEqual(sim.get_total_miles(), want)
+
+
+class ResumeTests(SimpleTestCase):
+    """
+    A replan that changes nothing restarts from an event's checkpoint and
+    must reproduce the original timeline and totals; so must a replan of
+    that replan, which resumes from the first one's checkpoints.
+    """
+
+    def test_resume_from_every_checkpoint(self):
+        for legs, cycle in RESUME_TRIPS:
+            sim = simulate_trip(RESUME_STOPS, RESUME_POINTS, legs, cycle, START)
+            want = (rows(sim), sim.get_total_miles(), sim.cycle_used)
+            for i in range(len(sim.timeline)):
+                resumed = _resume(sim, i, legs)
+                for at, got in ((i, resumed), (i // 2, _resume(resumed, i // 2, legs))):
+                    with self.subTest(legs=legs, cycle=cycle, at=at):
+                        self.assertEqual(
+                            (rows(got), got.get_total_miles(), got.cycle_used), want
+                        )
+
+
+def _resume(sim: TripSimulator, index: int, legs: list[float]) -> TripSimulator:
+    state = sim.state_at(index)
+    resumed = TripSimulator.resume(
+        state, sim.timeline.truncated(index), checkpoints=sim.checkpoints_before(index)
+    )
+    _run_steps(
+        resumed, RESUME_STOPS, RESUME_POINTS, legs, None,
+        first_step=state.step, done_miles=state.leg_done,
+        remaining_miles=None if state.step % 2 else state.leg_remaining,
+    )
+    return resumed
+
+
+if __name__ == "__main__" and "--write-golden" in sys.argv:
+    GOLDEN_PATH.write_text(json.dumps(golden_output(), indent=0, ensure_ascii=False) + "\n")
+    print(f"wrote {GOLDEN_PATH}")
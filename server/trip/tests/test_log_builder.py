@@ -0,0 +1,83 @@
+"""
+Daily-log builder parity: the NumPy and compact paths must produce exactly
+what the dict-based builder does for the same timeline.
+"""
+
+from datetime import datetime
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from trip.services import log_builder
+from trip.services.hos_calculator import TripSimulator
+
+# Trip start times, including ones a few minutes before midnight so the
+# first event already straddles a day boundary.
+STARTS = [
+    datetime(2025, 1, 1, 0, 0),
+    datetime(2025, 1, 1, 6, 0),
+    datetime(2025, 1, 1, 13, 17),
+    datetime(2025, 1, 1, 23, 30),
+    datetime(2025, 1, 1, 23, 59),
+    datetime(2024, 2, 28, 23, 58),  # runs across a leap day
+]
+
+
+def simulate(start: datetime, cycle: float, legs: list[float]) -> TripSimulator:
+    sim = TripSimulator(cycle_used_hours=cycle, start_time=start)
+    lat, lng = 41.88, -87.63
+    for i, miles in enumerate(legs):
+        lat_to, lng_to = lat - 0.001 * miles, lng + 0.003 * miles
+        sim.drive_segment(miles, f"P{i}", f"P{i + 1}", lat, lng, lat_to, lng_to)
+        if i == 0 and len(legs) > 1:
+            sim.add_pickup(f"P{i + 1}", lat_to, lng_to)
+        else:
+            sim.add_dropoff(f"P{i + 1}", lat_to, lng_to)
+        lat, lng = lat_to, lng_to
+    return sim
+
+
+class LogBuilderParityTests(SimpleTestCase):
+    def assertPathsAgree(self, tl):
+        expected = log_builder.build_daily_logs(tl.to_dicts())
+        self.assertTrue(expected)
+        self.assertEqual(log_builder._build_compact(tl), expected)
+        if log_builder.np is not None:
+            self.assertEqual(log_builder._build_numpy(tl), expected)
+
+    def test_paths_agree_across_start_times(self):
+        for start in STARTS:
+            for cycle, legs in ((0, [300]), (35, [950, 1400]), (62.5, [20, 2600, 1800])):
+                with self.subTest(start=start, cycle=cycle, legs=legs):
+                    self.assertPathsAgree(simulate(start, cycle, legs).timeline)
+
+    def test_paths_agree_around_numpy_threshold(self):
+        threshold = log_builder.NUMPY_MIN_EVENTS
+        for start in STARTS:
+            tl = simulate(start, 20, [2000] * 10).timeline
+            self.assertGreater(len(tl), threshold + 1)
+            for n in (1, threshold - 1, threshold, threshold + 1, len(tl)):
+                with self.subTest(start=start, events=n):
+                    self.assertPathsAgree(tl.truncated(n))
+
+    def test_dispatch_uses_numpy_only_from_threshold(self):
+        if log_builder.np is None:
+            self.skipTest("NumPy not installed")
+        threshold = log_builder.NUMPY_MIN_EVENTS
+        tl = simulate(STARTS[4], 20, [2000] * 10).timeline
+        for n, numpy_used in ((threshold - 1, False), (threshold, True)):
+            short = tl.truncated(n)
+            with self.subTest(events=n), mock.patch.object(
+                log_builder, "_build_numpy", wraps=log_builder._build_numpy
+            ) as build_numpy:
+                logs = log_builder.build_daily_logs(short)
+                self.assertEqual(build_numpy.called, numpy_used)
+                self.assertEqual(logs, log_builder.build_daily_logs(short.to_dicts()))
+
+    def test_without_numpy_falls_back_to_compact(self):
+        tl = simulate(STARTS[4], 20, [2000] * 10).timeline
+        expected = log_builder.build_daily_logs(tl.to_dicts())
+        with mock.patch.object(log_builder, "np", None), mock.patch.object(
+            log_builder, "_build_numpy", side_effect=AssertionError("NumPy path used")
+        ):
+            self.assertEqual(log_builder.build_daily_logs(tl), expected)
@@ -0,0 +1,59 @@
+"""Suggest index: what geocoding teaches it, and how search dedupes."""
+
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from trip.services import geocoding
+from trip.services.place_index import DEFAULT_GAZETTEER, PlaceIndex
+
+NOMINATIM_DALLAS = {
+    "lat": "32.7762719",
+    "lon": "-96.7968559",
+    "display_name": "Dallas, Dallas County, Texas, United States",
+}
+
+
+class GeocodeLearningTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PlaceIndex()
+        response = mock.Mock(status_code=200)
+        response.json.return_value = [NOMINATIM_DALLAS]
+        for patcher in (
+            mock.patch.object(geocoding, "get_place_index", return_value=self.index),
+            mock.patch.object(geocoding, "_cache_get", return_value=geocoding._NOT_CACHED),
+            mock.patch.object(geocoding, "_cache_set"),
+            mock.patch.object(geocoding.upstream, "request", return_value=response),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_learns_nominatim_label_not_typed_text(self):
+        coords = geocoding.geocode_address("dallass tx 75201 (warehouse #4)")
+        self.assertEqual(coords, (32.7762719, -96.7968559))
+        self.assertEqual(self.index.search("dallass"), [])
+        labels = [p.label for p in self.index.search("Dallas Dallas County")]
+        self.assertEqual(labels, [NOMINATIM_DALLAS["display_name"]])
+
+    def test_result_without_display_name_is_not_learned(self):
+        no_name = {k: v for k, v in NOMINATIM_DALLAS.items() if k != "display_name"}
+        geocoding.upstream.request.return_value.json.return_value = [no_name]
+        geocoding.geocode_address("Dallas, TX")
+        self.assertEqual(len(self.index), 0)
+
+
+class SearchDedupeTests(SimpleTestCase):
+    def test_same_place_under_two_labels_is_listed_once(self):
+        index = PlaceIndex()
+        index.load_gazetteer(DEFAULT_GAZETTEER)
+        index.add(NOMINATIM_DALLAS["display_name"], NOMINATIM_DALLAS["lat"], NOMINATIM_DALLAS["lon"])
+
+        labels = [p.label for p in index.search("Dall", limit=10)]
+        dallas = [label for label in labels if label.startswith("Dallas,")]
+        self.assertEqual(dallas, [NOMINATIM_DALLAS["display_name"]])
+
+    def test_distinct_places_with_one_name_stay_separate(self):
+        index = PlaceIndex()
+        index.add("Springfield, IL, USA", 39.7817, -89.6501)
+        index.add("Springfield, MO, USA", 37.2090, -93.2923)
+        self.assertEqual(len(index.search("Springfield")), 2)
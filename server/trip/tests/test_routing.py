@@ -0,0 +1,18 @@
+"""Routing backends."""
+
+from django.test import SimpleTestCase
+
+from trip.services import routing
+
+
+class RoutingBackendTests(SimpleTestCase):
+    def test_backend_without_directions_fails_at_construction(self):
+        class Incomplete(routing.RoutingBackend):
+            name = "incomplete"
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_shipped_backends_are_complete(self):
+        self.assertIsInstance(routing.ORSBackend(), routing.RoutingBackend)
+        self.assertIsInstance(routing.LocalBackend(""), routing.RoutingBackend)
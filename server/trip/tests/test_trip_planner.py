@@ -0,0 +1,60 @@
+"""Plan cache and coalescing: what a shared plan may and may not carry."""
+
+from datetime import datetime
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from trip.services import trip_planner
+
+TRIP = dict(
+    current_location="Chicago, IL",
+    pickup_location="Dallas, TX",
+    dropoff_location="Los Angeles, CA",
+    cycle_used_hours=12,
+    current_coords=(41.88, -87.63),
+    pickup_coords=(32.78, -96.8),
+    dropoff_coords=(34.05, -118.24),
+    start_time=datetime(2025, 1, 6, 8, 0),
+)
+
+
+def _finish_plan(timer, names, points, route, cycle_used_hours, start, key, driver_id=None):
+    timer.add("simulate", 250.0)
+    return {
+        "plan_id": key,
+        "route": {"legs": [], "total_distance_miles": 0.0, "total_duration_hours": 0.0},
+        "timeline": [], "daily_logs": [], "stops": [],
+        "summary": {"total_days": 1},
+    }
+
+
+class PlanTimingsTests(SimpleTestCase):
+    def setUp(self):
+        trip_planner._plan_cache.clear()
+        self.addCleanup(trip_planner._plan_cache.clear)
+        for patcher in (
+            mock.patch.object(trip_planner, "_geocode_and_route", return_value=([], {"legs": []})),
+            mock.patch.object(trip_planner, "_finish_plan", side_effect=_finish_plan),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_cache_hit_reports_its_own_timings(self):
+        first = trip_planner.plan_trip(**TRIP)
+        again = trip_planner.plan_trip(**TRIP)
+
+        self.assertEqual(trip_planner._finish_plan.call_count, 1)
+        self.assertEqual(first["timings"]["simulate_ms"], 250.0)
+        self.assertNotIn("simulate_ms", again["timings"])
+        self.assertEqual(again["plan_id"], first["plan_id"])
+
+    def test_cached_plan_holds_no_timings(self):
+        first = trip_planner.plan_trip(**TRIP)
+        self.assertNotIn("timings", trip_planner._plan_cache.get(first["plan_id"]))
+
+    def test_cached_stream_reports_its_own_timings(self):
+        trip_planner.plan_trip(**TRIP)
+        events = dict(trip_planner.plan_trip_stream(**TRIP))
+        self.assertEqual(trip_planner._finish_plan.call_count, 1)
+        self.assertNotIn("simulate_ms", events["timings"])
@@ -0,0 +1,130 @@
+"""API view tests: content negotiation and conditional requests."""
+
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from trip import views
+
+TRIP = {
+    "current_location": "Chicago, IL",
+    "pickup_location": "Dallas, TX",
+    "dropoff_location": "Los Angeles, CA",
+    "current_lat": 41.88, "current_lng": -87.63,
+    "pickup_lat": 32.78, "pickup_lng": -96.8,
+    "dropoff_lat": 34.05, "dropoff_lng": -118.24,
+    "cycle_used_hours": 12,
+}
+
+STREAM_ACCEPT = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _events():
+    yield "summary", {"total_distance_miles": 2010.4}
+    yield "done", {}
+
+
+@override_settings(ASYNC_API=False)
+class StreamNegotiationTests(SimpleTestCase):
+    def post(self, path, body, accept):
+        return self.client.post(
+            path, json.dumps(body), content_type="application/json", HTTP_ACCEPT=accept
+        )
+
+    @mock.patch.object(views, "plan_trip_stream", side_effect=lambda **kw: _events())
+    def test_stream_accept_headers_are_acceptable(self, _stream):
+        for fmt, accept in STREAM_ACCEPT.items():
+            with self.subTest(fmt=fmt):
+                response = self.post(f"{reverse('plan_trip')}?stream={fmt}", TRIP, accept)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], accept)
+                body = b"".join(response.streaming_content)
+                self.assertIn(b"summary", body)
+
+    def test_errors_are_rendered_as_a_stream_event(self):
+        url = f"{reverse('plan_trip')}?stream=sse"
+        response = self.post(url, {"cycle_used_hours": 12}, STREAM_ACCEPT["sse"])
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.content.startswith(b"event: error\ndata: {"))
+
+        url = f"{reverse('plan_trip')}?stream=ndjson"
+        response = self.post(url, {"cycle_used_hours": 12}, STREAM_ACCEPT["ndjson"])
+        self.assertEqual(response.status_code, 400)
+        line = json.loads(response.content)
+        self.assertEqual(line["event"], "error")
+        self.assertIn("current_location", line["data"])
+
+    @mock.patch.object(views, "run_batch", return_value=iter([{"id": "d1", "ok": True}]))
+    def test_batch_accepts_ndjson(self, _run_batch):
+        stops = [
+            {"location": TRIP[f"{k}_location"], "lat": TRIP[f"{k}_lat"], "lng": TRIP[f"{k}_lng"]}
+            for k in ("current", "pickup", "dropoff")
+        ]
+        job = {"id": "d1", "stops": stops, "cycle_used_hours": 12}
+        response = self.post(reverse("plan_batch"), {"jobs": [job]}, STREAM_ACCEPT["ndjson"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], STREAM_ACCEPT["ndjson"])
+        self.assertEqual(b"".join(response.streaming_content), b'{"id":"d1","ok":true}\n')
+
+    def test_unsupported_accept_is_still_406(self):
+        response = self.post(reverse("plan_trip"), TRIP, "application/xml")
+        self.assertEqual(response.status_code, 406)
+
+
+@override_settings(ASYNC_API=False, PLANS_TOKEN="secret")
+class ConditionalRequestTests(SimpleTestCase):
+    PLAN = {"plan_id": "abc123", "route": {"legs": []}}
+
+    @mock.patch.object(views, "plan_trip", return_value={"route": {"legs": []}})
+    def test_post_ignores_if_none_match(self, _plan):
+        url = reverse("plan_trip")
+        first = self.client.post(url, TRIP, content_type="application/json")
+        again = self.client.post(
+            url, TRIP, content_type="application/json", HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again["ETag"], first["ETag"])
+
+    @mock.patch.object(views, "plan_trip", return_value={"route": {"legs": []}})
+    def test_etag_varies_with_geometry_options(self, _plan):
+        url = reverse("plan_trip")
+        etags = {
+            self.client.post(url + query, TRIP, content_type="application/json")["ETag"]
+            for query in ("", "?geometry=polyline", "?geometry=polyline&zoom=8", "?zoom=8")
+        }
+        self.assertEqual(len(etags), 4)
+
+    @mock.patch.object(views, "plan_exists", return_value=True)
+    @mock.patch.object(views, "stored_plan", return_value=PLAN)
+    def test_stored_plan_get_is_conditional_per_shape(self, _stored, _exists):
+        url = reverse("plan_detail", args=["abc123"])
+        auth = {"HTTP_AUTHORIZATION": "Bearer secret"}
+        full = self.client.get(url, **auth)
+        self.assertEqual(full["ETag"], '"abc123"')
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=full["ETag"], **auth).status_code, 304
+        )
+        shaped = self.client.get(url + "?geometry=polyline", HTTP_IF_NONE_MATCH=full["ETag"], **auth)
+        self.assertEqual(shaped.status_code, 200)
+        self.assertNotEqual(shaped["ETag"], full["ETag"])
+
+
+class MetricsAccessTests(SimpleTestCase):
+    def test_token_matrix(self):
+        url = reverse("metrics")
+        cases = [
+            # (METRICS_TOKEN, DEBUG, Authorization header, status)
+            ("", False, None, 403),
+            ("", True, None, 200),
+            ("s3cret", False, None, 403),
+            ("s3cret", True, None, 403),
+            ("s3cret", False, "Bearer wrong", 403),
+            ("s3cret", False, "Bearer s3cret", 200),
+        ]
+        for token, debug, auth, expected in cases:
+            headers = {"HTTP_AUTHORIZATION": auth} if auth else {}
+            with self.subTest(token=token, debug=debug, auth=auth), \
+                    override_settings(METRICS_TOKEN=token, DEBUG=debug):
+                self.assertEqual(self.client.get(url, **headers).status_code, expected)
@@ -1,8 +1,31 @@
+from django.conf import settings
 from django.urls import path
-from .views import health_check, plan_trip_view, suggest_view
+from .views import (
+    health_check,
+    metrics_view,
+    plan_batch_view,
+    plan_detail_view,
+    plan_list_view,
+    plan_trip_async_view,
+    plan_trip_view,
+    replan_trip_view,
+    suggest_async_view,
+    suggest_view,
+)
+
+# Under an ASGI server the upstream-bound endpoints run as async views
+if settings.ASYNC_API:
+    plan_trip_endpoint, suggest_endpoint = plan_trip_async_view, suggest_async_view
+else:
+    plan_trip_endpoint, suggest_endpoint = plan_trip_view, suggest_view
 
 urlpatterns = [
     path("health/", health_check, name="health_check"),
-    path("plan-trip/", plan_trip_view, name="plan_trip"),
-    path("suggest/", suggest_view, name="suggest"),
+    path("metrics/", metrics_view, name="metrics"),
+    path("plan-trip/", plan_trip_endpoint, name="plan_trip"),
+    path("replan-trip/", replan_trip_view, name="replan_trip"),
+    path("suggest/", suggest_endpoint, name="suggest"),
+    path("plan-batch/", plan_batch_view, name="plan_batch"),
+    path("plans/", plan_list_view, name="plan_list"),
+    path("plans/<str:plan_id>/", plan_detail_view, name="plan_detail"),
 ]
@@ -1,9 +1,56 @@
+import asyncio
+import hmac
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from django.http import (
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
 
-from .serializers import TripInputSerializer
-from .services.trip_planner import TripPlannerError, plan_trip
+from .renderers import (
+    EventStreamRenderer,
+    FastJSONRenderer,
+    NDJSONRenderer,
+    dumps,
+    encode_event,
+)
+from .serializers import (
+    BatchInputSerializer,
+    GeometryOptionsSerializer,
+    PlanListSerializer,
+    PlanOptionsSerializer,
+    ReplanInputSerializer,
+    TripInputSerializer,
+)
+from .services.batch import run_batch
+from .services.estimate import estimate_trip
+from .services.plan_store import lane_key, plan_exists, recent_plans
+from .services.trip_planner import (
+    PlanNotFoundError,
+    TripPlannerError,
+    plan_key,
+    plan_trip,
+    plan_trip_async,
+    plan_trip_stream,
+    plan_trip_stream_async,
+    replan_trip,
+    shape_geometry,
+    stored_plan,
+    with_geometry,
+)
+
+# ?stream=... on plan-trip → content type
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
 
 
 @api_view(["GET"])
@@ -11,6 +58,22 @@ def health_check(request):
     return Response({"status": "ok", "service": "ELD Trip Planner API"})
 
 
+def metrics_view(request):
+    """
+    GET /api/metrics/
+    Stage timings, upstream latency, cache and rate-limit counters for this
+    worker, in Prometheus text format. Takes METRICS_TOKEN, or DEBUG when no
+    token is configured.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not _token_allowed(request, settings.METRICS_TOKEN):
+        return HttpResponseForbidden()
+
+    from .services.metrics import CONTENT_TYPE, render_prometheus
+    return HttpResponse(render_prometheus(), content_type=CONTENT_TYPE)
+
+
 @api_view(["GET"])
 def suggest_view(request):
     """
@@ -24,26 +87,305 @@ def suggest_view(request):
 
 
 @api_view(["POST"])
+@renderer_classes([FastJSONRenderer, NDJSONRenderer, EventStreamRenderer])
 def plan_trip_view(request):
     """
     POST /api/plan-trip/
     Accepts trip details → runs HOS simulation → returns route, timeline,
     daily log sheets, and stop markers.
+
+    The response carries an ETag for its inputs (including the start
+    minute) and geometry options. POST is never answered with 304:
+    re-posting an identical trip is served from the plan cache instead.
+
+    ?stream=ndjson or ?stream=sse sends the plan stage by stage instead
+    (route summary first, then geometry, timeline, logs; see
+    plan_trip_stream()). Clients may send the matching Accept header; an
+    error response to them is a single "error" event. ?geometry=polyline and ?zoom=N shrink the leg
+    geometry (see shape_geometry()).
+
+    ?estimate=1 answers in well under a millisecond from straight-line
+    distance instead, with no geocoding or routing (see estimate_trip());
+    add &deliver_by=<ISO time> to check a deadline.
     """
+    options = PlanOptionsSerializer(data=request.query_params)
+    options.is_valid(raise_exception=True)
+    fmt, shape = _plan_options(options.validated_data)
+
     serializer = TripInputSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
+    kwargs = _plan_kwargs(serializer.validated_data)
+
+    if options.validated_data["estimate"]:
+        kwargs.pop("driver_id")       # estimates are not stored
+        try:
+            return Response(estimate_trip(**kwargs, deliver_by=options.validated_data["deliver_by"]))
+        except TripPlannerError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    etag = _etag(plan_key(**kwargs), shape)
+
+    if fmt:
+        lines = _stream_lines(plan_trip_stream(**kwargs), fmt, shape)
+        return _stream_response(lines, fmt, etag)
+
+    try:
+        result = with_geometry(plan_trip(**kwargs), *shape)
+        return Response(result, headers={"ETag": etag})
+    except TripPlannerError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+
+@api_view(["POST"])
+def replan_trip_view(request):
+    """
+    POST /api/replan-trip/
+    Re-plans the rest of an earlier plan (by plan_id) from a timeline event,
+    e.g. after a delay, optionally with updated mileage on the current leg.
+    Plans this worker no longer holds are read from the plan store, which
+    takes the PLANS_TOKEN (see _plans_allowed()).
+    """
+    serializer = ReplanInputSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
     data = serializer.validated_data
 
     try:
-        result = plan_trip(
-            current_location=data["current_location"],
-            pickup_location=data["pickup_location"],
-            dropoff_location=data["dropoff_location"],
-            cycle_used_hours=data["cycle_used_hours"],
-            current_coords=(data.get("current_lat"), data.get("current_lng")),
-            pickup_coords=(data.get("pickup_lat"), data.get("pickup_lng")),
-            dropoff_coords=(data.get("dropoff_lat"), data.get("dropoff_lng")),
+        result = replan_trip(
+            data["plan_id"], data["timeline_index"], data["remaining_miles"],
+            from_store=_plans_allowed(request),
         )
         return Response(result)
+    except PlanNotFoundError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_404_NOT_FOUND)
     except TripPlannerError as exc:
         return Response({"error": str(exc)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+
+@api_view(["GET"])
+def plan_detail_view(request, plan_id: str):
+    """
+    GET /api/plans/<plan_id>/
+    A stored plan (any plan_id returned by plan-trip or replan-trip), read
+    back without re-planning. Accepts ?geometry= and ?zoom= as plan-trip
+    does. Stored plans don't change, so the ETag is the plan_id plus the
+    geometry options; a plan that isn't stored is a 404 whatever
+    If-None-Match says.
+    """
+    if not _plans_allowed(request):
+        return _plans_forbidden()
+    options = GeometryOptionsSerializer(data=request.query_params)
+    options.is_valid(raise_exception=True)
+    _, shape = _plan_options(options.validated_data)
+
+    etag = _etag(plan_id, shape)
+    if _etag_matches(request, etag) and plan_exists(plan_id):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    result = stored_plan(plan_id)
+    if result is None:
+        return Response(
+            {"error": f"Plan '{plan_id}' is not stored."}, status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(with_geometry(result, *shape), headers={"ETag": etag})
+
+
+@api_view(["GET"])
+def plan_list_view(request):
+    """
+    GET /api/plans/?driver_id=...&pickup=...&dropoff=...&limit=20
+    Newest stored plans for a driver, a pickup → dropoff lane, or both
+    (summaries only; fetch a plan by its plan_id).
+    """
+    if not _plans_allowed(request):
+        return _plans_forbidden()
+    serializer = PlanListSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    lane = lane_key(data["pickup"], data["dropoff"]) if data["pickup"] is not None else None
+    return Response(recent_plans(data["driver_id"], lane, data["limit"]))
+
+
+def _plans_allowed(request) -> bool:
+    """
+    Stored plans hold every driver's trips: reading them takes
+    PLANS_TOKEN, or DEBUG when no token is configured.
+    """
+    return _token_allowed(request, settings.PLANS_TOKEN)
+
+
+def _plans_forbidden() -> Response:
+    return Response(
+        {"error": "Stored plans require Authorization: Bearer <PLANS_TOKEN>."},
+        status=status.HTTP_403_FORBIDDEN,
+    )
+
+
+def _token_allowed(request, token: str) -> bool:
+    """Bearer ``token`` presented; with no token configured, only under DEBUG."""
+    if not token:
+        return settings.DEBUG
+    return _bearer_matches(request, token)
+
+
+def _bearer_matches(request, token: str) -> bool:
+    given = request.headers.get("Authorization", "").encode()
+    return hmac.compare_digest(given, f"Bearer {token}".encode())
+
+
+def _plan_kwargs(data: dict) -> dict:
+    """plan_trip() arguments from validated TripInputSerializer data."""
+    return {
+        "current_location": data["current_location"],
+        "pickup_location": data["pickup_location"],
+        "dropoff_location": data["dropoff_location"],
+        "cycle_used_hours": data["cycle_used_hours"],
+        "current_coords": (data.get("current_lat"), data.get("current_lng")),
+        "pickup_coords": (data.get("pickup_lat"), data.get("pickup_lng")),
+        "dropoff_coords": (data.get("dropoff_lat"), data.get("dropoff_lng")),
+        "intermediate_stops": data.get("intermediate_stops"),
+        # pinned so the ETag and the plan describe the same start minute
+        "start_time": datetime.now().replace(second=0, microsecond=0),
+        "driver_id": data.get("driver_id") or None,
+    }
+
+
+def _plan_options(options: dict) -> tuple[str | None, tuple]:
+    """(stream format, shape_geometry() arguments) from PlanOptionsSerializer data."""
+    return options.get("stream"), (options["geometry"], options.get("zoom"))
+
+
+def _stream_lines(events, fmt: str, shape: tuple):
+    """Encode (event, data) pairs; a planning failure becomes an "error" event."""
+    try:
+        for event, data in events:
+            if event == "geometry":
+                data = shape_geometry(data, *shape)
+            yield encode_event(event, data, fmt)
+    except TripPlannerError as exc:
+        yield encode_event("error", {"error": str(exc)}, fmt)
+
+
+async def _stream_lines_async(events, fmt: str, shape: tuple):
+    try:
+        async for event, data in events:
+            if event == "geometry":
+                data = await asyncio.to_thread(shape_geometry, data, *shape)
+            yield encode_event(event, data, fmt)
+    except TripPlannerError as exc:
+        yield encode_event("error", {"error": str(exc)}, fmt)
+
+
+def _stream_response(lines, fmt: str, etag: str) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(lines, content_type=STREAM_FORMATS[fmt])
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"     # nginx: pass chunks straight through
+    return response
+
+
+def _json_response(data) -> HttpResponse:
+    """JsonResponse, rendered like the DRF views (see renderers.dumps())."""
+    return HttpResponse(dumps(data), content_type="application/json")
+
+
+def _etag(key: str, shape: tuple) -> str:
+    """Strong ETag for a plan in one geometry shape (the bare key for full geometry)."""
+    encoding, zoom = shape
+    if (encoding, zoom) == ("full", None):
+        return f'"{key}"'
+    return f'"{key}-{encoding}{"" if zoom is None else f"-z{zoom}"}"'
+
+
+def _etag_matches(request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match", "")
+    # weak comparison: compression middleware sends the ETag as W/"..."
+    tags = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return header.strip() == "*" or etag in tags
+
+
+@api_view(["POST"])
+@renderer_classes([FastJSONRenderer, NDJSONRenderer])
+def plan_batch_view(request):
+    """
+    POST /api/plan-batch/
+    Accepts many driver jobs → streams one NDJSON line per job as its
+    HOS simulation finishes (completion order, match on "id"). Stops
+    without lat/lng must already be in the geocode cache.
+    """
+    serializer = BatchInputSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    results = run_batch(data["jobs"], include_timeline=data["include_timeline"])
+    lines = (dumps(result) + b"\n" for result in results)
+    return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+
+# ---------------------------------------------------------------------------
+# Async variants (DJANGO_ASYNC_API=True under an ASGI server)
+#
+# DRF views are sync-only, so these are plain Django async views that reuse
+# the same serializers and return the same payloads. Django 4.2's
+# csrf_exempt / require_http_methods don't wrap coroutines, hence the
+# inline method checks and the csrf_exempt attribute.
+# ---------------------------------------------------------------------------
+
+async def suggest_async_view(request):
+    """GET /api/suggest?q=... without holding a worker thread."""
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    from .services.autocomplete import suggest_locations_async
+    suggestions = await suggest_locations_async(request.GET.get("q", ""))
+    return _json_response(suggestions)
+
+
+async def plan_trip_async_view(request):
+    """POST /api/plan-trip/ on the event loop (same contract as plan_trip_view)."""
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    options = PlanOptionsSerializer(data=request.GET)
+    if not options.is_valid():
+        return JsonResponse(options.errors, status=400)
+    fmt, shape = _plan_options(options.validated_data)
+
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError as exc:
+        return JsonResponse({"detail": f"JSON parse error - {exc}"}, status=400)
+
+    serializer = TripInputSerializer(data=payload)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    kwargs = _plan_kwargs(serializer.validated_data)
+
+    if options.validated_data["estimate"]:
+        kwargs.pop("driver_id")
+        # no upstream calls, but the geocode cache may read the DB
+        try:
+            result = await sync_to_async(estimate_trip)(
+                **kwargs, deliver_by=options.validated_data["deliver_by"]
+            )
+        except TripPlannerError as exc:
+            return JsonResponse({"error": str(exc)}, status=422)
+        return _json_response(result)
+
+    etag = _etag(plan_key(**kwargs), shape)
+
+    if fmt:
+        lines = _stream_lines_async(plan_trip_stream_async(**kwargs), fmt, shape)
+        return _stream_response(lines, fmt, etag)
+
+    try:
+        result = await plan_trip_async(**kwargs)
+    except TripPlannerError as exc:
+        return JsonResponse({"error": str(exc)}, status=422)
+    if shape != ("full", None):
+        result = await asyncio.to_thread(with_geometry, result, *shape)
+    response = _json_response(result)
+    response["ETag"] = etag
+    return response
+
+
+plan_trip_async_view.csrf_exempt = True